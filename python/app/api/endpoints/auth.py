@@ -4,6 +4,7 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core import security
 from app.core.config import settings
@@ -13,14 +14,21 @@ from app.schemas import token as token_schema
 
 router = APIRouter()
 
+def save_password_hash(db: Session, user: User, password_hash: str):
+    user.password = password_hash
+    db.commit()
+
 @router.post("/login/access-token", response_model=token_schema.Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.user_name == form_data.username).first()
+    # Async so that waiting for the hashing pool doesn't hold a threadpool thread; queries run in the threadpool.
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.user_name == form_data.username).first()
+    )
 
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
@@ -31,8 +39,17 @@ def login_access_token(
         # For now, let's fail.
         raise HTTPException(status_code=400, detail="User has no password set")
 
-    if not security.verify_password(form_data.password, user.password):
+    try:
+        valid, new_hash = await security.password_hasher.run(
+            security.verify_and_update_password, form_data.password, user.password
+        )
+    except security.PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts, retry shortly", headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if new_hash:
+        # Stored with another cost (passwordHashRounds changed)
+        await run_in_threadpool(save_password_hash, db, user, new_hash)
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.controllers import metadata, i18n, record_controller
+from app.controllers import metadata, i18n, record_controller, admin_controller
 from app.api.v1 import attachment, notification
 from app.api.endpoints import auth
 from app.core.database import get_db
@@ -33,3 +33,4 @@ router.include_router(i18n.router)
 router.include_router(record_controller.router)
 router.include_router(attachment.router)
 router.include_router(notification.router)
+router.include_router(admin_controller.router)
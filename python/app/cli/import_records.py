@@ -0,0 +1,55 @@
+"""
+Bulk-imports records from a CSV or NDJSON file.
+
+Usage (from the python/ directory):
+    python -m app.cli.import_records Account accounts.csv [--format csv|ndjson] [--chunk-size 5000] [--errors errors.ndjson]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from app.core.database import SessionLocal
+from app.models import user, acl_entities, standard_entities
+from app.services.import_service import ImportService, READERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entity", help="entity name, e.g. Account")
+    parser.add_argument("path", help="input file")
+    parser.add_argument("--format", choices=sorted(READERS), help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per insert/transaction (importChunkSize)")
+    parser.add_argument("--errors", help="write every rejected row to this NDJSON file")
+    args = parser.parse_args()
+
+    format_ = args.format or os.path.splitext(args.path)[1].lstrip('.').lower()
+    if format_ not in READERS:
+        parser.error(f"Unknown format {format_!r}, use --format")
+
+    error_file = open(args.errors, "w", encoding="utf-8") if args.errors else None
+    on_error = (lambda error: error_file.write(json.dumps(error) + "\n")) if error_file else None
+
+    db = SessionLocal()
+    started_at = time.perf_counter()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as lines:
+            report = ImportService(db).import_rows(args.entity, READERS[format_](lines), args.chunk_size, on_error)
+    finally:
+        db.close()
+        if error_file:
+            error_file.close()
+
+    elapsed = time.perf_counter() - started_at
+    print(f"Imported {report['count']} {args.entity} records in {elapsed:.1f}s, {report['errorCount']} rejected")
+    for error in report["errors"][:20]:
+        print(f"  row {error['row']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    main()
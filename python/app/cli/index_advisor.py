@@ -0,0 +1,56 @@
+"""
+Ranks recorded list-query patterns and proposes (optionally creates) composite indexes.
+
+Usage (from the python/ directory):
+    python -m app.cli.index_advisor [--limit 20] [--create N | --create-name IDX_...]
+"""
+import argparse
+import json
+import os
+import sys
+
+python_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from app.core.database import SessionLocal
+from app.core.index_advisor import index_advisor
+from app.models import user, acl_entities, standard_entities, query_pattern
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=20, help="number of patterns/proposals to show")
+    parser.add_argument("--create", type=int, default=0, metavar="N", help="create the top N proposals")
+    parser.add_argument("--create-name", action="append", default=[], help="create the proposal with this name")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        patterns = index_advisor.get_patterns(db, args.limit)
+        proposals = index_advisor.propose(db, limit=1000)
+
+        if args.json:
+            print(json.dumps({"patterns": patterns, "proposals": proposals[:args.limit]}, indent=2))
+        else:
+            print("Top query patterns (by total time):")
+            for p in patterns:
+                print(f"  {p['table']:<14} eq={','.join(p['equalityColumns']) or '-':<30} "
+                      f"range={','.join(p['rangeColumns']) or '-':<15} sort={p['sortColumn'] or '-':<15} "
+                      f"hits={p['hits']:<8} avg={p['avgMs']:.2f}ms total={p['totalMs']:.0f}ms")
+            print("\nProposed indexes:")
+            for p in proposals[:args.limit]:
+                print(f"  {p['name']:<50} {p['table']}({', '.join(p['columns'])}) hits={p['hits']} total={p['totalMs']:.0f}ms")
+
+        to_create = proposals[:args.create]
+        to_create += [p for p in proposals if p["name"] in args.create_name and p not in to_create]
+        if to_create:
+            for name in index_advisor.create(db, to_create):
+                print(f"Created {name}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
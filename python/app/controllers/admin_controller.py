@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Body, Depends, Query
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.deps import get_current_active_superuser
+from app.core.index_advisor import index_advisor, query_pattern_recorder
+from app.core.invalidation_bus import invalidation_bus
+from app.core.principal_cache import principal_cache
+from app.core.record_cache import record_cache
+from app.core.select_manager import where_clause_cache
+from app.models.user import User
+from app.services.metadata import METADATA_NAMESPACE
+
+router = APIRouter()
+
+@router.get("/Admin/cacheStats")
+def get_cache_stats(current_user: User = Depends(get_current_active_superuser)):
+    return {
+        "whereClause": where_clause_cache.stats(),
+        "record": record_cache.stats(),
+        "principal": principal_cache.stats(),
+        "invalidation": invalidation_bus.stats()
+    }
+
+@router.post("/Admin/clearCache")
+def clear_cache(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_superuser)):
+    # After editing metadata files: every worker reloads them, here on commit, elsewhere on its next poll.
+    invalidation_bus.publish(db, METADATA_NAMESPACE)
+    db.commit()
+    return {"status": "success"}
+
+@router.get("/Admin/indexAdvisor")
+def get_index_advice(
+    limit: int = Query(20),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    query_pattern_recorder.flush(db)
+    return {
+        "patterns": index_advisor.get_patterns(db, limit),
+        "proposals": index_advisor.propose(db, limit)
+    }
+
+@router.post("/Admin/indexAdvisor/action/createIndexes")
+def create_advised_indexes(
+    body: dict = Body({}),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser)
+):
+    # Body: {"names": [...]} to pick proposals, otherwise the top `limit` (default 1) are created.
+    query_pattern_recorder.flush(db)
+    proposals = index_advisor.propose(db, limit=1000)
+    names = body.get('names')
+    if names is not None:
+        proposals = [p for p in proposals if p["name"] in names]
+    else:
+        proposals = proposals[:int(body.get('limit', 1))]
+    return {"created": index_advisor.create(db, proposals)}
@@ -1,25 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, UploadFile, File, Header
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Any, Dict
+import hashlib
 import json
 from app.core.database import get_db
-from app.services.record_service import RecordService
+from app.core.deps import get_current_user
+from app.models.user import User
+from app.core.responses import RecordResponse, iter_csv, iter_ndjson
+from app.services.record_service import RecordService, PreconditionFailed, etag_matches, get_record_etag
+from app.services.import_service import ImportService, READERS
+import io
 
 router = APIRouter()
 
 def get_record_service(db: Session = Depends(get_db)):
     return RecordService(db)
 
-@router.get("/Record/{entityName}")
-def get_list(
-    entityName: str,
+def get_user_record_service(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Bound to the authenticated user, so ACL checks apply
+    return RecordService(db, current_user)
+
+def get_import_service(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Bound to the authenticated user: create access and default owner/teams apply
+    return ImportService(db, current_user)
+
+def conditional_response(content: Any, etag: Optional[str], if_none_match: Optional[str]) -> Response:
+    # ETag of a list is a hash of its encoded body; a 304 still saves sending it.
+    if etag is None:
+        response = RecordResponse(content)
+        etag = '"' + hashlib.sha1(response.body).hexdigest()[:20] + '"'
+    else:
+        response = None
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    if response is None:
+        response = RecordResponse(content)
+    response.headers["ETag"] = etag
+    return response
+
+def parse_select(select: str) -> List[str]:
+    # select=name,industry,assignedUserId
+    return [name.strip() for name in select.split(',') if name.strip()]
+
+def get_list_params(
     where: Optional[str] = Query(None),
     sortBy: Optional[str] = Query(None),
     asc: Optional[bool] = Query(False),
     offset: Optional[int] = Query(0),
     maxSize: Optional[int] = Query(20),
-    service: RecordService = Depends(get_record_service)
-):
+    after: Optional[str] = Query(None),
+    totalMode: Optional[str] = Query(None),
+    select: Optional[str] = Query(None)
+) -> dict:
+    # Shared by record lists and linked-record lists.
     params = {}
     if where:
         try:
@@ -35,24 +69,123 @@ def get_list(
         params['offset'] = offset
     if maxSize is not None:
         params['maxSize'] = maxSize
+    if after:
+        params['after'] = after
+    if totalMode:
+        params['totalMode'] = totalMode
+    if select:
+        params['select'] = parse_select(select)
+    return params
 
+@router.get("/Record/{entityName}")
+def get_list(
+    entityName: str,
+    params: dict = Depends(get_list_params),
+    if_none_match: Optional[str] = Header(None),
+    service: RecordService = Depends(get_record_service)
+):
     try:
-        return service.find(entityName, params)
+        return conditional_response(service.find(entityName, params), None, if_none_match)
     except ValueError as e:
          raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
 
 
+@router.get("/Record/{entityName}/aggregate")
+def get_aggregate(
+    entityName: str,
+    groupBy: Optional[str] = Query(None),
+    fn: Optional[str] = Query('count'),
+    attribute: Optional[str] = Query(None),
+    where: Optional[str] = Query(None),
+    service: RecordService = Depends(get_record_service)
+):
+    # Must be registered before /Record/{entityName}/{id}.
+    params = {'fn': fn, 'attribute': attribute}
+    if groupBy:
+        params['groupBy'] = [name.strip() for name in groupBy.split(',') if name.strip()]
+    if where:
+        try:
+            params['where'] = json.loads(where)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid where parameter")
+
+    try:
+        return RecordResponse(service.aggregate(entityName, params))
+    except ValueError as e:
+         raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+}
+
+@router.get("/Record/{entityName}/export")
+def export_records(
+    entityName: str,
+    format: str = Query('ndjson'),
+    where: Optional[str] = Query(None),
+    sortBy: Optional[str] = Query(None),
+    asc: Optional[bool] = Query(False),
+    select: Optional[str] = Query(None),
+    service: RecordService = Depends(get_user_record_service)
+):
+    # Must be registered before /Record/{entityName}/{id}.
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    encode, media_type = EXPORT_FORMATS[format]
+
+    params = {'asc': asc}
+    if where:
+        try:
+            params['where'] = json.loads(where)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid where parameter")
+    if sortBy:
+        params['sortBy'] = sortBy
+    if select:
+        params['select'] = parse_select(select)
+
+    try:
+        names, rows = service.export(entityName, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+    return StreamingResponse(
+        encode(names, rows),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{entityName}.{format}"'}
+    )
+
 @router.get("/Record/{entityName}/{id}")
-def read_record(entityName: str, id: str, service: RecordService = Depends(get_record_service)):
-    record = service.read(entityName, id)
-    if not record:
+def read_record(
+    entityName: str,
+    id: str,
+    select: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    service: RecordService = Depends(get_record_service)
+):
+    try:
+        result = service.read_with_etag(entityName, id, parse_select(select) if select else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    if not result:
         raise HTTPException(status_code=404, detail="Record not found")
-    return record
+    record, etag = result
+    return conditional_response(record, etag, if_none_match)
 
 @router.post("/Record/{entityName}")
 def create_record(entityName: str, data: dict = Body(...), service: RecordService = Depends(get_record_service)):
     try:
-        return service.create(entityName, data)
+        record = service.create(entityName, data)
+        return RecordResponse(record, headers={"ETag": get_record_etag(record)})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -61,11 +194,20 @@ def create_record(entityName: str, data: dict = Body(...), service: RecordServic
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/Record/{entityName}/{id}")
-def update_record(entityName: str, id: str, data: dict = Body(...), service: RecordService = Depends(get_record_service)):
-    record = service.update(entityName, id, data)
+def update_record(
+    entityName: str,
+    id: str,
+    data: dict = Body(...),
+    if_match: Optional[str] = Header(None),
+    service: RecordService = Depends(get_record_service)
+):
+    try:
+        record = service.update(entityName, id, data, if_match)
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=412, detail=str(e))
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
-    return record
+    return RecordResponse(record, headers={"ETag": get_record_etag(record)})
 
 @router.delete("/Record/{entityName}/{id}")
 def delete_record(entityName: str, id: str, service: RecordService = Depends(get_record_service)):
@@ -74,43 +216,90 @@ def delete_record(entityName: str, id: str, service: RecordService = Depends(get
          raise HTTPException(status_code=404, detail="Record not found")
     return {"status": "success"}
 
+# Mass actions. Must be registered before /Record/{entityName}/{id}/{linkName}.
+
+@router.post("/Record/{entityName}/action/massUpdate")
+def mass_update(entityName: str, body: dict = Body(...), service: RecordService = Depends(get_user_record_service)):
+    # Body: {"ids": [...]} or {"where": [...]}, plus {"data": {...}}
+    try:
+        return service.mass_update(entityName, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@router.post("/Record/{entityName}/action/massDelete")
+def mass_delete(entityName: str, body: dict = Body(...), service: RecordService = Depends(get_user_record_service)):
+    try:
+        return service.mass_delete(entityName, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@router.post("/Record/{entityName}/action/import")
+def import_records(
+    entityName: str,
+    file: UploadFile = File(...),
+    format: str = Query('csv'),
+    service: ImportService = Depends(get_import_service)
+):
+    # The upload is spooled to a temporary file and read line by line.
+    if format not in READERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format: {format}")
+    lines = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    try:
+        return service.import_rows(entityName, READERS[format](lines))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
 # Relationship endpoints
 
 @router.get("/Record/{entityName}/{id}/{linkName}")
-def get_linked(entityName: str, id: str, linkName: str, service: RecordService = Depends(get_record_service)):
+def get_linked(
+    entityName: str,
+    id: str,
+    linkName: str,
+    params: dict = Depends(get_list_params),
+    service: RecordService = Depends(get_record_service)
+):
     try:
-        # Returns a list of records or a collection object.
-        # EspoCRM returns a collection wrapper usually. For now list is fine or we wrap it.
-        records = service.find_linked(entityName, id, linkName)
-        return {"list": records, "total": len(records)}
+        # Same collection wrapper as lists: {"list", "total", "hasMore", "nextCursor"}
+        return RecordResponse(service.find_linked(entityName, id, linkName, params))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
 
 @router.post("/Record/{entityName}/{id}/{linkName}")
-def link_record(entityName: str, id: str, linkName: str, body: dict = Body(...), service: RecordService = Depends(get_record_service)):
+def link_record(entityName: str, id: str, linkName: str, body: dict = Body(...), service: RecordService = Depends(get_user_record_service)):
     # Body can contain 'id' (single) or 'ids' (multiple)
     try:
         if 'id' in body:
             service.link(entityName, id, linkName, body['id'])
         elif 'ids' in body:
-            for foreign_id in body['ids']:
-                service.link(entityName, id, linkName, foreign_id)
+            service.link_many(entityName, id, linkName, body['ids'])
         else:
              raise HTTPException(status_code=400, detail="Missing id or ids in body")
         return {"status": "success"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
 
 @router.delete("/Record/{entityName}/{id}/{linkName}")
-def unlink_record(entityName: str, id: str, linkName: str, body: dict = Body(...), service: RecordService = Depends(get_record_service)):
+def unlink_record(entityName: str, id: str, linkName: str, body: dict = Body(...), service: RecordService = Depends(get_user_record_service)):
     try:
         if 'id' in body:
             service.unlink(entityName, id, linkName, body['id'])
         elif 'ids' in body:
-             for foreign_id in body['ids']:
-                service.unlink(entityName, id, linkName, foreign_id)
+            service.unlink_many(entityName, id, linkName, body['ids'])
         else:
              raise HTTPException(status_code=400, detail="Missing id or ids in body")
         return {"status": "success"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
@@ -6,6 +6,12 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # bcrypt cost for password hashes; stored hashes with another cost are rehashed at the next login
+    passwordHashRounds: int = 12
+    # Threads hashing passwords, and logins allowed to wait for one before the login endpoint answers 503
+    passwordHashWorkers: int = 2
+    passwordHashQueueSize: int = 64
+
     # Original config structure compatibility
     isInstalled: bool = False
     applicationName: str = "EspoCRM Python"
@@ -22,6 +28,39 @@ class Settings(BaseSettings):
     clientStrictTransportSecurityHeaderDisabled: bool = False
     siteUrl: str = "http://localhost:8000"
 
+    # Seconds a cached count(*) is reused for list requests with totalMode=estimate
+    countCacheTtl: int = 60
+
+    # Record list query patterns for the index advisor; seconds between writes to query_pattern
+    indexAdvisorEnabled: bool = True
+    indexAdvisorFlushInterval: int = 60
+
+    # Records per statement/transaction for massUpdate and massDelete
+    massActionChunkSize: int = 1000
+
+    # Rows fetched per server-side cursor batch by /Record/{entityName}/export
+    exportBatchSize: int = 2000
+
+    # Rows per executemany/transaction for record imports
+    importChunkSize: int = 1000
+
+    # Record id generation: "ordered" (time-prefixed, index friendly) or "random" (legacy)
+    recordIdScheme: str = "ordered"
+
+    # Records kept in each process's read-through record cache (0 disables it)
+    recordCacheSize: int = 5000
+
+    # Authenticated principals (by token) kept in each process, until the token expires (0 disables)
+    principalCacheSize: int = 10000
+
+    # Seconds between polls of the cache_invalidation table by each worker (0 polls on every request)
+    cacheInvalidationPollInterval: float = 0.5
+    # Seconds invalidations are kept; a worker that hasn't polled for longer drops all its caches
+    cacheInvalidationRetention: int = 3600
+
+    # Raise instead of lazy-loading relationships outside the ACL eager-loading plan (for tests)
+    aclRaiseOnLazyLoad: bool = False
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
     def get(self, key: str, default: Any = None) -> Any:
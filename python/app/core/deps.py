@@ -6,7 +6,9 @@ from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
 from app.models.user import User
+from app.services.acl_service import acl_service
 from app.schemas import token as token_schema
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -16,6 +18,12 @@ reusable_oauth2 = OAuth2PasswordBearer(
 async def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> User:
+    # A token seen before (and not expired) needs neither decoding nor queries; the cached Principal
+    # stands in for the User.
+    if principal_cache.enabled:
+        principal = principal_cache.get(token)
+        if principal is not None:
+            return principal
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -26,9 +34,15 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    # Roles and teams are loaded up front for ACL checks
+    generation = principal_cache.generation
+    user = acl_service.load_user(db, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if principal_cache.enabled:
+        principal = Principal(user)
+        principal_cache.set(token, principal, payload, generation)
+        return principal
     return user
 
 async def get_current_active_user(
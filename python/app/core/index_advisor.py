@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional, Tuple
+import datetime
+import hashlib
+import threading
+import time
+from sqlalchemy import Index, case, inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import Base
+from app.models.query_pattern import QueryPattern
+
+# Index columns beyond this rarely pay for their write cost
+MAX_INDEX_COLUMNS = 4
+
+class QueryPatternRecorder:
+    """
+    Collects (table, equality columns, range columns, sort column) shapes of executed list queries
+    with their timings. Kept in memory and periodically merged into the query_pattern table,
+    so patterns from every worker end up in one place for the advisor.
+    """
+    def __init__(self):
+        self._pending: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, table_name: str, equality: List[str], range_: List[str], sort: Optional[str], elapsed_ms: float):
+        if not settings.indexAdvisorEnabled:
+            return
+        key = (table_name, tuple(sorted(set(equality))), tuple(sorted(set(range_))), sort)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [1, elapsed_ms, elapsed_ms]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed_ms
+                entry[2] = max(entry[2], elapsed_ms)
+
+    def is_flush_due(self) -> bool:
+        return bool(self._pending) and time.monotonic() - self._last_flush >= settings.indexAdvisorFlushInterval
+
+    def maybe_flush(self, session_factory):
+        """Flushes when the configured interval has passed. Meant to run outside request transactions."""
+        with self._lock:
+            if time.monotonic() - self._last_flush < settings.indexAdvisorFlushInterval:
+                return
+            # Claim this interval so concurrent callers don't flush the same window
+            self._last_flush = time.monotonic()
+        db = session_factory()
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+    def flush(self, db: Session):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        try:
+            self._merge(db, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the counts for the next flush instead of losing them
+            with self._lock:
+                for key, (hits, total_ms, max_ms) in pending.items():
+                    entry = self._pending.get(key)
+                    if entry is None:
+                        self._pending[key] = [hits, total_ms, max_ms]
+                    else:
+                        entry[0] += hits
+                        entry[1] += total_ms
+                        entry[2] = max(entry[2], max_ms)
+            raise
+
+    def _merge(self, db: Session, pending: Dict[Tuple, List[float]]):
+        now = datetime.datetime.utcnow()
+        for (table_name, equality, range_, sort), (hits, total_ms, max_ms) in pending.items():
+            pattern_id = self._get_pattern_id(table_name, equality, range_, sort)
+            if db.get(QueryPattern, pattern_id) is None:
+                try:
+                    with db.begin_nested():
+                        db.add(QueryPattern(
+                            id=pattern_id,
+                            table_name=table_name,
+                            equality_columns=','.join(equality),
+                            range_columns=','.join(range_),
+                            sort_column=sort,
+                            hits=0,
+                            total_ms=0.0,
+                            max_ms=0.0
+                        ))
+                except IntegrityError:
+                    # Another worker inserted it first; the increment below applies on top of theirs
+                    pass
+            # Increment in the database so concurrent flushes from other workers add up
+            db.execute(
+                update(QueryPattern)
+                .where(QueryPattern.id == pattern_id)
+                .values(
+                    hits=QueryPattern.hits + hits,
+                    total_ms=QueryPattern.total_ms + total_ms,
+                    max_ms=case((QueryPattern.max_ms < max_ms, max_ms), else_=QueryPattern.max_ms),
+                    last_seen_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.expire_all()
+
+    def clear(self):
+        with self._lock:
+            self._pending = {}
+
+    def _get_pattern_id(self, table_name, equality, range_, sort) -> str:
+        raw = f"{table_name}|{','.join(equality)}|{','.join(range_)}|{sort or ''}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+class IndexAdvisor:
+    """
+    Proposes composite indexes from recorded query patterns.
+    Column order follows the equality-sort-range rule; patterns whose index would be a prefix of
+    another proposal are folded into it, and proposals already served by an existing index are dropped.
+    """
+    def get_patterns(self, db: Session, limit: int = 50) -> List[dict]:
+        patterns = db.query(QueryPattern).order_by(QueryPattern.total_ms.desc()).limit(limit).all()
+        return [p.to_dict() for p in patterns]
+
+    def propose(self, db: Session, limit: int = 20) -> List[dict]:
+        candidates: Dict[Tuple[str, Tuple[str, ...]], dict] = {}
+        for pattern in db.query(QueryPattern).all():
+            columns = self._get_index_columns(pattern)
+            if not columns or columns == ('id',):
+                continue
+            key = (pattern.table_name, columns)
+            candidate = candidates.setdefault(key, {
+                "table": pattern.table_name,
+                "columns": list(columns),
+                "hits": 0,
+                "totalMs": 0.0,
+                "patterns": []
+            })
+            candidate["hits"] += pattern.hits
+            candidate["totalMs"] += pattern.total_ms
+            candidate["patterns"].append(pattern.id)
+
+        # An index on (a, b) also serves queries needing (a); fold the shorter one in.
+        for key in sorted(candidates, key=lambda k: len(k[1])):
+            table_name, columns = key
+            wider = [
+                other for other in candidates
+                if other != key and other[0] == table_name and other[1][:len(columns)] == columns
+            ]
+            if wider:
+                target = candidates[max(wider, key=lambda k: candidates[k]["totalMs"])]
+                source = candidates.pop(key)
+                target["hits"] += source["hits"]
+                target["totalMs"] += source["totalMs"]
+                target["patterns"].extend(source["patterns"])
+
+        inspector = inspect(db.get_bind())
+        existing: Dict[str, List[Tuple[str, ...]]] = {}
+        proposals = []
+        for (table_name, columns), candidate in candidates.items():
+            if table_name not in existing:
+                existing[table_name] = self._get_existing_indexes(inspector, table_name)
+            if any(index[:len(columns)] == columns for index in existing[table_name]):
+                continue
+            candidate["name"] = self._get_index_name(table_name, columns)
+            candidate["totalMs"] = round(candidate["totalMs"], 3)
+            proposals.append(candidate)
+
+        proposals.sort(key=lambda c: c["totalMs"], reverse=True)
+        return proposals[:limit]
+
+    def create(self, db: Session, proposals: List[dict]) -> List[str]:
+        """Creates the proposed indexes. Returns the names that were created."""
+        bind = db.get_bind()
+        created = []
+        for proposal in proposals:
+            table = Base.metadata.tables.get(proposal["table"])
+            if table is None:
+                continue
+            index = Index(proposal["name"], *[table.c[name] for name in proposal["columns"]])
+            index.create(bind, checkfirst=True)
+            created.append(proposal["name"])
+        return created
+
+    def _get_index_columns(self, pattern: QueryPattern) -> Tuple[str, ...]:
+        equality = pattern.equality_columns.split(',') if pattern.equality_columns else []
+        range_ = pattern.range_columns.split(',') if pattern.range_columns else []
+        columns = list(equality)
+        if pattern.sort_column and pattern.sort_column not in columns:
+            columns.append(pattern.sort_column)
+        elif range_ and range_[0] not in columns:
+            # Only one range column can be used, and only when it isn't preceded by a sort.
+            columns.append(range_[0])
+        return tuple(columns[:MAX_INDEX_COLUMNS])
+
+    def _get_existing_indexes(self, inspector, table_name: str) -> List[Tuple[str, ...]]:
+        indexes = [tuple(index["column_names"]) for index in inspector.get_indexes(table_name)]
+        primary_key = inspector.get_pk_constraint(table_name).get("constrained_columns")
+        if primary_key:
+            indexes.append(tuple(primary_key))
+        return indexes
+
+    def _get_index_name(self, table_name: str, columns: Tuple[str, ...]) -> str:
+        name = f"IDX_{table_name}_{'_'.join(columns)}".upper()
+        if len(name) > 64:
+            # MySQL identifier limit
+            name = name[:55] + '_' + hashlib.sha1(name.encode()).hexdigest()[:8].upper()
+        return name
+
+query_pattern_recorder = QueryPatternRecorder()
+index_advisor = IndexAdvisor()
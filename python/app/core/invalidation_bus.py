@@ -0,0 +1,193 @@
+from typing import Callable, Dict, Iterable, List, Optional
+import datetime
+import os
+import secrets
+import socket
+import threading
+import time
+from sqlalchemy import delete, event, func, or_, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.cache_invalidation import CacheInvalidation
+
+# Above this many keys an event invalidates its whole namespace instead
+MAX_KEYS_PER_EVENT = 1000
+
+# With concurrent writers, ids can commit out of order: ids skipped by a poll are read again for this
+# many seconds. Ids of rolled-back inserts never show up and are dropped after that.
+GAP_TIMEOUT = 60
+
+# Most skipped ids tracked at once; the oldest are dropped beyond it
+MAX_GAPS = 1000
+
+# Seconds between deletes of rows older than cacheInvalidationRetention
+PRUNE_INTERVAL = 60
+
+Subscriber = Callable[[Optional[List[str]]], None]
+
+class InvalidationBus:
+    """
+    Cross-worker cache invalidation through the cache_invalidation table.
+
+    Writers publish (namespace, keys) in their own transaction. Subscribers in the same process are called
+    once it commits; other processes call poll() (the HTTP middleware does, at most every
+    cacheInvalidationPollInterval seconds) and dispatch the rows written since their last poll.
+    Subscribers get the list of keys, or None when everything in the namespace must be dropped.
+    """
+    def __init__(self):
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+        self._origin = None
+        self._origin_pid = None
+        self._last_id = None
+        # Skipped id -> monotonic time it was first missed
+        self._gaps: Dict[int, float] = {}
+        self._last_poll = time.monotonic()
+        self._last_prune = time.monotonic()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.received = 0
+
+    @property
+    def origin(self) -> str:
+        # Per process, also across fork
+        pid = os.getpid()
+        if self._origin_pid != pid:
+            self._origin = f"{socket.gethostname()[:40]}:{pid}:{secrets.token_hex(4)}"
+            self._origin_pid = pid
+        return self._origin
+
+    def subscribe(self, namespace: str, callback: Subscriber):
+        self._subscribers.setdefault(namespace, []).append(callback)
+
+    def publish(self, db: Session, namespace: str, keys: Optional[Iterable[str]] = None):
+        """Records the invalidation in db's current transaction."""
+        if keys is not None:
+            keys = sorted(set(keys))
+            if not keys:
+                return
+            if len(keys) > MAX_KEYS_PER_EVENT:
+                keys = None
+        now = datetime.datetime.utcnow()
+        origin = self.origin
+        db.connection().execute(CacheInvalidation.__table__.insert(), [
+            {"namespace": namespace, "key": key, "origin": origin, "created_at": now}
+            for key in (keys if keys is not None else [None])
+        ])
+        db.info.setdefault('cache_invalidations', []).append((namespace, keys))
+        self.published += 1
+
+    def dispatch(self, namespace: str, keys: Optional[List[str]]):
+        for callback in self._subscribers.get(namespace, ()):
+            callback(keys)
+
+    def dispatch_all(self):
+        for namespace in list(self._subscribers):
+            self.dispatch(namespace, None)
+
+    def start(self, db: Session):
+        """Skips everything already in the table: this process's caches are empty."""
+        with self._lock:
+            self._start(db)
+
+    def maybe_poll(self, session_factory):
+        """Polls when cacheInvalidationPollInterval has passed. Meant to run outside request transactions."""
+        if time.monotonic() - self._last_poll < settings.cacheInvalidationPollInterval:
+            return
+        db = session_factory()
+        try:
+            self.poll(db)
+        finally:
+            db.close()
+
+    def poll(self, db: Session) -> int:
+        """Dispatches invalidations from other processes since the last poll; returns how many rows were read."""
+        if not self._lock.acquire(blocking=False):
+            # Another thread is polling
+            return 0
+        try:
+            if self._last_id is None:
+                self._start(db)
+                return 0
+
+            now = time.monotonic()
+            if now - self._last_poll > settings.cacheInvalidationRetention:
+                # Rows this process hasn't seen may have been pruned already
+                self.dispatch_all()
+            self._last_poll = now
+
+            condition = CacheInvalidation.id > self._last_id
+            if self._gaps:
+                condition = or_(condition, CacheInvalidation.id.in_(list(self._gaps)))
+            rows = db.execute(
+                select(CacheInvalidation.id, CacheInvalidation.namespace, CacheInvalidation.key, CacheInvalidation.origin)
+                .where(condition)
+                .order_by(CacheInvalidation.id)
+            ).all()
+
+            origin = self.origin
+            by_namespace: Dict[str, Optional[set]] = {}
+            for row in rows:
+                if row.id <= self._last_id and self._gaps.pop(row.id, None) is None:
+                    continue
+                if row.origin == origin:
+                    # Already dispatched on commit
+                    continue
+                self.received += 1
+                if row.key is None:
+                    by_namespace[row.namespace] = None
+                elif by_namespace.get(row.namespace, ()) is not None:
+                    by_namespace.setdefault(row.namespace, set()).add(row.key)
+
+            if rows and rows[-1].id > self._last_id:
+                read_ids = {row.id for row in rows}
+                for id in range(max(self._last_id + 1, rows[-1].id - MAX_GAPS), rows[-1].id):
+                    if id not in read_ids:
+                        self._gaps[id] = now
+                self._last_id = rows[-1].id
+            if self._gaps:
+                self._gaps = {id: seen_at for id, seen_at in self._gaps.items() if now - seen_at < GAP_TIMEOUT}
+                if len(self._gaps) > MAX_GAPS:
+                    self._gaps = dict(sorted(self._gaps.items())[-MAX_GAPS:])
+
+            for namespace, keys in by_namespace.items():
+                self.dispatch(namespace, sorted(keys) if keys is not None else None)
+
+            if now - self._last_prune > PRUNE_INTERVAL:
+                self._last_prune = now
+                cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.cacheInvalidationRetention)
+                db.execute(delete(CacheInvalidation).where(CacheInvalidation.created_at < cutoff))
+                db.commit()
+            return len(rows)
+        finally:
+            self._lock.release()
+
+    def _start(self, db: Session):
+        self._last_id = db.execute(select(func.max(CacheInvalidation.id))).scalar() or 0
+        self._gaps = {}
+        self._last_poll = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "origin": self.origin,
+            "lastId": self._last_id,
+            "gaps": len(self._gaps),
+            "published": self.published,
+            "received": self.received,
+            "namespaces": sorted(self._subscribers)
+        }
+
+invalidation_bus = InvalidationBus()
+
+# Local subscribers see an invalidation once the publishing transaction has committed, never before.
+
+@event.listens_for(Session, 'after_commit')
+def _on_after_commit(session):
+    pending = session.info.pop('cache_invalidations', None)
+    for namespace, keys in pending or ():
+        invalidation_bus.dispatch(namespace, keys)
+
+@event.listens_for(Session, 'after_transaction_end')
+def _on_after_transaction_end(session, transaction):
+    # Rolled back (a committed transaction was already popped); savepoints keep the outer transaction's events
+    if transaction.parent is None:
+        session.info.pop('cache_invalidations', None)
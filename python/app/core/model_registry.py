@@ -0,0 +1,149 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from operator import attrgetter
+import re
+from sqlalchemy import inspect
+from app.models.user import User
+from app.models.standard_entities import Account, Contact
+from app.models.acl_entities import Role, Team
+
+def to_camel_case(name: str) -> str:
+    first, *rest = name.split('_')
+    return first + ''.join(part[:1].upper() + part[1:] for part in rest)
+
+def to_snake_case(name: str) -> str:
+    name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+# Never usable in where, sorting or aggregates (e.g. a startsWith filter would reveal a hash one character at a time)
+NON_FILTERABLE_ATTRIBUTES = frozenset(('password',))
+
+class ModelInfo:
+    """
+    Mapper reflection for one model, computed once.
+    API names are the column names (usually camelCase, e.g. "userName") and the attribute keys ("user_name").
+    """
+    def __init__(self, model_class):
+        self.model_class = model_class
+        mapper = inspect(model_class)
+
+        # API name -> Column, API name -> attribute key
+        self.columns = {}
+        self.attribute_keys = {}
+        # Ordered (attribute key, column name) pairs used for serialization and population
+        self.fields: List[Tuple[str, str]] = []
+
+        column_props = [prop for prop in mapper.iterate_properties if hasattr(prop, 'columns')]
+        for prop in column_props:
+            col = prop.columns[0]
+            self.fields.append((prop.key, col.name))
+            self.columns[col.name] = col
+            self.attribute_keys[col.name] = prop.key
+        # Attribute keys take precedence over column names, matching the old lookup order.
+        for prop in column_props:
+            self.columns[prop.key] = prop.columns[0]
+            self.attribute_keys[prop.key] = prop.key
+
+        # Link name (camelCase or attribute key) -> RelationshipProperty
+        self.relationships = {}
+        for rel in mapper.relationships:
+            self.relationships[to_camel_case(rel.key)] = rel
+        for rel in mapper.relationships:
+            self.relationships[rel.key] = rel
+
+        # Allow-list for filters, sorting and aggregates: every column except NON_FILTERABLE_ATTRIBUTES
+        self.filterable_columns = {
+            name: col for name, col in self.columns.items()
+            if name not in NON_FILTERABLE_ATTRIBUTES and self.attribute_keys[name] not in NON_FILTERABLE_ATTRIBUTES
+        }
+
+        # Column -> attribute key, for reading values off records given a resolved column
+        self.column_keys = {prop.columns[0]: prop.key for prop in column_props}
+
+        # Compiled serializers per field list (None = all fields)
+        self._serializers: Dict[Optional[Tuple[Tuple[str, str], ...]], Callable] = {}
+
+    def select_fields(self, names: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        """Fields restricted to the given API names, in model order. `id` is always included; unknown names are ignored."""
+        if names is None:
+            return self.fields
+        keys = {self.attribute_keys[name] for name in names if name in self.attribute_keys}
+        keys.add('id')
+        return [field for field in self.fields if field[0] in keys]
+
+    def get_serializer(self, fields: Optional[List[Tuple[str, str]]] = None) -> Callable:
+        """
+        Returns a function turning a record into a dict keyed by column name, for `fields` (all when None).
+        Built once per field list: a single attrgetter call fetches every value.
+        """
+        cache_key = tuple(fields) if fields is not None else None
+        serializer = self._serializers.get(cache_key)
+        if serializer is None:
+            serializer = self._build_serializer(self.fields if fields is None else fields)
+            # Projections come from clients; bound the number kept.
+            if len(self._serializers) < 256:
+                self._serializers[cache_key] = serializer
+        return serializer
+
+    def _build_serializer(self, fields: List[Tuple[str, str]]) -> Callable:
+        keys = [key for key, column_name in fields]
+        # Plain str: column names are quoted_name instances, which some encoders reject as keys
+        names = [str(column_name) for key, column_name in fields]
+        if len(keys) == 1:
+            getter = attrgetter(keys[0])
+            name = names[0]
+            return lambda record: {name: getter(record)}
+        getter = attrgetter(*keys)
+        return lambda record: dict(zip(names, getter(record)))
+
+    def get_column(self, name: str):
+        return self.columns.get(name)
+
+    def get_filterable_column(self, name: str):
+        return self.filterable_columns.get(name)
+
+    def get_attribute_key(self, name: str) -> Optional[str]:
+        return self.attribute_keys.get(name)
+
+    def get_relationship(self, link_name: str):
+        rel = self.relationships.get(link_name)
+        if rel is None:
+            rel = self.relationships.get(to_snake_case(link_name))
+        return rel
+
+class ModelRegistry:
+    """Entity name -> model class, plus a ModelInfo per model class built once at startup."""
+    def __init__(self):
+        self.entities: Dict[str, type] = {}
+        self._info: Dict[type, ModelInfo] = {}
+
+    def register(self, entity_name: str, model_class):
+        self.entities[entity_name] = model_class
+
+    def build(self):
+        for model_class in self.entities.values():
+            self.get(model_class)
+
+    def get(self, model_class) -> ModelInfo:
+        info = self._info.get(model_class)
+        if info is None:
+            info = ModelInfo(model_class)
+            self._info[model_class] = info
+        return info
+
+    def get_model(self, entity_name: str):
+        return self.entities.get(entity_name)
+
+    def get_entity_name(self, model_class) -> Optional[str]:
+        for entity_name, entity_class in self.entities.items():
+            if entity_class is model_class:
+                return entity_name
+        return None
+
+model_registry = ModelRegistry()
+
+# In a real dynamic system, this would be driven by metadata.
+model_registry.register("User", User)
+model_registry.register("Account", Account)
+model_registry.register("Contact", Contact)
+model_registry.register("Role", Role)
+model_registry.register("Team", Team)
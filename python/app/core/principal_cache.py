@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+from app.core.config import settings
+from app.core.invalidation_bus import invalidation_bus
+from app.core.record_cache import RECORD_NAMESPACE
+from app.models.user import User
+from app.services.acl_service import ACL_NAMESPACE, acl_service
+
+class PrincipalTeam:
+    __slots__ = ('id', 'name')
+
+    def __init__(self, team):
+        self.id = team.id
+        self.name = team.name
+
+class Principal:
+    """
+    Detached snapshot of an authenticated user: the attributes endpoints read from current_user, plus team ids
+    and the permission table compiled from the user as loaded. The table is frozen: AclService uses it as is and
+    never recompiles from the snapshot (whose role data could be stale by then). Never attached to a session;
+    don't write through it.
+    """
+    def __init__(self, user: User):
+        self.id = user.id
+        self.user_name = user.user_name
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+        self.is_admin = user.is_admin
+        self.default_team_id = user.default_team_id
+        self.teams = [PrincipalTeam(team) for team in user.teams]
+        self.permission_table = acl_service.get_permission_table(user)
+
+    name = property(User.name.fget)
+
+    @property
+    def team_ids(self) -> List[str]:
+        return [team.id for team in self.teams]
+
+class PrincipalCache:
+    """
+    Per-process cache of authenticated principals keyed by a hash of the bearer token, valid until the token's
+    exp. Entries are dropped when the user, one of their teams or roles changes (through the invalidation bus).
+    Size is settings.principalCacheSize (0 disables).
+    """
+    def __init__(self, max_size: Optional[int] = None):
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; a principal loaded before one must not be cached
+        self.generation = 0
+        # token hash -> (principal, claims, exp timestamp)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size if self._max_size is not None else settings.principalCacheSize
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_key(self, token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = self.get_key(token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[2] <= time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token: str, principal: Principal, claims: Dict[str, Any], generation: int):
+        """`claims` must come from a verified token and carry exp; tokens without one are not cached."""
+        max_size = self.max_size
+        exp = claims.get('exp')
+        if max_size <= 0 or exp is None:
+            return
+        key = self.get_key(token)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = (principal, claims, float(exp))
+            self._data.move_to_end(key)
+            while len(self._data) > max_size:
+                self._data.popitem(last=False)
+
+    def on_invalidation(self, keys: Optional[List[str]]):
+        """Subscriber for the acl and record namespaces: "User/<id>", "Team/<id>" and "Role/<id>" keys."""
+        user_ids, team_ids, role_ids = set(), set(), set()
+        for key in keys or ():
+            entity_type, _, id = key.partition('/')
+            if entity_type == 'User':
+                user_ids.add(id)
+            elif entity_type == 'Team':
+                team_ids.add(id)
+            elif entity_type == 'Role':
+                role_ids.add(id)
+        if keys is not None and not (user_ids or team_ids or role_ids):
+            return
+
+        with self._lock:
+            self.generation += 1
+            for key, (principal, claims, exp) in list(self._data.items()):
+                if (
+                    keys is None
+                    or principal.id in user_ids
+                    or not team_ids.isdisjoint(principal.team_ids)
+                    or any(role_id in role_ids for role_id, revision in principal.permission_table.signature)
+                ):
+                    del self._data[key]
+                    self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxSize": self.max_size,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+principal_cache = PrincipalCache()
+invalidation_bus.subscribe(ACL_NAMESPACE, principal_cache.on_invalidation)
+invalidation_bus.subscribe(RECORD_NAMESPACE, principal_cache.on_invalidation)
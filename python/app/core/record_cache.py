@@ -0,0 +1,130 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+from collections import OrderedDict
+import threading
+from app.core.config import settings
+from app.core.invalidation_bus import invalidation_bus
+
+# Invalidation bus namespace for record writes; keys are "<entity type>/<id>"
+RECORD_NAMESPACE = 'record'
+
+def get_record_key(entity_type: str, id: str) -> str:
+    return f"{entity_type}/{id}"
+
+class CachedRecord:
+    """
+    Row data of a record (full field set, keyed by column name) plus what a scope check needs.
+    Never holds a per-user decision: the caller checks scope against these values on every hit.
+    """
+    __slots__ = ('data', 'assigned_user_id', 'team_ids')
+
+    def __init__(self, data: Dict[str, Any], assigned_user_id: Optional[str], team_ids: Optional[FrozenSet[str]]):
+        self.data = data
+        self.assigned_user_id = assigned_user_id
+        self.team_ids = team_ids
+
+class RecordCache:
+    """
+    Per-process LRU read-through cache of records keyed by (entity type, id).
+    Writers publish the ids they changed on the invalidation bus; entries are dropped when that commits here,
+    or on the next poll in other workers. Size is settings.recordCacheSize (0 disables).
+    """
+    def __init__(self, max_size: Optional[int] = None):
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; a load that started before one must not be cached
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size if self._max_size is not None else settings.recordCacheSize
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, entity_type: str, id: str) -> Optional[CachedRecord]:
+        key = (entity_type, id)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, entity_type: str, id: str, entry: CachedRecord, generation: int):
+        """`generation` is the value read before loading the entry; stale loads are dropped."""
+        max_size = self.max_size
+        if max_size <= 0:
+            return
+        key = (entity_type, id)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, entity_type: str, ids: Iterable[str]):
+        with self._lock:
+            self.generation += 1
+            for id in ids:
+                if self._data.pop((entity_type, id), None) is not None:
+                    self.invalidations += 1
+
+    def invalidate_entity(self, entity_type: str):
+        with self._lock:
+            self.generation += 1
+            keys = [key for key in self._data if key[0] == entity_type]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+
+    def invalidate_all(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def on_invalidation(self, keys: Optional[List[str]]):
+        if keys is None:
+            self.invalidate_all()
+            return
+        by_entity = {}
+        for key in keys:
+            entity_type, _, id = key.partition('/')
+            by_entity.setdefault(entity_type, []).append(id)
+        for entity_type, ids in by_entity.items():
+            self.invalidate(entity_type, ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxSize": self.max_size,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+record_cache = RecordCache()
+invalidation_bus.subscribe(RECORD_NAMESPACE, record_cache.on_invalidation)
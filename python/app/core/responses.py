@@ -0,0 +1,71 @@
+from typing import Any, Iterable, Iterator, List
+import csv
+import datetime
+import decimal
+import io
+import itertools
+import json
+import uuid
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any):
+    # Types orjson and json don't encode natively, converted as jsonable_encoder would.
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class RecordResponse(Response):
+    """
+    JSON response for record payloads (plain dicts/lists of column values).
+    Returned directly from endpoints so FastAPI skips jsonable_encoder; encoded with orjson when installed.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# Rows per chunk written to the response stream
+STREAM_CHUNK_ROWS = 500
+
+def _batches(rows: Iterable[tuple]) -> Iterator[List[tuple]]:
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, STREAM_CHUNK_ROWS))
+        if not batch:
+            return
+        yield batch
+
+def iter_ndjson(names: List[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """One JSON object per line, keyed by `names`."""
+    for batch in _batches(rows):
+        yield b"".join(dumps(dict(zip(names, row))) + b"\n" for row in batch)
+
+def iter_csv(names: List[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """CSV with a header row. None is written as an empty field."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for batch in _batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only, no rows
+        yield buffer.getvalue().encode("utf-8")
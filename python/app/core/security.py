@@ -1,16 +1,95 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Callable, Optional, Tuple, Union
+import asyncio
+import threading
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_contexts = {}
+
+def get_pwd_context() -> CryptContext:
+    """Hashes at passwordHashRounds; hashes with any other cost need an update."""
+    rounds = settings.passwordHashRounds
+    context = _contexts.get(rounds)
+    if context is None:
+        context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+        _contexts[rounds] = context
+    return context
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new hash); the new hash is set when the stored one uses another cost or scheme."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+class PasswordHasherBusy(Exception):
+    pass
+
+class PasswordHasher:
+    """
+    Runs password hashing in its own thread pool (bcrypt releases the GIL), so a login storm can't take the
+    threads the rest of the API runs on. At most passwordHashWorkers hashes run at once and passwordHashQueueSize
+    more wait; beyond that submit() fails fast with PasswordHasherBusy.
+    """
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = settings.passwordHashWorkers
+                    self._slots = threading.BoundedSemaphore(workers + settings.passwordHashQueueSize)
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def submit(self, fn: Callable, *args) -> Future:
+        executor = self._get_executor()
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many logins in progress")
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        self.completed += 1
+        self._slots.release()
+
+    async def run(self, fn: Callable, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self):
+        """Settings changes to the pool size apply to the next executor."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {"completed": self.completed, "rejected": self.rejected}
+
+password_hasher = PasswordHasher()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
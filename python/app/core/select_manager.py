@@ -1,29 +1,330 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, or_, not_, desc, asc, func, literal
+from sqlalchemy.orm import Session, MANYTOONE, ONETOMANY, load_only, with_parent
+from sqlalchemy import select, and_, or_, not_, desc, asc, func, literal, text, bindparam, exists, false
 from typing import List, Optional, Any, Dict
+from collections import OrderedDict
+import base64
+import datetime
 import json
-from sqlalchemy import inspect
-from app.core.database import Base
+import threading
+import time
+from app.core.config import settings
+from app.core.index_advisor import query_pattern_recorder
+from app.models.acl_entities import entity_team
+from app.models.user import User
+from app.core.model_registry import NON_FILTERABLE_ATTRIBUTES, model_registry
+from app.core.text_search import text_search_index
+from app.services.acl_service import acl_service
+
+TOTAL_MODE_EXACT = 'exact'
+TOTAL_MODE_NONE = 'none'
+TOTAL_MODE_ESTIMATE = 'estimate'
+TOTAL_MODE_HAS_MORE = 'hasMore'
+
+TOTAL_MODES = (TOTAL_MODE_EXACT, TOTAL_MODE_NONE, TOTAL_MODE_ESTIMATE, TOTAL_MODE_HAS_MORE)
+
+
+class CountCache:
+    """
+    Short-lived cache of count(*) results keyed by the count statement and its parameters.
+    Backs totalMode=estimate, where a total that is a few seconds stale is acceptable.
+    """
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[int]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            total, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return total
+
+    def set(self, key, total: int):
+        with self._lock:
+            if len(self._data) >= self.max_size:
+                self._data.clear()
+            self._data[key] = (total, time.monotonic() + settings.countCacheTtl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+count_cache = CountCache()
+
+
+VALUELESS_WHERE_TYPES = ('isNull', 'isNotNull', 'isTrue', 'isFalse')
+
+# Filter types an index can serve, for the index advisor
+EQUALITY_WHERE_TYPES = ('equals', 'in', 'isNull', 'isTrue', 'isFalse')
+RANGE_WHERE_TYPES = ('greaterThan', 'lessThan', 'greaterThanOrEquals', 'lessThanOrEquals', 'startsWith')
+
+# Value is a foreign id or a list of them
+LINKED_WITH_TYPES = ('linkedWith', 'notLinkedWith')
+
+LIKE_PATTERNS = {
+    'contains': '%{}%',
+    'notContains': '%{}%',
+    'startsWith': '{}%',
+    'endsWith': '%{}',
+}
+
+AGGREGATE_FUNCTIONS = {
+    'count': func.count,
+    'sum': func.sum,
+    'avg': func.avg,
+    'min': func.min,
+    'max': func.max,
+}
+
+# sort_by marker for full-text relevance ordering
+RELEVANCE_SORT = '$relevance'
+
+# Cached marker for a where tree that produced no conditions at all.
+NO_CONDITION = object()
+
+
+class WhereParam:
+    """Placeholder for a where value inside a normalized where template."""
+    __slots__ = ('name', 'expanding')
+
+    def __init__(self, name: str, expanding: bool = False):
+        self.name = name
+        self.expanding = expanding
+
+    def bind(self):
+        return bindparam(self.name, expanding=self.expanding)
+
+
+class WhereClauseCache:
+    """
+    LRU cache of built where clauses keyed by (model, where shape).
+    Requests that only differ in filter values reuse the same expression.
+    """
+    def __init__(self, max_size: int = 500):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            clause = self._data.get(key)
+            if clause is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return clause
+
+    def set(self, key, clause):
+        with self._lock:
+            self._data[key] = clause
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "hitRate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+where_clause_cache = WhereClauseCache()
+
+
+def encode_cursor(sort_by: Optional[str], value: Any, id_: str) -> str:
+    """
+    Builds an opaque keyset cursor from the last row of a page.
+    The sort attribute is embedded so a cursor can't be replayed against a different ordering.
+    """
+    if isinstance(value, datetime.datetime):
+        value = {"$dt": value.isoformat()}
+    elif isinstance(value, datetime.date):
+        value = {"$d": value.isoformat()}
+    payload = json.dumps([sort_by, value, id_], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Reverses encode_cursor. Returns (sort_by, value, id)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_by, value, id_ = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if isinstance(value, dict):
+        if "$dt" in value:
+            value = datetime.datetime.fromisoformat(value["$dt"])
+        elif "$d" in value:
+            value = datetime.date.fromisoformat(value["$d"])
+    return sort_by, value, id_
 
 class SelectManager:
-    def __init__(self, db: Session, model_class):
+    def __init__(self, db: Session, model_class, user: Optional[User] = None):
         self.db = db
         self.model_class = model_class
+        # Principal whose read access on related entities restricts link.attribute filters
+        self.user = user
+        self.model_info = model_registry.get(model_class)
+        self.dialect_name = db.get_bind().dialect.name
         self.base_query = select(model_class)
         self.pagination_applied = False
+        self.sort_by = None
+        self.sort_column = None
+        self.asc_order = True
+        self.cursor_condition = None
+        self.offset = None
+        self.limit = None
+        self.has_more = None
+        # Values for bind parameters of cached where clauses
+        self.params = {}
+        # Parameter holding the full-text query of a textFilter, used for relevance ordering
+        self.text_filter_param = None
+        # Column names filtered by equality / range, recorded for the index advisor
+        self.equality_columns = []
+        self.range_columns = []
 
     def apply_where(self, where: List[Dict]):
         if not where:
             return
 
-        conditions = []
-        for item in where:
-            condition = self._get_where_part(item)
-            if condition is not None:
-                conditions.append(condition)
+        # Values are lifted out into bind parameters so the expression only depends on the shape
+        # of the where tree and can be reused. Identical statements also hit SQLAlchemy's
+        # compiled cache, so SQL compilation is skipped as well.
+        values = {}
+        template, shape = self._normalize_where(where, values)
+        self._collect_filtered_columns(where)
+        key = (self.model_class, self.dialect_name, shape)
 
-        if conditions:
-            self.base_query = self.base_query.where(and_(*conditions))
+        clause = where_clause_cache.get(key)
+        if clause is None:
+            conditions = []
+            for item in template:
+                condition = self._get_where_part(item)
+                if condition is not None:
+                    conditions.append(condition)
+            clause = and_(*conditions) if conditions else NO_CONDITION
+            where_clause_cache.set(key, clause)
+
+        if clause is not NO_CONDITION:
+            self.base_query = self.base_query.where(clause)
+            self.params.update(values)
+
+    def _collect_filtered_columns(self, items: List[Dict]):
+        # Only AND-ed leaves can share a composite index; OR branches are skipped.
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            type_ = item.get('type')
+            if type_ == 'and' and isinstance(item.get('value'), list):
+                self._collect_filtered_columns(item['value'])
+                continue
+            column = self._get_column(item.get('attribute') or item.get('field') or '')
+            if column is None:
+                continue
+            if type_ in EQUALITY_WHERE_TYPES:
+                self.equality_columns.append(column.name)
+            elif type_ in RANGE_WHERE_TYPES:
+                self.range_columns.append(column.name)
+
+    def _normalize_where(self, items: List[Dict], values: Dict[str, Any]):
+        """
+        Splits a where tree into a template (values replaced by WhereParam) and a hashable shape key.
+        The shape covers types, attributes, nesting and value types; `values` receives the parameters.
+        """
+        parts = [self._normalize_where_part(item, values) for item in items]
+        return [p[0] for p in parts], tuple(p[1] for p in parts)
+
+    def _normalize_where_part(self, item: Dict, values: Dict[str, Any]):
+        if not isinstance(item, dict):
+            return {}, None
+
+        type_ = item.get('type')
+        attribute = item.get('attribute') or item.get('field')
+        value = item.get('value')
+
+        if type_ in ('or', 'and'):
+            if not isinstance(value, list):
+                return {'type': type_}, (type_, None)
+            template, shape = self._normalize_where(value, values)
+            return {'type': type_, 'value': template}, (type_, shape)
+
+        if isinstance(attribute, str) and attribute.rsplit('.', 1)[-1] in NON_FILTERABLE_ATTRIBUTES:
+            raise ValueError(f"Attribute {attribute} is not filterable")
+
+        if type_ == 'textFilter':
+            if not text_search_index.supports(self.model_class):
+                raise ValueError(f"Text search is not available for {self.model_class.__name__}")
+            value = text_search_index.prepare_query(value, self.dialect_name) if value is not None else None
+            if value is None:
+                raise ValueError("Text filter has no search terms")
+
+        if type_ in VALUELESS_WHERE_TYPES or value is None:
+            return self._add_link_scope({'type': type_, 'attribute': attribute}, (type_, attribute), values)
+
+        if type_ in LIKE_PATTERNS:
+            value = LIKE_PATTERNS[type_].format(value)
+        elif type_ in LINKED_WITH_TYPES and not isinstance(value, list):
+            value = [value]
+
+        param = WhereParam(f"w{len(values)}", expanding=isinstance(value, list))
+        values[param.name] = value
+        if type_ == 'textFilter' and self.text_filter_param is None:
+            self.text_filter_param = param
+        template = {'type': type_, 'attribute': attribute, 'value': param}
+        return self._add_link_scope(template, (type_, attribute, type(value).__name__), values)
+
+    def _add_link_scope(self, template: Dict, shape: tuple, values: Dict[str, Any]):
+        attribute = template.get('attribute')
+        if not isinstance(attribute, str):
+            return template, shape
+        if template['type'] in LINKED_WITH_TYPES:
+            if self.model_info.get_relationship(attribute) is None:
+                return template, shape
+        elif '.' not in attribute or self._get_column(attribute) is not None:
+            return template, shape
+        # The related records' read scope goes into the EXISTS / semi-join; the level is part of the shape,
+        # the principal's id and teams are parameters. Also for linkedWith, so ids the user can't read
+        # can't be probed for links.
+        scope = self._get_link_scope(attribute, values)
+        template['scope'] = scope
+        return template, shape + (scope[0] if scope else None,)
+
+    def _get_link_scope(self, attribute: str, values: Dict[str, Any]):
+        """(level, user id param, team ids param) for a link.attribute or linkedWith filter, or None when unrestricted."""
+        if self.user is None or self.user.is_admin:
+            return None
+        rel = self.model_info.get_relationship(attribute.split('.', 1)[0])
+        if rel is None:
+            return None
+        entity_name = model_registry.get_entity_name(rel.mapper.class_)
+        level = acl_service.get_permission_level(self.user, entity_name, 'read') if entity_name else 'no'
+        if level == 'all':
+            return None
+        if level not in ('own', 'team'):
+            raise PermissionError(f"Read access denied for {entity_name or attribute}")
+
+        user_param = WhereParam(f"w{len(values)}")
+        values[user_param.name] = self.user.id
+        team_param = WhereParam(f"w{len(values)}", expanding=True)
+        values[team_param.name] = [team.id for team in self.user.teams]
+        return level, user_param, team_param
 
     def _get_where_part(self, item: Dict):
         type_ = item.get('type')
@@ -46,27 +347,47 @@ class SelectManager:
             sub_conditions = [c for c in sub_conditions if c is not None]
             return and_(*sub_conditions) if sub_conditions else None
 
+        if type_ == 'textFilter':
+            # Searches the entity's full-text index; the attribute is not used.
+            if not isinstance(value, WhereParam) or not text_search_index.supports(self.model_class):
+                return None
+            return text_search_index.filter_clause(self.model_class, value.bind(), self.dialect_name)
+
         if not attribute:
             return None
 
+        if type_ in LINKED_WITH_TYPES:
+            return self._get_linked_with_part(type_, attribute, value, item.get('scope'))
+
         # Resolve model column
         column = self._get_column(attribute)
-        if column is None:
-            # TODO: Handle relationships or ignore
-            return None
+        if column is not None:
+            return self._get_comparison(column, type_, value)
 
+        if '.' in attribute:
+            return self._get_link_attribute_part(type_, attribute, value, item.get('scope'))
+
+        return None
+
+    def _get_comparison(self, column, type_: str, value):
+        is_list = False
+        if isinstance(value, WhereParam):
+            is_list = value.expanding
+            value = value.bind()
+
+        # LIKE patterns (%value%, value%, %value) are already applied to the parameter.
         if type_ == 'equals':
             return column == value
         elif type_ == 'notEquals':
             return column != value
         elif type_ == 'contains':
-            return column.like(f"%{value}%")
+            return column.like(value)
         elif type_ == 'notContains':
-            return not_(column.like(f"%{value}%"))
+            return not_(column.like(value))
         elif type_ == 'startsWith':
-            return column.like(f"{value}%")
+            return column.like(value)
         elif type_ == 'endsWith':
-            return column.like(f"%{value}")
+            return column.like(value)
         elif type_ == 'greaterThan':
             return column > value
         elif type_ == 'lessThan':
@@ -76,10 +397,10 @@ class SelectManager:
         elif type_ == 'lessThanOrEquals':
             return column <= value
         elif type_ == 'in':
-            if isinstance(value, list):
+            if is_list:
                 return column.in_(value)
         elif type_ == 'notIn':
-            if isinstance(value, list):
+            if is_list:
                 return not_(column.in_(value))
         elif type_ == 'isNull':
             return column.is_(None)
@@ -92,33 +413,100 @@ class SelectManager:
 
         return None
 
-    def _get_column(self, attribute_name: str):
-        # Handle snake_case vs camelCase mapping
-        # Inspect the model to find the column
-        mapper = inspect(self.model_class).mapper
-
-        # 1. Check if attribute matches property key
-        if attribute_name in mapper.all_orm_descriptors:
-             desc = mapper.all_orm_descriptors[attribute_name]
-             if hasattr(desc, 'property') and hasattr(desc.property, 'columns'):
-                 return desc.property.columns[0]
-
-        # 2. Iterate properties to find by column name match or snake_case conversion
-        for prop in mapper.iterate_properties:
-            if hasattr(prop, 'columns'):
-                col = prop.columns[0]
-                # Match against column name (often same as attribute name, but sometimes specified in Column("name"))
-                # But here attribute_name comes from API which is typically camelCase.
-                # In User model: user_name = Column("userName", ...)
-                # If attribute_name is "userName", we want this column.
-                if col.name == attribute_name:
-                    return col
-
-                # Also check property key (user_name)
-                if prop.key == attribute_name:
-                    return col
+    def _get_link_attribute_part(self, type_: str, attribute: str, value, scope=None):
+        """
+        `link.attribute` filters, e.g. {"type": "equals", "attribute": "account.industry"} on Contact.
+        Compiled to a correlated EXISTS over the related table: "some linked record matches",
+        among the related records the user may read.
+        """
+        link_name, foreign_attribute = attribute.split('.', 1)
+        rel = self.model_info.get_relationship(link_name)
+        if rel is None:
+            return None
 
-        return None
+        foreign_model = rel.mapper.class_
+        column = model_registry.get(foreign_model).get_filterable_column(foreign_attribute)
+        if column is None:
+            return None
+
+        condition = self._get_comparison(column, type_, value)
+        if condition is None:
+            return None
+
+        if scope is not None:
+            condition = and_(condition, self._get_scope_condition(foreign_model, scope))
+
+        if rel.direction is MANYTOONE:
+            return getattr(self.model_class, rel.key).has(condition)
+        return getattr(self.model_class, rel.key).any(condition)
+
+    def _get_scope_condition(self, foreign_model, scope):
+        """Related records of foreign_model within the own/team scope from _get_link_scope."""
+        level, user_param, team_param = scope
+        if not hasattr(foreign_model, 'assigned_user_id'):
+            # No ownership: own/team levels fail closed
+            return false()
+        condition = foreign_model.assigned_user_id == user_param.bind()
+        if level == 'team' and hasattr(foreign_model, 'teams'):
+            condition = or_(condition, foreign_model.id.in_(
+                select(entity_team.c.entity_id).where(
+                    entity_team.c.entity_type == foreign_model.__name__,
+                    entity_team.c.team_id.in_(team_param.bind())
+                )
+            ))
+        return condition
+
+    def _get_linked_with_part(self, type_: str, link_name: str, value, scope=None):
+        """
+        linkedWith / notLinkedWith: records linked (or not) to any of the given foreign ids.
+        belongsTo compares the foreign key column directly. Many-to-many is a semi-join on the
+        association table only, hasMany a semi-join on the related table.
+        With a scope, only foreign ids the user may read count.
+        """
+        rel = self.model_info.get_relationship(link_name)
+        if rel is None or not isinstance(value, WhereParam):
+            return None
+        ids = value.bind()
+        foreign_model = rel.mapper.class_
+        # Condition on the related records: one of the ids and, with a scope, readable by the user
+        foreign_condition = foreign_model.id.in_(ids)
+        readable_ids = ids
+        if scope is not None:
+            scope_condition = self._get_scope_condition(foreign_model, scope)
+            foreign_condition = and_(foreign_condition, scope_condition)
+            readable_ids = select(foreign_model.id).where(foreign_condition)
+
+        if rel.direction is MANYTOONE:
+            local_column, remote_column = rel.local_remote_pairs[0]
+            if remote_column.primary_key:
+                condition = local_column.in_(readable_ids)
+            else:
+                remote_condition = remote_column.in_(ids)
+                if scope is not None:
+                    remote_condition = and_(remote_condition, scope_condition)
+                condition = getattr(self.model_class, rel.key).has(remote_condition)
+            if type_ == 'notLinkedWith':
+                return or_(local_column.is_(None), not_(condition))
+            return condition
+
+        if rel.secondary is not None:
+            foreign_id_column = next(
+                sec_col for target_col, sec_col in rel.secondary_synchronize_pairs if target_col.primary_key
+            )
+            condition = exists(
+                select(literal(1)).select_from(rel.secondary).where(rel.primaryjoin, foreign_id_column.in_(readable_ids))
+            )
+        else:
+            condition = getattr(self.model_class, rel.key).any(foreign_condition)
+
+        if type_ == 'notLinkedWith':
+            return not_(condition)
+        return condition
+
+    def _get_column(self, attribute_name: str):
+        # Accepts both the API name (column name, e.g. "userName") and the attribute key ("user_name").
+        # Sensitive columns (password) are never filterable or sortable.
+        return self.model_info.get_filterable_column(attribute_name)
 
     def apply_order(self, sort_by: str, asc_order: bool = True):
         if not sort_by:
@@ -126,40 +514,273 @@ class SelectManager:
 
         column = self._get_column(sort_by)
         if column is not None:
+            self.sort_by = sort_by
+            self.sort_column = column
+            self.asc_order = asc_order
             if asc_order:
                 self.base_query = self.base_query.order_by(asc(column))
             else:
                 self.base_query = self.base_query.order_by(desc(column))
 
+    def apply_text_rank_order(self) -> bool:
+        """
+        Orders by full-text relevance if a textFilter was applied. Returns whether it did.
+        Relevance has no stable column value, so no keyset cursor can be built for it.
+        """
+        if self.text_filter_param is None:
+            return False
+        self.base_query = text_search_index.apply_rank_order(
+            self.base_query, self.model_class, self.text_filter_param.bind(), self.dialect_name
+        )
+        self.sort_by = RELEVANCE_SORT
+        return True
+
+    def apply_select(self, attribute_keys: List[str]):
+        """
+        Column projection: loads only the given attributes (plus id and the sort column) instead of full rows.
+        Call after apply_order.
+        """
+        keys = set(attribute_keys)
+        keys.add('id')
+        if self.sort_column is not None:
+            keys.add(self._get_attribute_key(self.sort_column))
+        self.base_query = self.base_query.options(
+            load_only(*[getattr(self.model_class, key) for key in keys])
+        )
+
+    def apply_id_order(self):
+        """
+        Appends `id` as a tiebreaker so the ordering is total.
+        Required for keyset pagination, where the cursor must point at exactly one row.
+        """
+        id_column = self.model_class.id
+        if self.asc_order:
+            self.base_query = self.base_query.order_by(asc(id_column))
+        else:
+            self.base_query = self.base_query.order_by(desc(id_column))
+
+    def apply_cursor(self, cursor: str):
+        """
+        Keyset pagination: continue after the row the cursor points at instead of skipping OFFSET rows.
+        Must be called after apply_order. The condition only applies to the page query, not to the total count.
+        """
+        sort_by, value, last_id = decode_cursor(cursor)
+        if sort_by != self.sort_by:
+            raise ValueError("Cursor does not match sortBy")
+
+        id_column = self.model_class.id
+        after_id = id_column > last_id if self.asc_order else id_column < last_id
+
+        column = self.sort_column
+        if column is None:
+            self.cursor_condition = after_id
+            return
+
+        # NULLs sort first ascending and last descending (MySQL, SQLite).
+        if value is None:
+            if self.asc_order:
+                self.cursor_condition = or_(and_(column.is_(None), after_id), column.is_not(None))
+            else:
+                self.cursor_condition = and_(column.is_(None), after_id)
+        # The outer range on the sort column keeps the condition sargable for a (column, id) index.
+        elif self.asc_order:
+            self.cursor_condition = and_(column >= value, or_(column > value, after_id))
+        else:
+            self.cursor_condition = or_(and_(column <= value, or_(column < value, after_id)), column.is_(None))
+
+    def build_cursor(self, record) -> Optional[str]:
+        """Returns the cursor pointing at the given record (normally the last one of a page)."""
+        if self.sort_by == RELEVANCE_SORT:
+            return None
+        value = None
+        if self.sort_column is not None:
+            value = getattr(record, self._get_attribute_key(self.sort_column))
+        return encode_cursor(self.sort_by, value, record.id)
+
+    def _get_attribute_key(self, column) -> Optional[str]:
+        return self.model_info.column_keys.get(column)
+
+    def iterate_id_chunks(self, chunk_size: int):
+        """
+        Yields the ids of the filtered set in chunks of at most `chunk_size`, walking the id keyset
+        so every chunk query is bounded. Ordering and pagination are ignored. Used by mass actions.
+        """
+        id_column = self.model_class.id
+        query = self.base_query.with_only_columns(id_column).order_by(None).order_by(asc(id_column)).limit(chunk_size)
+        last_id = None
+        while True:
+            chunk_query = query if last_id is None else query.where(id_column > last_id)
+            ids = self.db.execute(chunk_query, self.params).scalars().all()
+            if ids:
+                yield ids
+            if len(ids) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    def iterate_rows(self, columns: List, batch_size: int):
+        """
+        Streams the filtered set as tuples of `columns`, in the current order, without pagination.
+        Rows are fetched `batch_size` at a time through a server-side cursor where the driver supports one,
+        so memory stays flat regardless of the size of the set. Used by exports.
+        """
+        query = self.base_query.with_only_columns(*columns)
+        result = self.db.execute(query, self.params, execution_options={"yield_per": batch_size})
+        try:
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            result.close()
+
     def apply_limit(self, offset: int = 0, max_size: int = 20):
         # Store for execution time or apply to a separate query object if we want total count
         self.offset = offset
         self.limit = max_size
         self.pagination_applied = True
 
-    def execute(self):
-        # Count total before limit/offset
-        # We need to make sure we are counting from the filtered query
-        # Using subquery might be slow but safe for complex queries
-        count_query = select(func.count()).select_from(self.base_query.subquery())
-        total = self.db.scalar(count_query)
+    def execute(self, total_mode: str = TOTAL_MODE_EXACT):
+        """
+        Runs the page query. `total_mode` controls how the total is obtained:
+        - exact: count(*) over the filtered set (one extra pass over it)
+        - none: no total (None)
+        - estimate: table statistics when unfiltered, otherwise a cached count (may be stale)
+        - hasMore: no count; fetches one extra row to find out whether another page exists
+        Sets `self.has_more` whenever it can be determined.
+        """
+        if total_mode not in TOTAL_MODES:
+            raise ValueError(f"Invalid totalMode: {total_mode}")
+
+        started_at = time.perf_counter()
+        total = None
+        if total_mode == TOTAL_MODE_EXACT:
+            total = self.db.scalar(self._get_count_query(), self.params)
+        elif total_mode == TOTAL_MODE_ESTIMATE:
+            total = self._estimate_total()
 
         query = self.base_query
-        if self.pagination_applied:
-            if self.offset is not None:
-                query = query.offset(self.offset)
-            if self.limit is not None:
-                query = query.limit(self.limit)
+        if self.cursor_condition is not None:
+            query = query.where(self.cursor_condition)
+
+        offset = self.offset if self.pagination_applied else None
+        limit = self.limit if self.pagination_applied else None
+        if offset is not None:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit + 1 if total_mode == TOTAL_MODE_HAS_MORE else limit)
 
-        result = self.db.execute(query)
+        result = self.db.execute(query, self.params)
         records = result.scalars().all()
+
+        self.has_more = None
+        if limit is None:
+            self.has_more = False
+        elif total_mode == TOTAL_MODE_HAS_MORE:
+            self.has_more = len(records) > limit
+            records = records[:limit]
+            if not self.has_more and self.cursor_condition is None:
+                # Last page reached, so the total is known without counting.
+                total = (offset or 0) + len(records)
+        elif total_mode == TOTAL_MODE_EXACT and self.cursor_condition is None:
+            self.has_more = (offset or 0) + len(records) < total
+
+        query_pattern_recorder.record(
+            self.model_class.__table__.name,
+            self.equality_columns,
+            self.range_columns,
+            self.sort_column.name if self.sort_column is not None else None,
+            (time.perf_counter() - started_at) * 1000
+        )
+
         return records, total
 
+    def _get_count_query(self):
+        # ORDER BY is irrelevant for counting and would force a sort inside the subquery.
+        return select(func.count()).select_from(self.base_query.order_by(None).subquery())
+
+    def _estimate_total(self) -> Optional[int]:
+        if self.base_query.whereclause is None:
+            estimate = self._get_table_statistics_count()
+            if estimate is not None:
+                return estimate
+
+        count_query = self._get_count_query()
+        compiled = count_query.compile(dialect=self.db.get_bind().dialect)
+        params = dict(compiled.params, **self.params)
+        key = (str(compiled), repr(sorted(params.items())))
+        total = count_cache.get(key)
+        if total is None:
+            total = self.db.scalar(count_query, self.params)
+            count_cache.set(key, total)
+        return total
+
+    def _get_table_statistics_count(self) -> Optional[int]:
+        bind = self.db.get_bind()
+        if bind.dialect.name != 'mysql':
+            return None
+        table_name = self.model_class.__table__.name
+        return self.db.scalar(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+            ),
+            {"table_name": table_name}
+        )
+
+    def aggregate(self, group_by: List[str], fn: str = 'count', attribute: Optional[str] = None) -> List[Dict]:
+        """
+        Runs one GROUP BY query over the filtered set.
+        Returns rows like {"industry": "Finance", "count": 12}, largest value first.
+        """
+        if fn not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Invalid aggregate function: {fn}")
+
+        group_columns = []
+        for name in group_by:
+            column = self._get_column(name)
+            if column is None:
+                raise ValueError(f"Invalid groupBy attribute: {name}")
+            group_columns.append(column)
+
+        if attribute:
+            column = self._get_column(attribute)
+            if column is None:
+                raise ValueError(f"Invalid aggregate attribute: {attribute}")
+            value = AGGREGATE_FUNCTIONS[fn](column)
+        elif fn == 'count':
+            value = func.count()
+        else:
+            raise ValueError(f"Aggregate function {fn} requires an attribute")
+
+        value = value.label(fn)
+        query = (
+            self.base_query
+            .with_only_columns(*group_columns, value)
+            .select_from(self.model_class)
+            .group_by(*group_columns)
+            .order_by(None)
+            .order_by(desc(value))
+        )
+
+        rows = self.db.execute(query, self.params).all()
+        return [
+            dict(zip(group_by + [fn], row))
+            for row in rows
+        ]
+
+    def apply_parent(self, parent, relationship):
+        """
+        Restricts the query to the records linked to `parent` through `relationship`, a relationship of the parent's
+        model, using the relationship join instead of loading the collection.
+        """
+        self.base_query = self.base_query.where(with_parent(parent, getattr(type(parent), relationship.key)))
+        if relationship.direction is ONETOMANY:
+            self.equality_columns.extend(column.name for _, column in relationship.synchronize_pairs)
+
     def apply_filter(self, attribute: str, value: Any):
         """Applies a simple equality filter."""
         column = self._get_column(attribute)
         if column is not None:
             self.base_query = self.base_query.where(column == value)
+            self.equality_columns.append(column.name)
         else:
             # FAIL CLOSED: If we try to filter by something that doesn't exist.
             # Especially critical for 'assignedUserId' in ACL checks.
@@ -179,8 +800,7 @@ class SelectManager:
         assigned_user_col = self._get_column('assignedUserId')
 
         # Check if model has 'teams' relationship
-        mapper = inspect(self.model_class).mapper
-        teams_rel = mapper.relationships.get('teams')
+        teams_rel = self.model_info.get_relationship('teams')
 
         conditions = []
 
@@ -188,8 +808,17 @@ class SelectManager:
             conditions.append(assigned_user_col == user_id)
 
         if teams_rel and team_ids:
-             TeamClass = teams_rel.mapper.class_
-             conditions.append(getattr(self.model_class, 'teams').any(TeamClass.id.in_(team_ids)))
+             if teams_rel.secondary is entity_team:
+                 # Semi-join on entity_team alone, served by the (entity_type, team_id, entity_id)
+                 # index, instead of a correlated EXISTS through the team table per row.
+                 team_entity_ids = select(entity_team.c.entity_id).where(
+                     entity_team.c.entity_type == self.model_class.__name__,
+                     entity_team.c.team_id.in_(team_ids)
+                 )
+                 conditions.append(self.model_class.id.in_(team_entity_ids))
+             else:
+                 TeamClass = teams_rel.mapper.class_
+                 conditions.append(getattr(self.model_class, 'teams').any(TeamClass.id.in_(team_ids)))
 
         if conditions:
             self.base_query = self.base_query.where(or_(*conditions))
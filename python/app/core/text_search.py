@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional
+import re
+from sqlalchemy import event, literal_column, select, table, column, text, desc
+from sqlalchemy.dialects.mysql import match as mysql_match
+from app.core.database import Base
+from app.models.standard_entities import Account, Contact
+
+# Fields covered by the full-text index of each entity (textFilterFields in EspoCRM terms).
+TEXT_SEARCH_FIELDS = {
+    Account: ["name", "emailAddress", "description"],
+    Contact: ["firstName", "lastName", "emailAddress", "description"],
+}
+
+class TextSearchIndex:
+    """
+    Full-text index per entity, backing the `textFilter` where type.
+    SQLite: a contentless FTS5 table `<table>_fts` kept in sync by triggers, so every
+    write path (RecordService, bulk statements) updates it in the same transaction. Its rowids
+    come from `<table>_fts_key`, which maps them to record ids: the entity tables have string
+    primary keys, and their implicit rowid can be renumbered by VACUUM.
+    MySQL: a native FULLTEXT index on the same columns.
+    """
+    def __init__(self, fields: Dict[type, List[str]]):
+        self.fields = fields
+
+    def supports(self, model_class) -> bool:
+        return model_class in self.fields
+
+    def prepare_query(self, value, dialect_name: str) -> Optional[str]:
+        """
+        Turns user input into a prefix-matching full-text query, or None if it has no terms.
+        Only word characters are kept, so input can't inject FTS operators.
+        """
+        terms = re.findall(r'\w+', str(value), re.UNICODE)
+        if not terms:
+            return None
+        if dialect_name == 'mysql':
+            return ' '.join(f'+{term}*' for term in terms)
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def filter_clause(self, model_class, param, dialect_name: str):
+        """Condition matching records of model_class against the full-text query in `param`."""
+        table_name = model_class.__table__.name
+        if dialect_name == 'mysql':
+            return self._mysql_match(model_class, param)
+
+        matches = self._sqlite_matches(table_name, param)
+        return model_class.__table__.c.id.in_(matches.with_only_columns(matches.selected_columns.id))
+
+    def apply_rank_order(self, query, model_class, param, dialect_name: str):
+        """Orders query by relevance, best match first."""
+        if dialect_name == 'mysql':
+            return query.order_by(desc(self._mysql_match(model_class, param)))
+
+        ranked = self._sqlite_matches(model_class.__table__.name, param).subquery()
+        # rank is bm25: lower is better. Rows matched by other OR branches have no rank and go last.
+        return query.outerjoin(ranked, ranked.c.id == model_class.__table__.c.id).order_by(
+            ranked.c.rank.is_(None), ranked.c.rank
+        )
+
+    def ensure_indexes(self, connection):
+        """Creates missing full-text indexes. Idempotent; safe to call on every startup."""
+        dialect_name = connection.dialect.name
+        for model_class in self.fields:
+            if dialect_name == 'sqlite':
+                self._ensure_sqlite(connection, model_class)
+            elif dialect_name == 'mysql':
+                self._ensure_mysql(connection, model_class)
+
+    def drop_indexes(self, connection):
+        if connection.dialect.name != 'sqlite':
+            return
+        for model_class in self.fields:
+            fts_name = self._fts_name(model_class.__table__.name)
+            connection.execute(text(f'DROP TABLE IF EXISTS {fts_name}'))
+            connection.execute(text(f'DROP TABLE IF EXISTS {fts_name}_key'))
+
+    def _mysql_match(self, model_class, param):
+        columns = [model_class.__table__.c[name] for name in self.fields[model_class]]
+        return mysql_match(*columns, against=param).in_boolean_mode()
+
+    def _sqlite_matches(self, table_name: str, param):
+        """(id, rank) of the records matching the full-text query."""
+        fts_name = self._fts_name(table_name)
+        fts = table(fts_name, column('rowid'), column('rank'))
+        key = table(f'{fts_name}_key', column('docid'), column('id'))
+        return (
+            select(key.c.id, fts.c.rank)
+            .select_from(fts.join(key, key.c.docid == fts.c.rowid))
+            .where(literal_column(fts_name).match(param))
+        )
+
+    def _fts_name(self, table_name: str) -> str:
+        return f'{table_name}_fts'
+
+    def _ensure_sqlite(self, connection, model_class):
+        table_name = model_class.__table__.name
+        fts_name = self._fts_name(table_name)
+        quote = connection.dialect.identifier_preparer.quote
+        cols = ', '.join(quote(name) for name in self.fields[model_class])
+        new_cols = ', '.join(f'new.{quote(name)}' for name in self.fields[model_class])
+        old_cols = ', '.join(f'old.{quote(name)}' for name in self.fields[model_class])
+
+        key_name = f'{fts_name}_key'
+        docid = f'(SELECT docid FROM {key_name} WHERE id = new.id)'
+        old_docid = f'(SELECT docid FROM {key_name} WHERE id = old.id)'
+
+        existing = {
+            row[0] for row in connection.execute(
+                text("SELECT name FROM sqlite_master WHERE name LIKE :prefix"),
+                {"prefix": f'{fts_name}%'}
+            )
+        }
+        triggers = {f'{fts_name}_ai', f'{fts_name}_ad', f'{fts_name}_au'}
+        if {fts_name, key_name} | triggers <= existing:
+            return
+
+        # Partially created, or the earlier rowid-keyed layout: rebuild from scratch.
+        for trigger in triggers:
+            connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        connection.execute(text(f'DROP TABLE IF EXISTS {fts_name}'))
+        connection.execute(text(f'DROP TABLE IF EXISTS {key_name}'))
+
+        # INTEGER PRIMARY KEY: unlike implicit rowids, these survive VACUUM.
+        connection.execute(text(
+            f"CREATE TABLE {key_name} (docid INTEGER PRIMARY KEY, id VARCHAR(24) NOT NULL UNIQUE)"
+        ))
+        connection.execute(text(f"CREATE VIRTUAL TABLE {fts_name} USING fts5({cols}, content='')"))
+        connection.execute(text(
+            f"CREATE TRIGGER {fts_name}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {key_name}(id) VALUES (new.id); "
+            f"INSERT INTO {fts_name}(rowid, {cols}) VALUES ({docid}, {new_cols}); END"
+        ))
+        # Contentless tables need the old values to remove a row from the index.
+        connection.execute(text(
+            f"CREATE TRIGGER {fts_name}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {fts_name}({fts_name}, rowid, {cols}) VALUES ('delete', {old_docid}, {old_cols}); "
+            f"DELETE FROM {key_name} WHERE id = old.id; END"
+        ))
+        # Only re-index when an indexed column changes, not on e.g. reassignment.
+        connection.execute(text(
+            f"CREATE TRIGGER {fts_name}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN "
+            f"INSERT INTO {fts_name}({fts_name}, rowid, {cols}) VALUES ('delete', {old_docid}, {old_cols}); "
+            f"INSERT INTO {fts_name}(rowid, {cols}) VALUES ({docid}, {new_cols}); END"
+        ))
+        # Index rows that were written before the triggers existed.
+        connection.execute(text(f"INSERT INTO {key_name}(id) SELECT id FROM {table_name}"))
+        connection.execute(text(
+            f"INSERT INTO {fts_name}(rowid, {cols}) "
+            f"SELECT k.docid, {', '.join(f't.{quote(name)}' for name in self.fields[model_class])} "
+            f"FROM {table_name} t JOIN {key_name} k ON k.id = t.id"
+        ))
+
+    def _ensure_mysql(self, connection, model_class):
+        table_name = model_class.__table__.name
+        index_name = f'IDX_{table_name.upper()}_TEXT_SEARCH'
+        exists = connection.scalar(
+            text(
+                "SELECT COUNT(*) FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name AND INDEX_NAME = :index_name"
+            ),
+            {"table_name": table_name, "index_name": index_name}
+        )
+        if exists:
+            return
+        quote = connection.dialect.identifier_preparer.quote
+        cols = ', '.join(quote(name) for name in self.fields[model_class])
+        connection.execute(text(f"ALTER TABLE {quote(table_name)} ADD FULLTEXT INDEX {index_name} ({cols})"))
+
+text_search_index = TextSearchIndex(TEXT_SEARCH_FIELDS)
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_text_search_indexes(target, connection, **kw):
+    text_search_index.ensure_indexes(connection)
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_text_search_indexes(target, connection, **kw):
+    text_search_index.drop_indexes(connection)
@@ -1,4 +1,6 @@
 from fastapi import FastAPI, Request
+from starlette.background import BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 import os
@@ -13,12 +15,43 @@ if python_dir not in sys.path:
 from app.core.config import Config
 from app.core.client_manager import ClientManager
 from app.api.v1 import endpoints
-from app.core.database import engine
+from app.core.database import engine, SessionLocal
+from app.core.index_advisor import query_pattern_recorder
+from app.core.invalidation_bus import invalidation_bus
+from app.core.model_registry import model_registry
+from app.core.text_search import text_search_index
 from app.models.base import Base
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
 # Import models so they are registered with Base
-from app.models import user, attachment, notification, acl_entities, standard_entities
+from app.models import user, attachment, notification, acl_entities, standard_entities, query_pattern, cache_invalidation
 
 Base.metadata.create_all(bind=engine)
+# create_all only fires index creation for new tables; cover databases created before full-text search
+with engine.begin() as connection:
+    text_search_index.ensure_indexes(connection)
+    # Likewise for indexes added to existing tables
+    for index in acl_entities.entity_team.indexes:
+        index.create(connection, checkfirst=True)
+    # And for the record version columns (nullable; RecordService treats NULL as version 0)
+    for model_class in (standard_entities.Account, standard_entities.Contact):
+        table = model_class.__table__
+        existing_columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+        for column in (table.c.modifiedAt, table.c.versionNumber):
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=connection.dialect)
+                try:
+                    with connection.begin_nested():
+                        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                except DBAPIError:
+                    # Another worker starting at the same time added it first
+                    if column.name not in {c["name"] for c in inspect(connection).get_columns(table.name)}:
+                        raise
+# Reflect mappers once instead of on every request
+model_registry.build()
+# Caches start empty: only invalidations published from now on concern this worker
+with SessionLocal() as db:
+    invalidation_bus.start(db)
 
 app = FastAPI()
 
@@ -33,6 +66,25 @@ client_manager = ClientManager(config)
 
 app.include_router(endpoints.router, prefix="/api/v1")
 
+@app.middleware("http")
+async def poll_cache_invalidations(request: Request, call_next):
+    # Drop entries other workers changed before this request reads its caches
+    await run_in_threadpool(invalidation_bus.maybe_poll, SessionLocal)
+    return await call_next(request)
+
+@app.middleware("http")
+async def flush_query_patterns(request: Request, call_next):
+    response = await call_next(request)
+    # After the response is sent, outside the request's transaction, at most once per indexAdvisorFlushInterval
+    if query_pattern_recorder.is_flush_due():
+        # Keep any background work the endpoint attached; the flush runs after it
+        tasks = BackgroundTasks()
+        if response.background is not None:
+            tasks.add_task(response.background)
+        tasks.add_task(query_pattern_recorder.maybe_flush, SessionLocal)
+        response.background = tasks
+    return response
+
 @app.get("/")
 async def read_root():
     # In PHP, this runs Client.php runner.
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, Table, JSON
+from sqlalchemy import Column, String, Boolean, ForeignKey, Table, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -32,7 +32,9 @@ user_team = Table('user_team', Base.metadata,
 entity_team = Table('entity_team', Base.metadata,
     Column('entity_id', String(24), index=True),
     Column('entity_type', String(100), index=True),
-    Column('team_id', String(24), ForeignKey('team.id'), index=True)
+    Column('team_id', String(24), ForeignKey('team.id'), index=True),
+    # Covers team-scope ACL filtering: "ids of <entity_type> records in any of these teams".
+    Index('IDX_ENTITY_TEAM_TYPE_TEAM_ENTITY', 'entity_type', 'team_id', 'entity_id')
 )
 
 class Role(Base):
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, DateTime
+from app.core.database import Base
+import datetime
+
+class CacheInvalidation(Base):
+    """
+    Append-only log of cache invalidations, polled by every worker (see app.core.invalidation_bus).
+    A NULL key invalidates the whole namespace.
+    """
+    __tablename__ = 'cache_invalidation'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    namespace = Column(String(50))
+    key = Column(String(255), nullable=True)
+    origin = Column(String(64))
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
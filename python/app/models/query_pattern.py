@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime
+from app.core.database import Base
+import datetime
+
+class QueryPattern(Base):
+    """
+    Aggregated list-query shapes recorded by SelectManager, input for the index advisor.
+    Column lists are comma-separated DB column names.
+    """
+    __tablename__ = 'query_pattern'
+
+    id = Column(String(40), primary_key=True)
+    table_name = Column(String(100))
+    equality_columns = Column(String(255))
+    range_columns = Column(String(255))
+    sort_column = Column(String(100))
+    hits = Column(Integer, default=0)
+    total_ms = Column(Float, default=0.0)
+    max_ms = Column(Float, default=0.0)
+    last_seen_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "table": self.table_name,
+            "equalityColumns": self.equality_columns.split(',') if self.equality_columns else [],
+            "rangeColumns": self.range_columns.split(',') if self.range_columns else [],
+            "sortColumn": self.sort_column,
+            "hits": self.hits,
+            "totalMs": round(self.total_ms or 0.0, 3),
+            "avgMs": round((self.total_ms or 0.0) / self.hits, 3) if self.hits else 0.0,
+            "maxMs": round(self.max_ms or 0.0, 3),
+            "lastSeenAt": self.last_seen_at.isoformat() if self.last_seen_at else None
+        }
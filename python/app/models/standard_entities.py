@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, ForeignKey, Table, Boolean, and_
+from sqlalchemy import Column, String, ForeignKey, Table, Boolean, DateTime, Integer, and_
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.user import User
 from app.models.acl_entities import entity_team, Team
+import datetime
 
 # Many-to-Many association table
 account_contact = Table('account_contact', Base.metadata,
@@ -25,6 +26,9 @@ class Account(Base):
     description = Column(String)
 
     deleted = Column(Boolean, default=False)
+    # Maintained by RecordService on every change; versionNumber backs ETags
+    modified_at = Column("modifiedAt", DateTime, default=datetime.datetime.utcnow)
+    version_number = Column("versionNumber", Integer, default=1)
 
     assigned_user_id = Column("assignedUserId", String(24), ForeignKey("user.id"))
     assigned_user = relationship("User")
@@ -56,6 +60,9 @@ class Contact(Base):
     description = Column(String)
 
     deleted = Column(Boolean, default=False)
+    # Maintained by RecordService on every change; versionNumber backs ETags
+    modified_at = Column("modifiedAt", DateTime, default=datetime.datetime.utcnow)
+    version_number = Column("versionNumber", Integer, default=1)
 
     assigned_user_id = Column("assignedUserId", String(24), ForeignKey("user.id"))
     assigned_user = relationship("User")
@@ -1,8 +1,96 @@
-from typing import Optional, List
+from typing import Dict, FrozenSet, Iterable, Optional, List, Tuple
+from collections import OrderedDict
+import threading
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session, raiseload, selectinload
+from app.core.config import settings
+from app.core.invalidation_bus import invalidation_bus
+from app.core.model_registry import model_registry
+from app.core.record_cache import RECORD_NAMESPACE
 from app.models.user import User
-from app.models.acl_entities import Role
+from app.models.acl_entities import Role, Team, entity_team
+
+# Invalidation bus namespace for ACL changes made through the ORM: "Role/<id>" for role data, "User/<id>" for
+# users (roles, teams or any other attribute), "Team/<id>" for team roles
+ACL_NAMESPACE = 'acl'
+
+# Compiled permission tables kept per process, one per distinct set of (role id, role revision)
+PERMISSION_TABLE_CACHE_SIZE = 1024
+
+class PermissionTable:
+    """Flat (entity type, action) -> level map merged from a set of roles."""
+    __slots__ = ('signature', 'levels')
+
+    def __init__(self, signature: FrozenSet[Tuple[str, int]], levels: Dict[Tuple[str, str], str]):
+        self.signature = signature
+        self.levels = levels
+
+    def get(self, entity_type: str, action: str) -> str:
+        return self.levels.get((entity_type, action), 'no')
+
+class AclRevisions:
+    """
+    Revision counters for ACL data. A role's revision changes with its permission data; `revision` changes
+    with any role, team role or membership change and invalidates the tables memoized on user instances.
+    """
+    def __init__(self):
+        self.revision = 0
+        self._roles = {}
+        self._lock = threading.Lock()
+
+    def get_role(self, role_id: str) -> int:
+        return self._roles.get(role_id, 0)
+
+    def bump_roles(self, role_ids: Iterable[str]):
+        with self._lock:
+            for role_id in role_ids:
+                self._roles[role_id] = self._roles.get(role_id, 0) + 1
+            self.revision += 1
+
+    def get_role_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._roles)
+
+    def bump(self):
+        with self._lock:
+            self.revision += 1
+
+acl_revisions = AclRevisions()
 
 class AclService:
+    def __init__(self):
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get_user_load_options(self) -> list:
+        """
+        Eager-loading plan for the principal: roles, teams and the teams' roles in one selectin query each,
+        so permission checks never lazy-load. With aclRaiseOnLazyLoad any other relationship access raises.
+        """
+        if settings.aclRaiseOnLazyLoad:
+            return [
+                selectinload(User.roles).raiseload('*'),
+                selectinload(User.teams).options(selectinload(Team.roles).raiseload('*'), raiseload('*')),
+                raiseload('*')
+            ]
+        return [selectinload(User.roles), selectinload(User.teams).selectinload(Team.roles)]
+
+    def get_record_load_options(self, user: User, model_class, entity_type: str, action: str) -> list:
+        """Loads the record's teams with it when the scope check will need them (team level)."""
+        options = []
+        if user and not user.is_admin and hasattr(model_class, 'teams'):
+            if self.get_permission_level(user, entity_type, action) == 'team':
+                options.append(selectinload(model_class.teams))
+        if settings.aclRaiseOnLazyLoad:
+            options.append(raiseload('*'))
+        return options
+
+    def load_user(self, db: Session, user_id: str) -> Optional[User]:
+        return db.execute(
+            select(User).where(User.id == user_id).options(*self.get_user_load_options())
+        ).scalar_one_or_none()
+
     def check(self, user: User, entity_type: str, action: str) -> bool:
         """
         Checks if the user has permission to perform action on entity_type.
@@ -30,38 +118,79 @@ class AclService:
         if user.is_admin:
             return 'yes' if action == 'create' else 'all'
 
-        # Default to 'no'
-        final_level = 'no'
+        return self.get_permission_table(user).get(entity_type, action)
 
-        # Gather all roles
-        roles = user.roles
-        # TODO: Add roles from user's teams?
-        # EspoCRM: "Roles can be assigned to Users and Teams."
-        # So we need to fetch roles from user.roles AND user.teams.roles
+    def get_permission_table(self, user: User) -> PermissionTable:
+        """
+        The user's merged permissions. Memoized on the user instance until an ACL revision changes, and shared
+        between users whose roles (direct and via teams) are the same at the same revisions.
+        Principals (cached, detached users) carry a table compiled at login, returned as is.
+        """
+        frozen = getattr(user, 'permission_table', None)
+        if frozen is not None:
+            return frozen
+
+        memo = user.__dict__.get('_acl_permissions')
+        revision = acl_revisions.revision
+        if memo is not None and memo[0] == revision:
+            return memo[1]
 
-        all_roles = list(roles)
-        if user.teams:
-            for team in user.teams:
-                if team.roles:
-                    all_roles.extend(team.roles)
+        # EspoCRM: "Roles can be assigned to Users and Teams."
+        roles = {role.id: role for role in user.roles}
+        for team in user.teams:
+            for role in team.roles:
+                roles.setdefault(role.id, role)
+        # The revision a role's data was loaded at, not the current one: a role loaded before an edit (e.g. by a
+        # concurrent request) must not have its old data compiled under the new revision
+        signature = frozenset(
+            (role_id, role.__dict__.get('_acl_revision', acl_revisions.get_role(role_id))) for role_id, role in roles.items()
+        )
 
-        if not all_roles:
-            return 'no'
+        with self._lock:
+            table = self._tables.get(signature)
+            if table is not None:
+                self._tables.move_to_end(signature)
+        if table is None:
+            table = self._build_permission_table(signature, roles.values())
+            with self._lock:
+                self._tables[signature] = table
+                while len(self._tables) > PERMISSION_TABLE_CACHE_SIZE:
+                    self._tables.popitem(last=False)
 
-        # Merge permissions
-        for role in all_roles:
-            role_data = role.data or {}
-            entity_perms = role_data.get(entity_type, {})
+        user.__dict__['_acl_permissions'] = (revision, table)
+        return table
 
-            # If entity permissions not defined, maybe check 'Global' or default?
-            # EspoCRM has no 'Global' fallback in role data usually, it's explicit.
-            # But it depends on UI. Assuming explicit.
+    def _build_permission_table(self, signature, roles) -> PermissionTable:
+        self.builds += 1
+        levels = {}
+        for role in roles:
+            for entity_type, entity_perms in (role.data or {}).items():
+                if not isinstance(entity_perms, dict):
+                    continue
+                for action, perm in entity_perms.items():
+                    if perm:
+                        key = (entity_type, action)
+                        levels[key] = self._merge_levels(levels.get(key, 'no'), perm, action)
+        return PermissionTable(signature, levels)
 
-            perm = entity_perms.get(action)
-            if perm:
-                final_level = self._merge_levels(final_level, perm, action)
+    def on_invalidation(self, keys: Optional[List[str]]):
+        """
+        Invalidation bus subscriber for the acl namespace and for record writes (RecordService link/update
+        statements on users, teams and roles bypass the ORM events below). Keys are "<entity type>/<id>".
+        """
+        if keys is None:
+            acl_revisions.bump_roles(acl_revisions.get_role_ids())
+            return
+        role_ids = [key[5:] for key in keys if key.startswith('Role/')]
+        if role_ids:
+            acl_revisions.bump_roles(role_ids)
+        if any(key.startswith(('User/', 'Team/')) for key in keys):
+            acl_revisions.bump()
 
-        return final_level
+    def clear_permission_tables(self):
+        with self._lock:
+            self._tables.clear()
+            self.builds = 0
 
     def check_scope(self, user: User, entity, action: str) -> bool:
         """
@@ -109,6 +238,84 @@ class AclService:
 
         return False
 
+    def check_scope_many(self, user: User, entity_type: str, records_or_ids: Iterable, action: str, db: Optional[Session] = None) -> Dict[str, bool]:
+        """
+        check_scope for a batch: returns {id: allowed}. Takes entities or ids (ids need `db`; unknown ids are
+        denied). Queries at most twice whatever the batch size: owners of the given ids, then one entity_team
+        query for the team level. Entity teams relationships are never loaded.
+        """
+        records = list(records_or_ids)
+        if not records:
+            return {}
+        ids = [record if isinstance(record, str) else record.id for record in records]
+        if user.is_admin:
+            return dict.fromkeys(ids, True)
+
+        level = self.get_permission_level(user, entity_type, action)
+        if level in ('all', 'no'):
+            return dict.fromkeys(ids, level == 'all')
+
+        model_class = model_registry.get_model(entity_type)
+        if model_class is None or not hasattr(model_class, 'assigned_user_id'):
+            # No ownership: own/team levels fail closed
+            return dict.fromkeys(ids, False)
+
+        decisions = dict.fromkeys(ids, False)
+        owners = {record.id: record.assigned_user_id for record in records if not isinstance(record, str)}
+        missing = [id for id in ids if id not in owners]
+        if missing:
+            if db is None:
+                raise ValueError("A session is needed to check records by id")
+            owners.update(db.execute(
+                select(model_class.id, model_class.assigned_user_id).where(model_class.id.in_(missing))
+            ).all())
+
+        user_id = str(user.id)
+        candidates = []
+        for id, assigned_user_id in owners.items():
+            if str(assigned_user_id) == user_id:
+                decisions[id] = True
+            elif level == 'team':
+                candidates.append(id)
+
+        user_team_ids = [team.id for team in user.teams]
+        if candidates and user_team_ids and hasattr(model_class, 'teams'):
+            db = db or object_session(records[0])
+            if db is None:
+                raise ValueError("A session is needed to check team access")
+            for id in db.execute(
+                select(entity_team.c.entity_id).distinct().where(
+                    entity_team.c.entity_type == model_class.__name__,
+                    entity_team.c.team_id.in_(user_team_ids),
+                    entity_team.c.entity_id.in_(candidates)
+                )
+            ).scalars():
+                decisions[id] = True
+        return decisions
+
+    def check_scope_values(self, user: User, entity_type: str, assigned_user_id: Optional[str], team_ids, action: str) -> bool:
+        """
+        Same decision as check_scope, from plain values instead of an entity (e.g. a cached record).
+        `team_ids` is the set of the record's team ids, or None when the entity has no teams.
+        """
+        if user.is_admin:
+            return True
+
+        level = self.get_permission_level(user, entity_type, action)
+        if level == 'all':
+            return True
+        if level == 'no':
+            return False
+
+        is_owner = str(assigned_user_id) == str(user.id)
+        if level == 'own' or is_owner:
+            return is_owner
+
+        if level == 'team' and team_ids:
+            return not {t.id for t in user.teams}.isdisjoint(team_ids)
+
+        return False
+
     def _merge_levels(self, current: str, new: str, action: str) -> str:
         """
         Merges two permission levels, returning the more permissive one.
@@ -127,3 +334,48 @@ class AclService:
         return current if current_p >= new_p else new
 
 acl_service = AclService()
+
+# Keep compiled tables in step with ORM changes: membership and team role collections bump the revision as soon
+# as they change in memory, role data when set; flushes publish both on the invalidation bus.
+
+@event.listens_for(User.roles, 'append')
+@event.listens_for(User.roles, 'remove')
+@event.listens_for(User.teams, 'append')
+@event.listens_for(User.teams, 'remove')
+@event.listens_for(Team.roles, 'append')
+@event.listens_for(Team.roles, 'remove')
+def _on_membership_change(target, value, initiator):
+    acl_revisions.bump()
+
+@event.listens_for(Role.data, 'set')
+def _on_role_data_set(target, value, oldvalue, initiator):
+    if target.id is not None:
+        acl_revisions.bump_roles([target.id])
+        target.__dict__['_acl_revision'] = acl_revisions.get_role(target.id)
+
+@event.listens_for(Role, 'load')
+def _on_role_load(target, context):
+    target.__dict__['_acl_revision'] = acl_revisions.get_role(target.id)
+
+@event.listens_for(Role, 'refresh')
+def _on_role_refresh(target, context, attrs):
+    target.__dict__['_acl_revision'] = acl_revisions.get_role(target.id)
+
+@event.listens_for(Session, 'after_flush')
+def _on_after_flush(session, flush_context):
+    # Bumped now for this session, and published so that every worker (this one included) bumps again once
+    # committed: tables built meanwhile from the old data by other sessions are not reused.
+    keys = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Role):
+            keys.append(f"Role/{obj.id}")
+        elif isinstance(obj, User):
+            keys.append(f"User/{obj.id}")
+        elif isinstance(obj, Team) and (obj in session.deleted or inspect(obj).attrs.roles.history.has_changes()):
+            keys.append(f"Team/{obj.id}")
+    if keys:
+        acl_service.on_invalidation(keys)
+        invalidation_bus.publish(session, ACL_NAMESPACE, keys)
+
+invalidation_bus.subscribe(ACL_NAMESPACE, acl_service.on_invalidation)
+invalidation_bus.subscribe(RECORD_NAMESPACE, acl_service.on_invalidation)
@@ -0,0 +1,240 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import datetime
+import json
+import re
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, JSON, Numeric, String
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.model_registry import model_registry
+from app.models.acl_entities import entity_team
+from app.models.user import User
+from app.services.acl_service import acl_service
+from app.services.record_service import generate_ids
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Errors listed in the returned report; the rest are only counted (and passed to on_error)
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+def read_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Yields (row number, dict) for each data row; the first row is the header. Empty cells become None."""
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    for row_number, row in enumerate(reader, start=2):
+        if not row:
+            continue
+        if len(row) != len(header):
+            yield row_number, ValueError(f"Expected {len(header)} fields, got {len(row)}")
+            continue
+        yield row_number, {name: (value if value != '' else None) for name, value in zip(header, row)}
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Yields (line number, dict) per non-empty line, or (line number, ValueError) for a malformed one."""
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield row_number, ValueError("Expected a JSON object")
+            continue
+        yield row_number, row
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+def _convert_boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean: {value}")
+
+def _get_converter(column) -> Callable[[Any], Any]:
+    """Converts a raw (CSV string or JSON) value to the column's type, raising ValueError when it doesn't fit."""
+    type_ = column.type
+    if isinstance(type_, Boolean):
+        return _convert_boolean
+    if isinstance(type_, Integer):
+        return int
+    if isinstance(type_, (Float, Numeric)):
+        return float
+    if isinstance(type_, DateTime):
+        return lambda value: value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(value)
+    if isinstance(type_, Date):
+        return lambda value: value if isinstance(value, datetime.date) else datetime.date.fromisoformat(value)
+    if isinstance(type_, JSON):
+        return lambda value: json.loads(value) if isinstance(value, str) else value
+    if isinstance(type_, String):
+        length = type_.length
+        def convert(value):
+            value = value if isinstance(value, str) else str(value)
+            if length is not None and len(value) > length:
+                raise ValueError(f"{column.name} is longer than {length} characters")
+            return value
+        return convert
+    return lambda value: value
+
+class ImportService:
+    """
+    Bulk import of CSV/NDJSON rows: values are mapped and validated with the model registry, then inserted
+    in chunks with one executemany for the records and one for their entity_team rows, one transaction per chunk.
+    Invalid rows are reported and skipped; they don't abort the import.
+    """
+    def __init__(self, db: Session, user: User = None):
+        self.db = db
+        self.user = user
+
+    def import_rows(
+        self,
+        entity_name: str,
+        rows: Iterable[Tuple[int, Any]],
+        chunk_size: Optional[int] = None,
+        on_error: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """`rows` are (row number, dict or exception) pairs as produced by read_csv / read_ndjson."""
+        if self.user:
+            if not acl_service.check(self.user, entity_name, 'create'):
+                 raise PermissionError(f"Create access denied for {entity_name}")
+
+        model_class = model_registry.get_model(entity_name)
+        if model_class is None:
+            raise ValueError(f"Entity {entity_name} not found")
+
+        chunk_size = chunk_size or settings.importChunkSize
+        plan = self._get_plan(model_class)
+        report = {"count": 0, "errorCount": 0, "errors": []}
+
+        def add_error(row_number: int, message: str):
+            error = {"row": row_number, "error": message}
+            report["errorCount"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append(error)
+            if on_error:
+                on_error(error)
+
+        batch = []
+        for row_number, row in rows:
+            if isinstance(row, Exception):
+                add_error(row_number, str(row))
+                continue
+            try:
+                batch.append((row_number,) + self._prepare_row(plan, row))
+            except (ValueError, TypeError) as e:
+                add_error(row_number, str(e))
+                continue
+            if len(batch) >= chunk_size:
+                report["count"] += self._write_batch(entity_name, model_class, batch, add_error)
+                batch = []
+        if batch:
+            report["count"] += self._write_batch(entity_name, model_class, batch, add_error)
+
+        return report
+
+    def _get_plan(self, model_class) -> dict:
+        info = model_registry.get(model_class)
+        table = model_class.__table__
+        fields = []
+        defaults = {}
+        for key, column_name in info.fields:
+            column = table.c[column_name]
+            fields.append((key, str(column_name), _get_converter(column)))
+            # Executemany needs the same keys in every row, so Python-side defaults are applied here.
+            default = column.default
+            if default is not None and (default.is_scalar or default.is_callable):
+                defaults[str(column_name)] = default.arg
+            else:
+                defaults[str(column_name)] = None
+
+        default_team_ids = None
+        if self.user and self.user.default_team_id:
+            default_team_ids = [self.user.default_team_id]
+
+        return {
+            "fields": fields,
+            "defaults": defaults,
+            "hasTeams": hasattr(model_class, 'teams'),
+            "defaultTeamIds": default_team_ids,
+            "assignedUserColumn": 'assignedUserId' if 'assignedUserId' in info.columns else None
+        }
+
+    def _prepare_row(self, plan: dict, row: dict) -> Tuple[dict, Optional[List[str]]]:
+        values = {}
+        for key, column_name, convert in plan["fields"]:
+            raw = row.get(column_name)
+            if raw is None:
+                raw = row.get(key)
+            if raw is None:
+                # Missing or empty: same as create, which leaves None values to the column default
+                default = plan["defaults"][column_name]
+                values[column_name] = default(None) if callable(default) else default
+                continue
+            values[column_name] = convert(raw)
+
+        assigned_user_column = plan["assignedUserColumn"]
+        if self.user and assigned_user_column and values.get(assigned_user_column) is None:
+            values[assigned_user_column] = self.user.id
+
+        team_ids = None
+        if plan["hasTeams"]:
+            team_ids = row.get('teamsIds')
+            if isinstance(team_ids, str):
+                # CSV: "t1,t2" or "t1;t2"
+                team_ids = [team_id.strip() for team_id in re.split('[,;]', team_ids) if team_id.strip()]
+            elif team_ids is not None and not isinstance(team_ids, list):
+                raise ValueError("teamsIds must be a list")
+            if team_ids is None:
+                team_ids = plan["defaultTeamIds"]
+        return values, team_ids
+
+    def _write_batch(self, entity_name: str, model_class, batch: List[tuple], add_error) -> int:
+        table = model_class.__table__
+        missing_ids = [values for row_number, values, team_ids in batch if not values.get('id')]
+        for values, record_id in zip(missing_ids, generate_ids(len(missing_ids))):
+            values['id'] = record_id
+
+        def team_rows(items):
+            return [
+                {"entity_id": values['id'], "entity_type": entity_name, "team_id": team_id}
+                for row_number, values, team_ids in items
+                for team_id in team_ids or []
+            ]
+
+        try:
+            with self.db.begin_nested():
+                self.db.execute(table.insert(), [values for row_number, values, team_ids in batch])
+                links = team_rows(batch)
+                if links:
+                    self.db.execute(entity_team.insert(), links)
+            count = len(batch)
+        except IntegrityError:
+            # Some row in the chunk conflicts (e.g. duplicate id); retry one by one to isolate it.
+            count = 0
+            for item in batch:
+                try:
+                    with self.db.begin_nested():
+                        self.db.execute(table.insert(), [item[1]])
+                        links = team_rows([item])
+                        if links:
+                            self.db.execute(entity_team.insert(), links)
+                    count += 1
+                except IntegrityError as e:
+                    add_error(item[0], str(e.orig))
+
+        self.db.commit()
+        return count
@@ -1,6 +1,10 @@
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from app.core.invalidation_bus import invalidation_bus
+
+# Invalidation bus namespace for metadata files; always invalidated as a whole
+METADATA_NAMESPACE = 'metadata'
 
 class MetadataService:
     def __init__(self):
@@ -36,6 +40,9 @@ class MetadataService:
         self._data_cache = data
         return data
 
+    def clear_cache(self, keys: Optional[List[str]] = None):
+        self._data_cache = None
+
     def get_data_for_frontend(self) -> Dict[str, Any]:
         """
         Alias for get_data, matching the controller's expectation.
@@ -123,3 +130,4 @@ class MetadataService:
                 target[key] = value
 
 metadata_service = MetadataService()
+invalidation_bus.subscribe(METADATA_NAMESPACE, metadata_service.clear_cache)
@@ -1,57 +1,121 @@
-from typing import Any, List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import inspect
+from typing import Any, Iterator, List, Optional, Tuple
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session, load_only, selectinload, MANYTOONE, ONETOMANY
 from app.models.user import User
-from app.models.standard_entities import Account, Contact
-from app.models.acl_entities import Role, Team
-from app.services.metadata import metadata_service
 from app.services.acl_service import acl_service
-from app.core.select_manager import SelectManager
+from app.core.config import settings
+from app.core.model_registry import model_registry, to_snake_case
+from app.models.acl_entities import entity_team
+from app.core.select_manager import SelectManager, TOTAL_MODE_EXACT
+from app.core.responses import dumps
+from app.core.invalidation_bus import invalidation_bus
+from app.core.record_cache import CachedRecord, RECORD_NAMESPACE, get_record_key, record_cache
+import datetime
+import hashlib
 import secrets
 import string
-import re
-
-def generate_id():
+import time
+import zlib
+
+ID_SCHEME_ORDERED = 'ordered'
+ID_SCHEME_RANDOM = 'random'
+
+BASE36_ALPHABET = string.digits + string.ascii_lowercase
+# Milliseconds since the epoch in 9 base36 chars (good until the year 5138), then 15 random hex chars (60 bits)
+ID_TIME_LENGTH = 9
+ID_RANDOM_LENGTH = 15
+
+def _get_time_prefix() -> str:
+    value = time.time_ns() // 1000000
+    chars = []
+    for i in range(ID_TIME_LENGTH):
+        value, remainder = divmod(value, 36)
+        chars.append(BASE36_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+def generate_random_id() -> str:
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for i in range(24))
 
-def to_snake_case(name):
-    name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+def generate_id() -> str:
+    """
+    24-char record id. With the default `ordered` scheme ids sort by creation time, so inserts append to the
+    end of the primary key index instead of landing on random pages. Lowercase only, so ids stay distinct
+    under case-insensitive collations.
+    """
+    if settings.recordIdScheme == ID_SCHEME_RANDOM:
+        return generate_random_id()
+    return _get_time_prefix() + secrets.token_hex(8)[:ID_RANDOM_LENGTH]
+
+def generate_ids(count: int) -> List[str]:
+    """`count` ids for a batch insert, in ascending order for the ordered scheme."""
+    if settings.recordIdScheme == ID_SCHEME_RANDOM:
+        return [generate_random_id() for i in range(count)]
+    prefix = _get_time_prefix()
+    randomness = secrets.token_hex(8 * count)
+    return sorted(prefix + randomness[i * 16:i * 16 + ID_RANDOM_LENGTH] for i in range(count))
+
+# Maintained by the service, never taken from request data
+VERSION_ATTRIBUTES = ('version_number', 'modified_at')
+
+# Relationships that grant permissions. Only admins may link or unlink them; never without a user.
+ACL_LINKS = frozenset((('User', 'roles'), ('User', 'teams'), ('Team', 'roles')))
+
+class PreconditionFailed(Exception):
+    """If-Match didn't match the record's current ETag."""
+    pass
+
+def get_record_etag(data: dict, version: Optional[int] = None) -> str:
+    """
+    Strong ETag of a record representation. Versioned records: id, version and a checksum of the returned
+    field names (so projections differ), no hashing of values. Others: a hash of the encoded data.
+    """
+    if version is None:
+        version = data.get('versionNumber')
+    if version is None:
+        return '"' + hashlib.sha1(dumps(data)).hexdigest()[:20] + '"'
+    fields_checksum = zlib.crc32(','.join(data).encode())
+    return f'"{data["id"]}-{version}-{fields_checksum:08x}"'
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """Matches an If-None-Match (weak comparison) or If-Match (strong) header value against an ETag."""
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
 
 class RecordService:
     def __init__(self, db: Session, user: User = None):
         self.db = db
         self.user = user
-        # Registry of models. In a real dynamic system, this would be more complex.
-        self.models = {
-            "User": User,
-            "Account": Account,
-            "Contact": Contact,
-            "Role": Role,
-            "Team": Team
-        }
+        self.models = model_registry.entities
+        # (entity type, id) pairs to drop from the record cache once the current transaction commits
+        self._pending_invalidations = set()
 
     def _get_model(self, entity_name: str):
         if entity_name not in self.models:
             raise ValueError(f"Entity {entity_name} not found")
         return self.models[entity_name]
 
-    def _get_record_data(self, record) -> dict:
-        """Converts a SQLAlchemy record to a dictionary, handling camelCase keys."""
-        data = {}
-        mapper = inspect(record).mapper
-        for prop in mapper.iterate_properties:
-            if hasattr(prop, 'columns'):
-                col = prop.columns[0]
-                # Use the column name (which matches the DB and usually the JSON)
-                # If column name is same as attribute, or if we explicitly defined name="camelCase"
-                key = col.name
-                value = getattr(record, prop.key)
-                data[key] = value
-
-        data['id'] = record.id
-        return data
+    def _get_record_data(self, record, fields=None) -> dict:
+        """
+        Converts a SQLAlchemy record to a dictionary keyed by column names (camelCase).
+        `fields` restricts the output to a projection from ModelInfo.select_fields.
+        """
+        return model_registry.get(type(record)).get_serializer(fields)(record)
+
+    def _get_list_data(self, model_class, records, fields=None) -> List[dict]:
+        serialize = model_registry.get(model_class).get_serializer(fields)
+        return [serialize(record) for record in records]
 
     def find(self, entity_name: str, params: dict) -> dict:
         if self.user:
@@ -60,7 +124,11 @@ class RecordService:
                 raise PermissionError(f"Access denied for {entity_name}")
 
         model_class = self._get_model(entity_name)
-        select_manager = SelectManager(self.db, model_class)
+        select_manager = SelectManager(self.db, model_class, self.user)
+        return self._find(entity_name, select_manager, params)
+
+    def _find(self, entity_name: str, select_manager: SelectManager, params: dict) -> dict:
+        model_class = select_manager.model_class
 
         if 'where' in params:
             select_manager.apply_where(params['where'])
@@ -79,24 +147,109 @@ class RecordService:
 
         if sort_by:
              select_manager.apply_order(sort_by, asc)
+        else:
+             # Full-text searches without explicit sort are ranked by relevance.
+             select_manager.apply_text_rank_order()
+
+        fields = None
+        if params.get('select'):
+             fields = model_registry.get(model_class).select_fields(params['select'])
+             select_manager.apply_select([key for key, column_name in fields])
+        # Tiebreak on id so pages are deterministic and a keyset cursor identifies a single row.
+        select_manager.apply_id_order()
 
         offset = params.get('offset')
         max_size = params.get('maxSize')
+        after = params.get('after')
 
         if offset is not None:
             offset = int(offset)
         if max_size is not None:
             max_size = int(max_size)
 
+        if after:
+            # Cursor mode: every page costs the same regardless of depth, offset is ignored.
+            select_manager.apply_cursor(after)
+            offset = None
+
         select_manager.apply_limit(offset, max_size)
 
-        records, total = select_manager.execute()
+        # exact (default), none, estimate or hasMore. See SelectManager.execute.
+        total_mode = params.get('totalMode') or TOTAL_MODE_EXACT
+
+        records, total = select_manager.execute(total_mode)
+
+        next_cursor = None
+        has_more = select_manager.has_more
+        if has_more is None:
+            has_more = max_size is not None and len(records) == max_size
+        if records and has_more:
+            # None when ordered by relevance, which can't be paged by keyset.
+            next_cursor = select_manager.build_cursor(records[-1])
 
         return {
-            "list": [self._get_record_data(r) for r in records],
-            "total": total
+            "list": self._get_list_data(select_manager.model_class, records, fields),
+            "total": total,
+            "hasMore": has_more,
+            "nextCursor": next_cursor
         }
 
+    def aggregate(self, entity_name: str, params: dict) -> dict:
+        """
+        Grouped counts/sums computed in SQL, e.g. Accounts by industry.
+        Honours the same `where` and ACL read filters as find.
+        """
+        if self.user:
+            level = acl_service.get_permission_level(self.user, entity_name, 'read')
+            if level == 'no':
+                raise PermissionError(f"Access denied for {entity_name}")
+
+        model_class = self._get_model(entity_name)
+        select_manager = SelectManager(self.db, model_class, self.user)
+
+        if 'where' in params:
+            select_manager.apply_where(params['where'])
+
+        if self.user:
+             self._apply_acl_filters(select_manager, entity_name, 'read')
+
+        group_by = params.get('groupBy') or []
+        rows = select_manager.aggregate(group_by, params.get('fn') or 'count', params.get('attribute'))
+
+        return {
+            "list": rows,
+            "total": len(rows)
+        }
+
+    def export(self, entity_name: str, params: dict) -> Tuple[List[str], Iterator[tuple]]:
+        """
+        Returns the exported column names and an iterator streaming the matching rows as tuples.
+        Same `where`, `sortBy`/`asc`, `select` and ACL read filters as find, but no pagination or total.
+        """
+        if self.user:
+            level = acl_service.get_permission_level(self.user, entity_name, 'read')
+            if level == 'no':
+                raise PermissionError(f"Access denied for {entity_name}")
+
+        model_class = self._get_model(entity_name)
+        model_info = model_registry.get(model_class)
+        select_manager = SelectManager(self.db, model_class, self.user)
+
+        if 'where' in params:
+            select_manager.apply_where(params['where'])
+
+        if self.user:
+             self._apply_acl_filters(select_manager, entity_name, 'read')
+
+        if params.get('sortBy'):
+             select_manager.apply_order(params['sortBy'], params.get('asc', False))
+        select_manager.apply_id_order()
+
+        fields = model_info.select_fields(params.get('select'))
+        columns = [getattr(model_class, key) for key, column_name in fields]
+        rows = select_manager.iterate_rows(columns, settings.exportBatchSize)
+        return [str(column_name) for key, column_name in fields], rows
+
     def create(self, entity_name: str, data: dict) -> dict:
         if self.user:
             if not acl_service.check(self.user, entity_name, 'create'):
@@ -124,13 +277,36 @@ class RecordService:
         if team_ids:
              self._update_teams(record, team_ids, entity_name)
 
-        self.db.commit()
+        self._commit()
         self.db.refresh(record)
         return self._get_record_data(record)
 
-    def read(self, entity_name: str, id: str) -> Optional[dict]:
+    def read(self, entity_name: str, id: str, select: Optional[List[str]] = None) -> Optional[dict]:
+        result = self.read_with_etag(entity_name, id, select)
+        return result[0] if result else None
+
+    def read_with_etag(self, entity_name: str, id: str, select: Optional[List[str]] = None) -> Optional[Tuple[dict, str]]:
+        """Returns (data, ETag) or None when the record doesn't exist."""
         model = self._get_model(entity_name)
-        record = self.db.query(model).get(id)
+
+        if record_cache.enabled:
+            return self._read_cached(model, entity_name, id, select)
+        return self._read_uncached(model, entity_name, id, select)
+
+    def _read_uncached(self, model, entity_name: str, id: str, select: Optional[List[str]] = None) -> Optional[Tuple[dict, str]]:
+        fields = None
+        options = []
+        if select:
+            fields = model_registry.get(model).select_fields(select)
+            keys = {key for key, column_name in fields}
+            if self.user and hasattr(model, 'assigned_user_id'):
+                # Needed by the scope check
+                keys.add('assigned_user_id')
+            if hasattr(model, 'version_number'):
+                keys.add('version_number')
+            options.append(load_only(*[getattr(model, key) for key in keys]))
+
+        record = self._get_record(model, entity_name, id, 'read', options)
         if not record:
             return None
 
@@ -138,11 +314,44 @@ class RecordService:
             if not acl_service.check_scope(self.user, record, 'read'):
                  raise PermissionError(f"Read access denied for {entity_name} {id}")
 
-        return self._get_record_data(record)
+        data = self._get_record_data(record, fields)
+        return data, get_record_etag(data, getattr(record, 'version_number', None))
+
+    def _read_cached(self, model, entity_name: str, id: str, select: Optional[List[str]] = None) -> Optional[Tuple[dict, str]]:
+        """
+        Read through the record cache. Entries hold the full row plus owner and team ids,
+        so the scope check runs for the current user on every hit.
+        A projected read is served from a cached entry, but a miss loads only the selected columns
+        and doesn't fill the cache.
+        """
+        entry = record_cache.get(entity_name, id)
+        if entry is None and select:
+            return self._read_uncached(model, entity_name, id, select)
+        if entry is None:
+            generation = record_cache.generation
+            options = [selectinload(model.teams)] if hasattr(model, 'teams') else []
+            record = self.db.get(model, id, options=options)
+            if not record:
+                return None
+            team_ids = frozenset(team.id for team in record.teams) if hasattr(model, 'teams') else None
+            entry = CachedRecord(self._get_record_data(record), getattr(record, 'assigned_user_id', None), team_ids)
+            record_cache.set(entity_name, id, entry, generation)
 
-    def update(self, entity_name: str, id: str, data: dict) -> Optional[dict]:
+        if self.user:
+            if not acl_service.check_scope_values(self.user, model.__name__, entry.assigned_user_id, entry.team_ids, 'read'):
+                 raise PermissionError(f"Read access denied for {entity_name} {id}")
+
+        if select:
+            fields = model_registry.get(model).select_fields(select)
+            data = {column_name: entry.data[column_name] for key, column_name in fields}
+        else:
+            data = dict(entry.data)
+        return data, get_record_etag(data, entry.data.get('versionNumber'))
+
+    def update(self, entity_name: str, id: str, data: dict, if_match: Optional[str] = None) -> Optional[dict]:
+        """`if_match`: If-Match header value; PreconditionFailed is raised when the record has changed since."""
         model = self._get_model(entity_name)
-        record = self.db.query(model).get(id)
+        record = self._get_record(model, entity_name, id, 'edit')
         if not record:
             return None
 
@@ -150,152 +359,377 @@ class RecordService:
             if not acl_service.check_scope(self.user, record, 'edit'):
                  raise PermissionError(f"Edit access denied for {entity_name} {id}")
 
+        if if_match is not None:
+            if not etag_matches(if_match, get_record_etag(self._get_record_data(record)), weak=False):
+                raise PreconditionFailed(f"{entity_name} {id} has been modified")
+
+        if hasattr(model, 'version_number'):
+            # Bumped in SQL. With If-Match the UPDATE only matches the version checked above, so a concurrent
+            # write that committed in between makes it match no row (and holds the row until commit otherwise).
+            conditions = [model.id == id]
+            if if_match is not None:
+                conditions.append(func.coalesce(model.version_number, 0) == (record.version_number or 0))
+            result = self.db.execute(
+                update(model.__table__).where(*conditions).values(self._get_touch_values(model)),
+                execution_options={"synchronize_session": False}
+            )
+            if result.rowcount == 0:
+                self.db.rollback()
+                raise PreconditionFailed(f"{entity_name} {id} has been modified")
+
         self._populate_record(record, data)
+        self._invalidate(entity_name, [id])
 
         team_ids = data.get('teamsIds')
         if team_ids is not None:
              self._update_teams(record, team_ids, entity_name)
 
-        self.db.commit()
+        self._commit()
         self.db.refresh(record)
         return self._get_record_data(record)
 
     def delete(self, entity_name: str, id: str) -> bool:
         model = self._get_model(entity_name)
-        record = self.db.query(model).get(id)
+        record = self._get_record(model, entity_name, id, 'delete')
         if record:
             if self.user:
                 if not acl_service.check_scope(self.user, record, 'delete'):
                      raise PermissionError(f"Delete access denied for {entity_name} {id}")
 
             record.deleted = True
-            self.db.commit()
+            self._touch(record)
+            self._invalidate(entity_name, [id])
+            self._commit()
             return True
         return False
 
-    def link(self, entity_name: str, id: str, link_name: str, foreign_id: str) -> bool:
-        model = self._get_model(entity_name)
-        record = self.db.query(model).get(id)
-        if not record:
-            raise ValueError("Record not found")
+    def mass_update(self, entity_name: str, params: dict) -> dict:
+        """
+        Set-based update of the records selected by `ids` or `where`, restricted to those the user may edit.
+        `data` holds attribute values and optionally `teamsIds`. Returns the number of updated records.
+        """
+        model_class = self._get_model(entity_name)
+        data = params.get('data') or {}
+
+        values = {}
+        for key, column_name in model_registry.get(model_class).fields:
+            if key == 'id' or key in VERSION_ATTRIBUTES:
+                continue
+            if column_name in data:
+                val = data[column_name]
+            elif key in data:
+                val = data[key]
+            else:
+                continue
+            if val is not None:
+                values[key] = val
 
-        link_def = self._get_link_def(entity_name, link_name)
-        link_type = link_def.get("type")
-        related_entity = link_def.get("entity")
+        team_ids = data.get('teamsIds')
+        if not values and team_ids is None:
+            raise ValueError("Nothing to update")
+
+        if values or team_ids is not None:
+            values.update(self._get_touch_values(model_class))
+
+        count = 0
+        for ids in self._get_mass_action_id_chunks(entity_name, model_class, params, 'edit'):
+            if values:
+                self.db.execute(
+                    update(model_class).where(model_class.id.in_(ids)).values(values),
+                    execution_options={"synchronize_session": False}
+                )
+            if team_ids is not None:
+                self._replace_teams(model_class, ids, team_ids, entity_name)
+            self._invalidate(entity_name, ids)
+            # One transaction per chunk bounds lock time on huge sets.
+            self._commit()
+            count += len(ids)
+
+        return {"count": count}
+
+    def mass_delete(self, entity_name: str, params: dict) -> dict:
+        """Soft-deletes the records selected by `ids` or `where` that the user may delete."""
+        model_class = self._get_model(entity_name)
+        if not hasattr(model_class, 'deleted'):
+            raise ValueError(f"Entity {entity_name} does not support deletion")
+
+        count = 0
+        for ids in self._get_mass_action_id_chunks(entity_name, model_class, params, 'delete'):
+            result = self.db.execute(
+                update(model_class)
+                .where(model_class.id.in_(ids), model_class.deleted.isnot(True))
+                .values({model_class.deleted: True, **self._get_touch_values(model_class)}),
+                execution_options={"synchronize_session": False}
+            )
+            self._invalidate(entity_name, ids)
+            self._commit()
+            count += result.rowcount
 
-        foreign_model = self._get_model(related_entity)
-        foreign_record = self.db.query(foreign_model).get(foreign_id)
-        if not foreign_record:
-             raise ValueError("Foreign record not found")
+        return {"count": count}
 
-        # Find the attribute on the model that corresponds to 'link_name'
-        # Try exact match first, then snake_case
-        attr_name = self._find_attribute(record, link_name)
+    def _get_mass_action_id_chunks(self, entity_name: str, model_class, params: dict, action: str):
+        if self.user:
+            level = acl_service.get_permission_level(self.user, entity_name, action)
+            if level == 'no':
+                raise PermissionError(f"{action.capitalize()} access denied for {entity_name}")
 
-        if not attr_name:
-             raise ValueError(f"Attribute for link {link_name} not found on model {entity_name}")
+        ids = params.get('ids')
+        where = params.get('where')
+        # An empty filter must not select the whole table
+        if not ids and not where:
+            raise ValueError("Missing ids or where")
 
-        if link_type == "belongsTo":
-             setattr(record, attr_name, foreign_record)
-        elif link_type in ["hasMany", "hasChildren"]:
-             collection = getattr(record, attr_name)
-             collection.append(foreign_record)
-        else:
-             raise ValueError(f"Unsupported link type: {link_type}")
+        chunk_size = settings.massActionChunkSize
+        if ids is None:
+            yield from self._get_mass_action_select_manager(entity_name, model_class, where, action).iterate_id_chunks(chunk_size)
+            return
 
-        self.db.commit()
+        # Slice the id list first so no statement carries more than chunk_size parameters.
+        ids = sorted(set(ids))
+        for start in range(0, len(ids), chunk_size):
+            select_manager = self._get_mass_action_select_manager(entity_name, model_class, where, action)
+            select_manager.base_query = select_manager.base_query.where(model_class.id.in_(ids[start:start + chunk_size]))
+            yield from select_manager.iterate_id_chunks(chunk_size)
+
+    def _get_mass_action_select_manager(self, entity_name: str, model_class, where, action: str) -> SelectManager:
+        select_manager = SelectManager(self.db, model_class, self.user)
+        if hasattr(model_class, 'deleted'):
+            # Soft-deleted records are not updated or deleted again
+            select_manager.base_query = select_manager.base_query.where(model_class.deleted.isnot(True))
+        if where:
+            select_manager.apply_where(where)
+        if self.user:
+             self._apply_acl_filters(select_manager, entity_name, action)
+        return select_manager
+
+    def link(self, entity_name: str, id: str, link_name: str, foreign_id: str) -> bool:
+        self.link_many(entity_name, id, link_name, [foreign_id])
         return True
 
     def unlink(self, entity_name: str, id: str, link_name: str, foreign_id: str) -> bool:
-        model = self._get_model(entity_name)
-        record = self.db.query(model).get(id)
-        if not record:
-             raise ValueError("Record not found")
+        self.unlink_many(entity_name, id, link_name, [foreign_id])
+        return True
 
-        link_def = self._get_link_def(entity_name, link_name)
-        link_type = link_def.get("type")
+    def link_many(self, entity_name: str, id: str, link_name: str, foreign_ids: List[str]) -> int:
+        """
+        Links all foreign records in one transaction: one IN query validates the ids, then a single
+        executemany into the association table (or one UPDATE of the foreign key). Returns the number of new links.
+        """
+        model, rel = self._get_link_relationship(entity_name, id, link_name)
+        foreign_model = rel.mapper.class_
+        foreign_ids = list(dict.fromkeys(foreign_ids))
+        if not foreign_ids:
+            return 0
+        self._check_link_access(entity_name, id, rel, foreign_ids)
+
+        found = set(self.db.execute(
+            select(foreign_model.id).where(foreign_model.id.in_(foreign_ids))
+        ).scalars())
+        if len(found) != len(foreign_ids):
+             raise ValueError("Foreign record not found")
 
-        attr_name = self._find_attribute(record, link_name)
-        if not attr_name:
-             raise ValueError(f"Attribute for link {link_name} not found on model {entity_name}")
+        if rel.direction is MANYTOONE:
+            # belongsTo
+            if len(foreign_ids) > 1:
+                 raise ValueError(f"Link {link_name} accepts a single record")
+            fk_column = rel.synchronize_pairs[0][1]
+            self.db.execute(
+                update(model.__table__)
+                .where(model.id == id)
+                .values({fk_column: foreign_ids[0], **self._get_touch_values(model)})
+            )
+            count = 1
+        elif rel.direction is ONETOMANY:
+            fk_column = rel.synchronize_pairs[0][1]
+            self.db.execute(
+                update(foreign_model.__table__)
+                .where(foreign_model.id.in_(foreign_ids))
+                .values({fk_column: id, **self._get_touch_values(foreign_model)})
+            )
+            count = len(foreign_ids)
+            self._invalidate(model_registry.get_entity_name(foreign_model), foreign_ids)
+        else:
+            secondary = rel.secondary
+            local_column = rel.synchronize_pairs[0][1]
+            remote_column = rel.secondary_synchronize_pairs[0][1]
+            conditions = self._get_link_conditions(model, rel, id)
+
+            existing = set(self.db.execute(
+                select(remote_column).where(*conditions, remote_column.in_(foreign_ids))
+            ).scalars())
+            row = {local_column.name: id}
+            if secondary is entity_team:
+                row["entity_type"] = model.__name__
+            values = [dict(row, **{remote_column.name: foreign_id}) for foreign_id in foreign_ids if foreign_id not in existing]
+            if values:
+                self.db.execute(secondary.insert(), values)
+            count = len(values)
+
+        self._invalidate(entity_name, [id])
+        self._commit()
+        return count
+
+    def unlink_many(self, entity_name: str, id: str, link_name: str, foreign_ids: List[str]) -> int:
+        """Removes the links to all given foreign records with one statement and one commit. Returns the number removed."""
+        model, rel = self._get_link_relationship(entity_name, id, link_name)
+        foreign_model = rel.mapper.class_
+        if not foreign_ids:
+            return 0
+        self._check_link_access(entity_name, id, rel, foreign_ids)
+
+        if rel.direction is MANYTOONE:
+            fk_column = rel.synchronize_pairs[0][1]
+            result = self.db.execute(
+                update(model.__table__)
+                .where(model.id == id, fk_column.in_(foreign_ids))
+                .values({fk_column: None, **self._get_touch_values(model)})
+            )
+        elif rel.direction is ONETOMANY:
+            fk_column = rel.synchronize_pairs[0][1]
+            result = self.db.execute(
+                update(foreign_model.__table__)
+                .where(foreign_model.id.in_(foreign_ids), fk_column == id)
+                .values({fk_column: None, **self._get_touch_values(foreign_model)})
+            )
+            self._invalidate(model_registry.get_entity_name(foreign_model), foreign_ids)
+        else:
+            remote_column = rel.secondary_synchronize_pairs[0][1]
+            result = self.db.execute(
+                delete(rel.secondary).where(*self._get_link_conditions(model, rel, id), remote_column.in_(foreign_ids))
+            )
 
-        if link_type == "belongsTo":
-             setattr(record, attr_name, None)
-        elif link_type in ["hasMany", "hasChildren"]:
-             collection = getattr(record, attr_name)
-             item_to_remove = next((x for x in collection if x.id == foreign_id), None)
-             if item_to_remove:
-                 collection.remove(item_to_remove)
+        self._invalidate(entity_name, [id])
+        self._commit()
+        return result.rowcount
 
-        self.db.commit()
-        return True
+    def _get_link_relationship(self, entity_name: str, id: str, link_name: str):
+        model = self._get_model(entity_name)
+        if self.db.execute(select(model.id).where(model.id == id)).first() is None:
+            raise ValueError("Record not found")
 
-    def find_linked(self, entity_name: str, id: str, link_name: str) -> List[dict]:
+        rel = model_registry.get(model).get_relationship(link_name)
+        if rel is None:
+             raise ValueError(f"Attribute for link {link_name} not found on model {entity_name}")
+        if (model.__name__, rel.key) in ACL_LINKS and not (self.user and self.user.is_admin):
+            raise PermissionError(f"Only administrators can change {entity_name} {link_name}")
+        return model, rel
+
+    def _check_link_access(self, entity_name: str, id: str, rel, foreign_ids: List[str]):
+        """
+        Edit access to the record, and to the foreign records when their own row changes (hasMany foreign key),
+        read access otherwise (or team membership for teams). One batch scope check per side instead of one
+        per foreign record.
+        """
+        if not self.user:
+            return
+        if not acl_service.check_scope_many(self.user, entity_name, [id], 'edit', self.db)[id]:
+            raise PermissionError(f"Edit access denied for {entity_name} {id}")
+
+        foreign_entity_name = model_registry.get_entity_name(rel.mapper.class_)
+        if foreign_entity_name is None:
+            raise PermissionError(f"Access denied for {rel.key}")
+        action = 'edit' if rel.direction is ONETOMANY else 'read'
+        decisions = acl_service.check_scope_many(self.user, foreign_entity_name, foreign_ids, action, self.db)
+        if rel.secondary is entity_team:
+            # Users may always assign the teams they are members of
+            for team in self.user.teams:
+                if team.id in decisions:
+                    decisions[team.id] = True
+        denied = [foreign_id for foreign_id, allowed in decisions.items() if not allowed]
+        if denied:
+            raise PermissionError(f"{action.capitalize()} access denied for {foreign_entity_name} {', '.join(denied[:10])}")
+
+    def _get_link_conditions(self, model, rel, id: str) -> list:
+        """Association table rows belonging to the record, scoped by entity_type for the polymorphic entity_team."""
+        conditions = [rel.synchronize_pairs[0][1] == id]
+        if rel.secondary is entity_team:
+            conditions.append(entity_team.c.entity_type == model.__name__)
+        return conditions
+
+    def find_linked(self, entity_name: str, id: str, link_name: str, params: Optional[dict] = None) -> dict:
+        """
+        Lists records linked to the given one, with the same where/sortBy/pagination/totalMode params and
+        ACL filters as find. The relationship join is part of the query, so the collection is never loaded.
+        """
         model = self._get_model(entity_name)
-        record = self.db.query(model).get(id)
+        record = self._get_record(model, entity_name, id, 'read')
         if not record:
              raise ValueError("Record not found")
 
-        attr_name = self._find_attribute(record, link_name)
-        if not attr_name:
+        rel = model_registry.get(model).get_relationship(link_name)
+        if rel is None:
              raise ValueError(f"Attribute for link {link_name} not found on model {entity_name}")
 
-        linked_records = getattr(record, attr_name)
-        if not linked_records:
-            return []
+        if self.user:
+            if not acl_service.check_scope(self.user, record, 'read'):
+                 raise PermissionError(f"Read access denied for {entity_name} {id}")
 
-        # It could be a single record (belongsTo) or a list
-        if not isinstance(linked_records, list) and not hasattr(linked_records, '__iter__'):
-             # Single record
-             return [self._get_record_data(linked_records)]
+        foreign_model = rel.mapper.class_
+        foreign_entity_name = model_registry.get_entity_name(foreign_model)
+        if self.user:
+            if foreign_entity_name is None:
+                raise PermissionError(f"Access denied for {link_name}")
+            level = acl_service.get_permission_level(self.user, foreign_entity_name, 'read')
+            if level == 'no':
+                raise PermissionError(f"Access denied for {foreign_entity_name}")
 
-        return [self._get_record_data(r) for r in linked_records]
+        select_manager = SelectManager(self.db, foreign_model, self.user)
+        select_manager.apply_parent(record, rel)
+        return self._find(foreign_entity_name, select_manager, params or {})
+
+    def _get_record(self, model, entity_name: str, id: str, action: str, options: Optional[list] = None):
+        """Loads a record for a scope check on `action`, with whatever the check needs eager-loaded."""
+        options = list(options or [])
+        if self.user:
+            options.extend(acl_service.get_record_load_options(self.user, model, entity_name, action))
+        return self.db.get(model, id, options=options)
+
+    def _invalidate(self, entity_name: str, ids: List[str]):
+        self._pending_invalidations.update((entity_name, id) for id in ids)
+
+    def _commit(self):
+        """Commits; the records written in this transaction are then invalidated in every worker's caches."""
+        if self._pending_invalidations:
+            pending = self._pending_invalidations
+            self._pending_invalidations = set()
+            invalidation_bus.publish(self.db, RECORD_NAMESPACE, [get_record_key(entity_name, id) for entity_name, id in pending])
+        self.db.commit()
+
+    def _touch(self, record):
+        if hasattr(type(record), 'version_number'):
+            record.version_number = (record.version_number or 0) + 1
+            record.modified_at = datetime.datetime.utcnow()
+
+    def _get_touch_values(self, model_class) -> dict:
+        """Version bump for set-based UPDATEs of model_class."""
+        if not hasattr(model_class, 'version_number'):
+            return {}
+        return {
+            model_class.version_number: func.coalesce(model_class.version_number, 0) + 1,
+            model_class.modified_at: datetime.datetime.utcnow()
+        }
 
     def _populate_record(self, record, data):
-        mapper = inspect(record).mapper
-        for prop in mapper.iterate_properties:
-            if hasattr(prop, 'columns'):
-                col = prop.columns[0]
-                # Try to find matching key in data
-                val = None
-                if col.name in data:
-                    val = data[col.name]
-                elif prop.key in data:
-                    val = data[prop.key]
-
-                if val is not None:
-                    setattr(record, prop.key, val)
-
-    def _get_link_def(self, entity_name, link_name):
-        metadata = metadata_service.get_data()
-        # Entity metadata is usually under 'entityDefs' -> {EntityName} -> ...
-        # But MetadataService merges everything into top level keys.
-        # Based on my check, 'Account' is a top level key in the merged metadata if it was loaded.
-        # MetadataService loading:
-        # Core metadata path: application/Espo/Resources/metadata
-        #   entityDefs/User.json -> data['entityDefs']['User']? No.
-        #   _load_from_subdir checks if directory 'entityDefs' exists in 'metadata'.
-        #   Then for each file in entityDefs, it loads it.
-        #   If file is User.json, key is 'User'.
-        #   It puts it into section_data (which is data['entityDefs']).
-
-        # So structure is data['entityDefs']['Account']...
-
-        entity_defs = metadata.get('entityDefs', {}).get(entity_name, {})
-        links = entity_defs.get('links', {})
-        link = links.get(link_name)
-        if not link:
-             # Fallback: maybe it's in a module and structure is different?
-             # MetadataService merges module metadata into the same structure.
-             # Let's verify structure later. Assuming 'entityDefs' -> Entity -> links -> LinkName
-             raise ValueError(f"Link {link_name} not found in metadata for {entity_name}")
-        return link
+        for key, column_name in model_registry.get(type(record)).fields:
+            if key in VERSION_ATTRIBUTES:
+                continue
+            # Try to find matching key in data
+            val = None
+            if column_name in data:
+                val = data[column_name]
+            elif key in data:
+                val = data[key]
+
+            if val is not None:
+                setattr(record, key, val)
 
     def _find_attribute(self, record, link_name):
-        # Try exact match
+        rel = model_registry.get(type(record)).get_relationship(link_name)
+        if rel is not None:
+            return rel.key
+        # Not a relationship; fall back to a plain attribute with exact or snake_case name.
         if hasattr(record, link_name):
             return link_name
-        # Try snake_case
         sc = to_snake_case(link_name)
         if hasattr(record, sc):
             return sc
@@ -317,17 +751,24 @@ class RecordService:
 
     def _update_teams(self, record, team_ids: List[str], entity_name: str):
         # Handle manual update of entity_team table because generic M2M with polymorphism is tricky
-        from app.models.acl_entities import entity_team
-        from sqlalchemy import delete
 
         # Check if model supports teams (has 'teams' relationship)
-        if not hasattr(record, 'teams'):
+        if not hasattr(type(record), 'teams'):
+             return
+
+        self._replace_teams(type(record), [record.id], team_ids, entity_name)
+
+    def _replace_teams(self, model_class, ids: List[str], team_ids: List[str], entity_name: str):
+        """Replaces the entity_team links of all given records with one DELETE and one multi-row INSERT."""
+        if not hasattr(model_class, 'teams'):
              return
 
+        self._invalidate(entity_name, ids)
+
         # Delete existing links
         self.db.execute(
             delete(entity_team).where(
-                entity_team.c.entity_id == record.id,
+                entity_team.c.entity_id.in_(ids),
                 entity_team.c.entity_type == entity_name
             )
         )
@@ -335,7 +776,8 @@ class RecordService:
         # Insert new links
         if team_ids:
             values = [
-                {"entity_id": record.id, "entity_type": entity_name, "team_id": t_id}
+                {"entity_id": record_id, "entity_type": entity_name, "team_id": t_id}
+                for record_id in ids
                 for t_id in team_ids
             ]
             self.db.execute(entity_team.insert(), values)
@@ -0,0 +1,97 @@
+"""
+Permission checks per second: merging role data on every call (previous behaviour) vs the compiled
+per-user permission table. Users get a few direct roles and team roles over a set of entity types.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_acl_permissions --checks 200000 --roles 6 --entities 40
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from app.models import user, acl_entities, standard_entities
+from app.models.acl_entities import Role, Team
+from app.models.user import User
+from app.services.acl_service import acl_service
+
+ACTIONS = ('create', 'read', 'edit', 'delete', 'stream')
+LEVELS = ('all', 'team', 'own', 'no')
+
+
+def legacy_level(user, entity_type, action):
+    all_roles = list(user.roles)
+    for team in user.teams:
+        all_roles.extend(team.roles)
+    final_level = 'no'
+    for role in all_roles:
+        perm = (role.data or {}).get(entity_type, {}).get(action)
+        if perm:
+            final_level = acl_service._merge_levels(final_level, perm, action)
+    return final_level
+
+
+def make_user(rnd, entities, roles: int):
+    def make_role(i):
+        data = {}
+        for entity_type in entities:
+            data[entity_type] = {
+                action: ('yes' if rnd.random() < 0.5 else 'no') if action == 'create' else rnd.choice(LEVELS)
+                for action in ACTIONS
+            }
+        return Role(id=f"r{i}", name=f"Role {i}", data=data)
+
+    principal = User(id="u1", user_name="user1")
+    principal.roles.extend(make_role(i) for i in range(roles // 2))
+    for t in range(2):
+        team = Team(id=f"t{t}", name=f"Team {t}")
+        team.roles.extend(make_role(100 * (t + 1) + i) for i in range(roles - roles // 2))
+        principal.teams.append(team)
+    return principal
+
+
+def measure(check, principal, calls):
+    started = time.perf_counter()
+    for entity_type, action in calls:
+        check(principal, entity_type, action)
+    return len(calls) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--roles", type=int, default=6, help="Direct roles plus roles of each of 2 teams")
+    parser.add_argument("--entities", type=int, default=40)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    entities = [f"Entity{i}" for i in range(args.entities)]
+    principal = make_user(rnd, entities, args.roles)
+    calls = [(rnd.choice(entities), rnd.choice(ACTIONS)) for _ in range(args.checks)]
+
+    for entity_type, action in calls[:1000]:
+        assert legacy_level(principal, entity_type, action) == acl_service.get_permission_level(principal, entity_type, action)
+
+    legacy = measure(legacy_level, principal, calls)
+    compiled = measure(acl_service.get_permission_level, principal, calls)
+
+    # Cold: a fresh user instance per request still finds the shared compiled table
+    started = time.perf_counter()
+    for _ in range(1000):
+        principal.__dict__.pop('_acl_permissions', None)
+        acl_service.get_permission_level(principal, *calls[0])
+    per_request_us = (time.perf_counter() - started) / 1000 * 1e6
+
+    print(f"checks={args.checks} roles={args.roles} entities={args.entities}")
+    print(f"   merge per call:   {legacy:>12,.0f} checks/s")
+    print(f"   compiled table:   {compiled:>12,.0f} checks/s  ({compiled / legacy:.1f}x)")
+    print(f"   table lookup per new user instance: {per_request_us:.1f} us  (builds: {acl_service.builds})")
+
+
+if __name__ == "__main__":
+    main()
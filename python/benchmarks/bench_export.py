@@ -0,0 +1,102 @@
+"""
+Peak memory of exporting N Accounts: the streaming export (server-side cursor + yield_per) vs materializing
+the same rows through find(). Each measurement runs in a fresh process, since peak RSS only grows.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_export --sizes 10000 50000 200000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.responses import dumps, iter_csv, iter_ndjson
+from app.models import user, acl_entities, standard_entities
+from app.models.standard_entities import Account
+from app.services.record_service import RecordService
+
+
+def populate(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for start in range(0, rows, 10000):
+            connection.execute(Account.__table__.insert(), [
+                {
+                    "id": f"{i:024d}", "name": f"Account {i}", "website": "https://example.com",
+                    "emailAddress": f"info{i}@example.com", "industry": "Finance",
+                    "description": "Lorem ipsum dolor sit amet " * 4, "deleted": False
+                }
+                for i in range(start, min(start + 10000, rows))
+            ])
+    engine.dispose()
+
+
+def max_rss_mb() -> float:
+    # KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(path: str, mode: str, size: int):
+    """Runs in the child process."""
+    engine = create_engine(f"sqlite:///{path}")
+    session = sessionmaker(bind=engine)()
+    service = RecordService(session)
+    where = [{"type": "lessThan", "attribute": "id", "value": f"{size:024d}"}]
+    baseline = max_rss_mb()
+
+    start = time.perf_counter()
+    written = 0
+    if mode == "find":
+        result = service.find("Account", {"where": where, "maxSize": size, "asc": True})
+        written = len(dumps(result))
+    else:
+        names, rows = service.export("Account", {"where": where, "asc": True})
+        encode = iter_csv if mode == "csv" else iter_ndjson
+        for chunk in encode(names, rows):
+            written += len(chunk)
+    elapsed = time.perf_counter() - start
+
+    peak = max_rss_mb()
+    print(json.dumps({"peak": peak, "rss": peak - baseline, "seconds": elapsed, "bytes": written}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--measure", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        path, mode, size = args.measure
+        measure(path, mode, int(size))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        populate(path, max(args.sizes))
+
+        print(f"{'rows':>8} {'mode':>7} {'peak RSS':>10} {'growth':>10} {'time':>8} {'output':>9}")
+        for size in args.sizes:
+            for mode in ("ndjson", "csv", "find"):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_export", "--measure", path, mode, str(size)],
+                    cwd=python_dir, capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{size:>8} {mode:>7} {result['peak']:>7.1f} MB {result['rss']:>7.1f} MB {result['seconds']:>7.2f}s {result['bytes'] / 2**20:>6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Login storm: logins per second and latency of an ordinary (threadpool) endpoint while many clients log in,
+with bcrypt run synchronously in the shared threadpool (previous behaviour) vs the bounded hashing pool.
+Also reports how many logins were turned away with 503.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_login --clients 100 --seconds 5 --rounds 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+import anyio.to_thread
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.api.endpoints import auth
+from app.core import security
+from app.core.config import settings
+from app.core.database import Base
+from app.core.deps import get_db
+from app.models import user, acl_entities, standard_entities, cache_invalidation
+from app.models.user import User
+
+
+def legacy_login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = db.query(User).filter(User.user_name == form_data.username).first()
+    if not user or not security.verify_password(form_data.password, user.password):
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    return {"access_token": security.create_access_token(data={"sub": user.id}), "token_type": "bearer"}
+
+
+def ping():
+    return {"status": "ok"}
+
+
+def make_app(session_factory, legacy: bool) -> FastAPI:
+    app = FastAPI()
+    if legacy:
+        app.post("/login/access-token")(legacy_login)
+    else:
+        app.include_router(auth.router)
+    app.get("/ping")(ping)
+
+    def get_session():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[get_db] = get_session
+    return app
+
+
+async def storm(app: FastAPI, clients: int, seconds: float, threads: int):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    transport = httpx.ASGITransport(app=app)
+    statuses = {}
+    ping_ms = []
+    deadline = time.perf_counter() + seconds
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i):
+            while time.perf_counter() < deadline:
+                response = await client.post("/login/access-token", data={"username": f"user{i % 50}", "password": "secret"})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 503:
+                    await asyncio.sleep(0.05)
+
+        async def pinger():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get("/ping")
+                ping_ms.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(pinger(), *(login(i) for i in range(clients)))
+    return statuses, ping_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=40, help="Shared threadpool size (Starlette default: 40)")
+    args = parser.parse_args()
+
+    settings.passwordHashRounds = args.rounds
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        password_hash = security.get_password_hash("secret")
+        with session_factory() as db:
+            db.execute(User.__table__.insert(), [
+                {"id": f"u{i}", "userName": f"user{i}", "password": password_hash, "isAdmin": False} for i in range(50)
+            ])
+            db.commit()
+
+        print(f"clients={args.clients} rounds={args.rounds} threads={args.threads} "
+              f"hash workers={settings.passwordHashWorkers} queue={settings.passwordHashQueueSize}")
+        for name, legacy in (("shared threadpool", True), ("bounded hashing pool", False)):
+            statuses, ping_ms = asyncio.run(storm(make_app(session_factory, legacy), args.clients, args.seconds, args.threads))
+            ping_ms.sort()
+            print(f"\n== {name}")
+            print(f"   logins:      {statuses.get(200, 0) / args.seconds:>8.1f}/s  (503: {statuses.get(503, 0)}, other: "
+                  f"{sum(count for status, count in statuses.items() if status not in (200, 503))})")
+            print(f"   /ping:       p50 {statistics.median(ping_ms):7.1f} ms   p99 {ping_ms[int(len(ping_ms) * 0.99) - 1]:7.1f} ms"
+                  f"   ({len(ping_ms)} requests)")
+        security.password_hasher.shutdown()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
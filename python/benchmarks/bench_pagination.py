@@ -0,0 +1,111 @@
+"""
+Compares OFFSET and keyset (cursor) pagination of RecordService.find at increasing page depths.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_pagination --rows 120000 --page-size 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models import user, acl_entities, standard_entities
+from app.models.standard_entities import Account
+from app.core.select_manager import SelectManager
+from app.services.record_service import RecordService
+
+
+def populate(session, rows: int):
+    industries = ["Healthcare", "Finance", "Retail", "Education", None]
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "id": f"{i:024d}",
+            "name": f"Account {i % 5000:05d}",
+            "industry": industries[i % len(industries)],
+            "deleted": False,
+        })
+        if len(batch) == 10000:
+            session.execute(Account.__table__.insert(), batch)
+            batch = []
+    if batch:
+        session.execute(Account.__table__.insert(), batch)
+    session.commit()
+
+
+def time_call(fn, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=120000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--sort-by", default="name")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        populate(session, args.rows)
+        # Keyset pagination only pays off when the sort has a usable index.
+        session.execute(text("CREATE INDEX bench_account_name_id ON account (name, id)"))
+        session.commit()
+
+        service = RecordService(session)
+        base_params = {"sortBy": args.sort_by, "asc": True, "maxSize": args.page_size}
+
+        def page_query(offset=None, cursor=None):
+            # The page query alone; the total count is identical for both modes.
+            manager = SelectManager(session, Account)
+            manager.apply_order(args.sort_by, True)
+            manager.apply_id_order()
+            query = manager.base_query
+            if cursor:
+                manager.apply_cursor(cursor)
+                query = query.where(manager.cursor_condition)
+            else:
+                query = query.offset(offset)
+            return session.execute(query.limit(args.page_size)).scalars().all()
+
+        print(f"rows={args.rows} pageSize={args.page_size} sortBy={args.sort_by}")
+        print(f"{'page':>8} {'offset ms':>12} {'cursor ms':>12} {'find/offset ms':>15} {'find/cursor ms':>15}")
+
+        max_page = args.rows // args.page_size - 1
+        # Small --rows: drop pages past the end (no cursor there) and ones that coincide
+        pages = sorted({page for page in (1, 10, 100, 1000, max_page // 2, max_page) if 1 <= page <= max_page})
+        for page in pages:
+            offset = page * args.page_size
+            # Cursor pointing at the last row of the previous page.
+            previous = service.find("Account", dict(base_params, offset=offset - args.page_size))
+            cursor = previous["nextCursor"]
+
+            assert [r.id for r in page_query(offset=offset)] == [r.id for r in page_query(cursor=cursor)]
+
+            offset_ms = time_call(lambda: page_query(offset=offset))
+            cursor_ms = time_call(lambda: page_query(cursor=cursor))
+            find_offset_ms = time_call(lambda: service.find("Account", dict(base_params, offset=offset)))
+            find_cursor_ms = time_call(lambda: service.find("Account", dict(base_params, after=cursor)))
+            print(f"{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f} {find_offset_ms:>15.2f} {find_cursor_ms:>15.2f}")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
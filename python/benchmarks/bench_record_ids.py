@@ -0,0 +1,81 @@
+"""
+Record id schemes: random 24-char ids vs time-ordered ids. Measures id generation, insert throughput into
+a growing account table (small page cache, so the index doesn't fit in memory) and the resulting index sizes.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_record_ids --rows 500000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from sqlalchemy import create_engine, event, text
+from app.core.config import settings
+from app.models import user, acl_entities, standard_entities
+from app.models.standard_entities import Account
+from app.services.record_service import generate_ids, ID_SCHEME_ORDERED, ID_SCHEME_RANDOM
+
+
+def run(scheme: str, rows: int, chunk_size: int, cache_kib: int):
+    settings.recordIdScheme = scheme
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        @event.listens_for(engine, "connect")
+        def set_cache_size(connection, record):
+            connection.execute(f"PRAGMA cache_size=-{cache_kib}")
+
+        # Table only: no full-text triggers, so the primary key and id indexes dominate
+        Account.__table__.create(engine)
+
+        generate_seconds = 0.0
+        insert_seconds = 0.0
+        last_chunks = []
+        for start in range(0, rows, chunk_size):
+            started_at = time.perf_counter()
+            ids = generate_ids(chunk_size)
+            generate_seconds += time.perf_counter() - started_at
+
+            batch = [{"id": record_id, "name": f"Account {start + i}", "deleted": False} for i, record_id in enumerate(ids)]
+            started_at = time.perf_counter()
+            with engine.begin() as connection:
+                connection.execute(Account.__table__.insert(), batch)
+            elapsed = time.perf_counter() - started_at
+            insert_seconds += elapsed
+            last_chunks = (last_chunks + [elapsed])[-10:]
+
+        with engine.connect() as connection:
+            sizes = dict(connection.execute(text(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE name LIKE '%account%' GROUP BY name"
+            )).all())
+        engine.dispose()
+
+    index_bytes = sum(size for name, size in sizes.items() if name != "account")
+    print(f"\n== {scheme}")
+    print(f"   id generation: {rows / generate_seconds:>12,.0f} ids/s")
+    print(f"   inserts:       {rows / insert_seconds:>12,.0f} rows/s overall, "
+          f"{chunk_size * len(last_chunks) / sum(last_chunks):,.0f} rows/s over the last {len(last_chunks)} chunks")
+    print(f"   table:         {sizes.get('account', 0) / 2**20:>9.1f} MB")
+    print(f"   indexes:       {index_bytes / 2**20:>9.1f} MB  ({', '.join(sorted(n for n in sizes if n != 'account'))})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--cache-kib", type=int, default=2048, help="SQLite page cache per connection")
+    args = parser.parse_args()
+
+    print(f"rows={args.rows} chunk={args.chunk_size} cache={args.cache_kib} KiB")
+    for scheme in (ID_SCHEME_RANDOM, ID_SCHEME_ORDERED):
+        run(scheme, args.rows, args.chunk_size, args.cache_kib)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Serialization cost of a record list response: per-row mapper reflection + jsonable_encoder + stdlib json
+(the previous path) vs the compiled per-model serializer + RecordResponse encoding.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_serialization --rows 5000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import inspect
+from app.core.model_registry import model_registry
+from app.core.responses import RecordResponse, orjson
+from app.models.standard_entities import Account
+
+
+def legacy_record_data(record) -> dict:
+    mapper = inspect(type(record))
+    data = {}
+    for prop in mapper.iterate_properties:
+        if hasattr(prop, 'columns'):
+            data[prop.columns[0].name] = getattr(record, prop.key)
+    data['id'] = record.id
+    return data
+
+
+def legacy_response(records) -> bytes:
+    content = jsonable_encoder({"list": [legacy_record_data(r) for r in records], "total": len(records)})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def compiled_response(records) -> bytes:
+    serialize = model_registry.get(Account).get_serializer()
+    return RecordResponse({"list": [serialize(r) for r in records], "total": len(records)}).body
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    records = [
+        Account(
+            id=f"{i:024d}", name=f"Account {i}", website="https://example.com", email_address=f"a{i}@example.com",
+            type="Customer", industry="Finance", description="Lorem ipsum " * 5, deleted=False, assigned_user_id="u1"
+        )
+        for i in range(args.rows)
+    ]
+    assert json.loads(legacy_response(records)) == json.loads(compiled_response(records))
+
+    print(f"rows={args.rows} encoder={'orjson' if orjson else 'json'}")
+    legacy = best_of(lambda: legacy_response(records))
+    compiled = best_of(lambda: compiled_response(records))
+    print(f"reflection + jsonable_encoder + json: {legacy:8.1f} ms")
+    print(f"compiled serializer + RecordResponse: {compiled:8.1f} ms  ({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Team-scope ACL list query: correlated `teams.any()` EXISTS vs the entity_team semi-join,
+with and without the (entity_type, team_id, entity_id) index. Prints plans and latency.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_team_acl --rows 200000 --teams 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from sqlalchemy import create_engine, func, or_, select, text
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.select_manager import SelectManager
+from app.models import user, acl_entities, standard_entities
+from app.models.acl_entities import Team, entity_team
+from app.models.standard_entities import Account, Contact
+
+INDEX_NAME = 'IDX_ENTITY_TEAM_TYPE_TEAM_ENTITY'
+
+
+def populate(session, rows: int, teams: int):
+    rnd = random.Random(1)
+    session.execute(Team.__table__.insert(), [{"id": f"t{i}", "name": f"Team {i}", "deleted": False} for i in range(teams)])
+    for model_class, entity_type in ((Account, "Account"), (Contact, "Contact")):
+        records, links = [], []
+        for i in range(rows):
+            record_id = f"{entity_type[0]}{i:023d}"
+            row = {"id": record_id, "assignedUserId": f"u{rnd.randrange(500)}", "deleted": False}
+            if model_class is Account:
+                row["name"] = f"Account {i}"
+            else:
+                row["lastName"] = f"Contact {i}"
+            records.append(row)
+            for team_index in rnd.sample(range(teams), rnd.choice((1, 1, 2))):
+                links.append({"entity_id": record_id, "entity_type": entity_type, "team_id": f"t{team_index}"})
+        session.execute(model_class.__table__.insert(), records)
+        session.execute(entity_team.insert(), links)
+    session.commit()
+    session.execute(text("ANALYZE"))
+
+
+def legacy_query(user_id, team_ids):
+    return select(Account).where(or_(
+        Account.assigned_user_id == user_id,
+        Account.teams.any(Team.id.in_(team_ids))
+    ))
+
+
+def semi_join_query(session, user_id, team_ids):
+    manager = SelectManager(session, Account)
+    manager.apply_team_access_filter(user_id, team_ids)
+    return manager.base_query
+
+
+def measure(session, label, query, page_size):
+    page = query.order_by(Account.id).limit(page_size)
+    count = select(func.count()).select_from(query.subquery())
+
+    plan = session.execute(text("EXPLAIN QUERY PLAN " + str(count.compile(compile_kwargs={"literal_binds": True})))).all()
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        total = session.scalar(count)
+        session.execute(page).scalars().all()
+        timings.append(time.perf_counter() - start)
+
+    print(f"\n== {label}: total={total} best={min(timings) * 1000:.1f} ms (count + page)")
+    for row in plan:
+        print("   ", row[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000, help="records per entity type")
+    parser.add_argument("--teams", type=int, default=2000)
+    parser.add_argument("--user-teams", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        populate(session, args.rows, args.teams)
+
+        user_id = "u7"
+        team_ids = [f"t{i}" for i in range(args.user_teams)]
+        print(f"rows={args.rows} per entity, teams={args.teams}, user teams={args.user_teams}")
+
+        measure(session, "teams.any() EXISTS, composite index", legacy_query(user_id, team_ids), args.page_size)
+        measure(session, "semi-join, composite index", semi_join_query(session, user_id, team_ids), args.page_size)
+
+        session.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        session.commit()
+        # Fresh connection so no prepared statement planned against the old schema is reused.
+        session.close()
+        engine.dispose()
+        session = sessionmaker(bind=engine)()
+        measure(session, "teams.any() EXISTS, single-column indexes only", legacy_query(user_id, team_ids), args.page_size)
+        measure(session, "semi-join, single-column indexes only", semi_join_query(session, user_id, team_ids), args.page_size)
+
+        # With both OR branches indexable the outer scan of account goes away as well.
+        session.execute(text(f"CREATE INDEX {INDEX_NAME} ON entity_team (entity_type, team_id, entity_id)"))
+        session.execute(text("CREATE INDEX bench_account_assigned_user ON account (assignedUserId)"))
+        session.commit()
+        session.close()
+        engine.dispose()
+        session = sessionmaker(bind=engine)()
+        measure(session, "semi-join, composite index + assignedUserId index", semi_join_query(session, user_id, team_ids), args.page_size)
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
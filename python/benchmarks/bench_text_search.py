@@ -0,0 +1,100 @@
+"""
+Compares `contains` (LIKE '%x%') with the full-text `textFilter` on Account quick search.
+
+Usage (from the python/ directory):
+    python -m benchmarks.bench_text_search --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+python_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if python_dir not in sys.path:
+    sys.path.append(python_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models import user, acl_entities, standard_entities
+from app.models.standard_entities import Account
+from app.services.record_service import RecordService
+
+SYLLABLES = ["ac", "me", "he", "al", "th", "cl", "in", "ic", "ca", "re", "med", "par", "tn", "ers", "gro", "up",
+             "la", "bs", "ph", "ar", "ma", "den", "tal", "nor", "val", "ley", "ri", "ver", "ci", "ty"]
+
+
+def vocabulary(rnd, size: int):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choices(SYLLABLES, k=3)))
+    return sorted(words)
+
+
+def populate(session, rows: int, words):
+    rnd = random.Random(42)
+    batch = []
+    for i in range(rows):
+        name = " ".join(rnd.sample(words, 2)).title() + f" {i}"
+        batch.append({
+            "id": f"{i:024d}",
+            "name": name,
+            "emailAddress": f"info{i}@{rnd.choice(words)}.com",
+            "description": " ".join(rnd.choices(words, k=8)),
+            "deleted": False,
+        })
+        if len(batch) == 20000:
+            session.execute(Account.__table__.insert(), batch)
+            batch = []
+    if batch:
+        session.execute(Account.__table__.insert(), batch)
+    session.commit()
+
+
+def time_call(fn, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        words = vocabulary(random.Random(7), 20000)
+        start = time.perf_counter()
+        populate(session, args.rows, words)
+        print(f"rows={args.rows} populated (with FTS triggers) in {time.perf_counter() - start:.1f}s")
+
+        service = RecordService(session)
+        print(f"{'query':>22} {'contains ms':>12} {'textFilter ms':>14}")
+        # Single terms match a few hundred rows each, like a company name would.
+        for query in [words[100], words[5000], f"{words[200][:5]}", f"{words[300]} {words[301]}", "123456"]:
+            base = {"maxSize": args.page_size, "totalMode": "none"}
+            like_where = [{"type": "or", "value": [
+                {"type": "contains", "attribute": field, "value": query}
+                for field in ("name", "emailAddress", "description")
+            ]}]
+            text_where = [{"type": "textFilter", "value": query}]
+            like_ms = time_call(lambda: service.find("Account", dict(base, where=like_where)))
+            text_ms = time_call(lambda: service.find("Account", dict(base, where=text_where)))
+            print(f"{query:>22} {like_ms:>12.2f} {text_ms:>14.2f}")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -182,6 +182,43 @@ def test_record_service_acl(db):
     assert len(result["list"]) == 1
     assert result["list"][0]["id"] == data["id"]
 
+def test_find_team_scope(db):
+    from app.models.acl_entities import entity_team
+
+    role = Role(id="r1", name="Team Role", data={"Account": {"read": "team"}})
+    team1 = Team(id="t1", name="Team 1")
+    team2 = Team(id="t2", name="Team 2")
+    user = User(id="u1", user_name="user1")
+    user.roles.append(role)
+    user.teams.append(team1)
+    loner = User(id="u2", user_name="user2")
+    loner.roles.append(role)
+    db.add_all([role, team1, team2, user, loner])
+    db.add_all([
+        Account(id="a1", name="Owned", assigned_user_id="u1"),
+        Account(id="a2", name="Team 1", assigned_user_id="u3"),
+        Account(id="a3", name="Team 2", assigned_user_id="u3"),
+        Account(id="a4", name="Both teams"),
+        Account(id="a5", name="Team 1 contact id"),
+    ])
+    db.commit()
+    db.execute(entity_team.insert(), [
+        {"entity_id": "a2", "entity_type": "Account", "team_id": "t1"},
+        {"entity_id": "a3", "entity_type": "Account", "team_id": "t2"},
+        {"entity_id": "a4", "entity_type": "Account", "team_id": "t1"},
+        {"entity_id": "a4", "entity_type": "Account", "team_id": "t2"},
+        # Same id, other entity type: must not grant access to the account
+        {"entity_id": "a5", "entity_type": "Contact", "team_id": "t1"},
+    ])
+    db.commit()
+
+    result = RecordService(db, user).find("Account", {"sortBy": "id", "asc": True})
+    assert [r["id"] for r in result["list"]] == ["a1", "a2", "a4"]
+    assert result["total"] == 3
+
+    # No teams: only what the user owns, which is nothing here
+    assert RecordService(db, loner).find("Account", {})["list"] == []
+
 def test_acl_fail_closed(db):
     """
     Test that if access level is 'own' or 'team' but the entity doesn't support it
@@ -210,3 +247,266 @@ def test_acl_fail_closed(db):
 
     result = service.find("Role", {})
     assert len(result["list"]) == 0
+
+def test_permission_table_compiled_and_invalidated(db):
+    role_own = Role(id="r1", name="Own Role", data={"Account": {"read": "own"}, "Contact": {"read": "all"}})
+    role_team = Role(id="r2", name="Team Role", data={"Account": {"read": "team", "create": "yes"}})
+    team = Team(id="t1", name="Team 1")
+    user1 = User(id="u1", user_name="user1")
+    user2 = User(id="u2", user_name="user2")
+    user1.roles.append(role_own)
+    user2.roles.append(role_own)
+    user1.teams.append(team)
+    db.add_all([role_own, role_team, team, user1, user2])
+    db.commit()
+
+    acl_service.clear_permission_tables()
+    for _ in range(3):
+        assert acl_service.get_permission_level(user1, "Account", "read") == "own"
+        assert acl_service.get_permission_level(user2, "Contact", "read") == "all"
+        assert acl_service.get_permission_level(user2, "Contact", "edit") == "no"
+    # Same roles at the same revisions: one table for both users
+    assert acl_service.builds == 1
+
+    # Team role
+    team.roles.append(role_team)
+    db.commit()
+    assert acl_service.get_permission_level(user1, "Account", "read") == "team"
+    assert acl_service.check(user1, "Account", "create") is True
+    assert acl_service.get_permission_level(user2, "Account", "read") == "own"
+
+    # Role data
+    role_own.data = {"Account": {"read": "all"}}
+    db.commit()
+    assert acl_service.get_permission_level(user2, "Account", "read") == "all"
+    assert acl_service.get_permission_level(user2, "Contact", "read") == "no"
+
+    # Membership written with a bulk statement
+    admin = User(id="admin", user_name="admin", is_admin=True)
+    db.add(admin)
+    db.commit()
+    RecordService(db, admin).link_many("User", "u2", "roles", ["r2"])
+    assert acl_service.check(user2, "Account", "create") is True
+    builds = acl_service.builds
+    acl_service.get_permission_level(user2, "Account", "read")
+    assert acl_service.builds == builds
+
+def test_check_scope_many(db):
+    from sqlalchemy import event
+    from app.models.acl_entities import entity_team
+    from app.models.standard_entities import Contact
+
+    role = Role(id="r1", name="Team Role", data={"Account": {"read": "team", "edit": "own"}, "Contact": {"read": "all"}})
+    team1 = Team(id="t1", name="Team 1")
+    team2 = Team(id="t2", name="Team 2")
+    user = User(id="u1", user_name="user1")
+    user.roles.append(role)
+    user.teams.append(team1)
+    db.add_all([role, team1, team2, user])
+    db.add_all([Account(id=f"a{i}", name=f"Account {i}", assigned_user_id="u1" if i < 2 else "u2") for i in range(6)])
+    db.commit()
+    db.execute(entity_team.insert(), [
+        {"entity_id": "a2", "entity_type": "Account", "team_id": "t1"},
+        {"entity_id": "a3", "entity_type": "Account", "team_id": "t2"},
+        {"entity_id": "a4", "entity_type": "Contact", "team_id": "t1"},
+    ])
+    db.commit()
+
+    # Principal loaded up front, as get_current_user does
+    acl_service.get_permission_level(user, "Account", "read")
+    [team.id for team in user.teams]
+    statements = []
+    record = lambda *args: statements.append(args[2])
+    ids = ["a0", "a1", "a2", "a3", "a4", "a5", "missing"]
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        decisions = acl_service.check_scope_many(user, "Account", ids, "read", db)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+    assert decisions == {"a0": True, "a1": True, "a2": True, "a3": False, "a4": False, "a5": False, "missing": False}
+    assert len(statements) == 2
+
+    accounts = db.query(Account).filter(Account.id.in_(ids)).all()
+    decisions = acl_service.check_scope_many(user, "Account", accounts, "read")
+    assert decisions == {account.id: acl_service.check_scope(user, account, "read") for account in accounts}
+    assert acl_service.check_scope_many(user, "Account", ids, "edit", db)["a2"] is False
+    assert acl_service.check_scope_many(user, "Contact", ["c1", "c2"], "read") == {"c1": True, "c2": True}
+    assert acl_service.check_scope_many(user, "Role", ["r1"], "read") == {"r1": False}
+
+    db.add(Contact(id="c1", last_name="One", assigned_user_id="u2"))
+    db.commit()
+    service = RecordService(db, user)
+    with pytest.raises(PermissionError):
+        # Not the owner of a2
+        service.link_many("Account", "a2", "contactsPrimary", ["c1"])
+    service.link_many("Account", "a0", "teams", ["t1"])
+
+def test_principal_cache(db):
+    import asyncio
+    import datetime
+    from fastapi import HTTPException
+    from sqlalchemy import event
+    from app.core.deps import get_current_user
+    from app.core.principal_cache import Principal, principal_cache
+    from app.core.security import create_access_token
+
+    role = Role(id="r1", name="Own Role", data={"Account": {"read": "own"}})
+    team = Team(id="t1", name="Team 1")
+    user = User(id="u1", user_name="user1", first_name="Ada")
+    user.roles.append(role)
+    user.teams.append(team)
+    db.add_all([role, team, user])
+    db.commit()
+    principal_cache.clear()
+
+    token = create_access_token({"sub": "u1"})
+    statements = []
+    record = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        principal = asyncio.run(get_current_user(db, token))
+        assert isinstance(principal, Principal)
+        assert (principal.id, principal.name, principal.team_ids) == ("u1", "Ada", ["t1"])
+        assert acl_service.get_permission_level(principal, "Account", "read") == "own"
+        loaded = len(statements)
+        assert asyncio.run(get_current_user(db, token)) is principal
+        assert len(statements) == loaded
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    # Role data change
+    RecordService(db).update("Role", "r1", {"data": {"Account": {"read": "all"}}})
+    principal = asyncio.run(get_current_user(db, token))
+    assert acl_service.get_permission_level(principal, "Account", "read") == "all"
+
+    # User change through the ORM
+    user = db.get(User, "u1")
+    user.teams.clear()
+    db.commit()
+    assert asyncio.run(get_current_user(db, token)).team_ids == []
+    assert principal_cache.stats()["invalidations"] == 2
+
+    # Expired tokens are neither served from the cache nor accepted
+    expired = create_access_token({"sub": "u1"}, datetime.timedelta(seconds=-1))
+    with pytest.raises(HTTPException):
+        asyncio.run(get_current_user(db, expired))
+
+def test_principal_in_flight_during_revoke_does_not_restore_access(db):
+    from app.core.principal_cache import Principal
+
+    role = Role(id="r1", name="Role", data={"Account": {"read": "all"}})
+    user1 = User(id="u1", user_name="user1")
+    user2 = User(id="u2", user_name="user2")
+    user1.roles.append(role)
+    user2.roles.append(role)
+    db.add_all([role, user1, user2])
+    db.commit()
+    acl_service.clear_permission_tables()
+
+    # Held by a request still running while the role is revoked
+    principal = Principal(acl_service.load_user(db, "u1"))
+    RecordService(db).update("Role", "r1", {"data": {"Account": {"read": "no"}}})
+    assert acl_service.get_permission_level(principal, "Account", "read") == "all"
+
+    db.expire_all()
+    assert acl_service.get_permission_level(acl_service.load_user(db, "u2"), "Account", "read") == "no"
+    assert acl_service.get_permission_level(Principal(acl_service.load_user(db, "u1")), "Account", "read") == "no"
+
+def test_user_loaded_before_revoke_does_not_restore_access(db):
+    from sqlalchemy.orm import sessionmaker
+
+    role = Role(id="r1", name="Role", data={"Account": {"read": "all"}})
+    user1 = User(id="u1", user_name="user1")
+    user2 = User(id="u2", user_name="user2")
+    user1.roles.append(role)
+    user2.roles.append(role)
+    db.add_all([role, user1, user2])
+    db.commit()
+
+    # A concurrent request's session loaded u1 and its role before the edit
+    other = sessionmaker(bind=db.get_bind())()
+    stale = acl_service.load_user(other, "u1")
+    RecordService(db).update("Role", "r1", {"data": {"Account": {"read": "no"}}})
+    acl_service.get_permission_level(stale, "Account", "read")
+    other.close()
+
+    db.expire_all()
+    assert acl_service.get_permission_level(acl_service.load_user(db, "u2"), "Account", "read") == "no"
+
+def test_link_attribute_filters_respect_related_acl(db):
+    from app.models.standard_entities import Contact, account_contact
+
+    role = Role(id="r1", name="Role", data={"Contact": {"read": "all"}, "Account": {"read": "own"}})
+    user = User(id="u1", user_name="user1", password="$2b$12$secret")
+    user.roles.append(role)
+    db.add_all([
+        role, user,
+        Account(id="a1", name="Mine", industry="Health", assigned_user_id="u1"),
+        Account(id="a2", name="Theirs", industry="Finance", assigned_user_id="u2"),
+        Contact(id="c1", last_name="One", account_id="a1", assigned_user_id="u1"),
+        Contact(id="c2", last_name="Two", account_id="a2", assigned_user_id="u1"),
+    ])
+    db.commit()
+    service = RecordService(db, user)
+
+    def ids(where):
+        return sorted(r["id"] for r in service.find("Contact", {"where": where})["list"])
+
+    for where in (
+        [{"type": "startsWith", "attribute": "assignedUser.password", "value": "$2b$12$s"}],
+        [{"type": "or", "value": [{"type": "isNotNull", "attribute": "assignedUser.password"}]}],
+        [{"type": "startsWith", "attribute": "password", "value": "$"}],
+    ):
+        with pytest.raises(ValueError):
+            service.find("Contact", {"where": where})
+    with pytest.raises(ValueError):
+        RecordService(db).find("User", {"where": [{"type": "startsWith", "attribute": "password", "value": "$"}]})
+
+    # Fields of accounts the user can't read don't match
+    assert ids([{"type": "equals", "attribute": "account.industry", "value": "Health"}]) == ["c1"]
+    assert ids([{"type": "equals", "attribute": "account.industry", "value": "Finance"}]) == []
+    assert ids([{"type": "isNotNull", "attribute": "account.industry"}]) == ["c1"]
+    assert sorted(r["id"] for r in RecordService(db).find("Contact", {"where": [
+        {"type": "equals", "attribute": "account.industry", "value": "Finance"}
+    ]})["list"]) == ["c2"]
+
+    # linkedWith can't probe links to accounts the user can't read either
+    db.execute(account_contact.insert(), [
+        {"account_id": "a1", "contact_id": "c1"},
+        {"account_id": "a2", "contact_id": "c2"},
+    ])
+    db.commit()
+    for link in ("account", "accounts"):
+        assert ids([{"type": "linkedWith", "attribute": link, "value": ["a1", "a2"]}]) == ["c1"]
+        assert ids([{"type": "linkedWith", "attribute": link, "value": "a2"}]) == []
+        assert ids([{"type": "notLinkedWith", "attribute": link, "value": ["a2"]}]) == ["c1", "c2"]
+    assert sorted(r["id"] for r in RecordService(db).find("Contact", {"where": [
+        {"type": "linkedWith", "attribute": "accounts", "value": ["a2"]}
+    ]})["list"]) == ["c2"]
+
+    # No read access at all
+    with pytest.raises(PermissionError):
+        service.find("Contact", {"where": [{"type": "equals", "attribute": "assignedUser.userName", "value": "user1"}]})
+    with pytest.raises(PermissionError):
+        service.find("Contact", {"where": [{"type": "linkedWith", "attribute": "assignedUser", "value": ["u1"]}]})
+
+def test_acl_links_require_admin(db):
+    role = Role(id="r1", name="Role", data={"User": {"read": "all", "edit": "all"}, "Role": {"read": "all"}})
+    user = User(id="u1", user_name="user1")
+    user.roles.append(role)
+    admin = User(id="admin", user_name="admin", is_admin=True)
+    db.add_all([role, user, admin, Role(id="r2", name="Admin Role", data={"Account": {"read": "all"}}), Team(id="t1", name="Team")])
+    db.commit()
+
+    for service in (RecordService(db), RecordService(db, user)):
+        with pytest.raises(PermissionError):
+            service.link_many("User", "u1", "roles", ["r2"])
+        with pytest.raises(PermissionError):
+            service.link("User", "u1", "teams", "t1")
+        with pytest.raises(PermissionError):
+            service.link_many("Team", "t1", "roles", ["r2"])
+        with pytest.raises(PermissionError):
+            service.unlink("User", "u1", "roles", "r1")
+
+    assert RecordService(db, admin).link_many("User", "u1", "roles", ["r2"]) == 1
+    assert RecordService(db, admin).unlink_many("User", "u1", "roles", ["r2"]) == 1
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.invalidation_bus import invalidation_bus
+from app.core.record_cache import record_cache
+from app.models.user import User
+from app.models.acl_entities import Role
+from app.models.standard_entities import Account
+from app.services.acl_service import acl_service
+from app.services.record_service import RecordService
+
+# Several processes share one database file, like uvicorn workers.
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "bus.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+@pytest.fixture
+def db(db_path):
+    record_cache.clear()
+    engine = create_engine(f"sqlite:///{db_path}")
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    invalidation_bus.start(session)
+    yield session
+    session.close()
+    engine.dispose()
+
+def _worker(db_path, namespace, ready, results):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.invalidation_bus import invalidation_bus
+    import time
+
+    received = []
+    invalidation_bus.subscribe(namespace, received.append)
+    session = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+    invalidation_bus.start(session)
+    session.close()
+    ready.put(os.getpid())
+
+    deadline = time.monotonic() + 30
+    while not received and time.monotonic() < deadline:
+        session = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+        invalidation_bus.poll(session)
+        session.close()
+        time.sleep(0.05)
+    results.put(received)
+
+def _update_records(db_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.services.record_service import RecordService
+
+    session = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+    RecordService(session).update("Account", "a1", {"name": "After"})
+    RecordService(session).update("Role", "r1", {"data": {"Account": {"read": "all"}}})
+    session.close()
+
+def test_workers_receive_published_keys(db, db_path):
+    context = multiprocessing.get_context("spawn")
+    ready, results = context.Queue(), context.Queue()
+    workers = [context.Process(target=_worker, args=(db_path, "test", ready, results)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get(timeout=60)
+
+    local = []
+    invalidation_bus.subscribe("test", local.append)
+    invalidation_bus.publish(db, "test", ["b", "a", "a"])
+    # Nothing before commit, and nothing at all on rollback
+    assert local == []
+    db.rollback()
+    invalidation_bus.publish(db, "test", ["b", "a"])
+    db.commit()
+    assert local == [["a", "b"]]
+    # This process's own rows are not dispatched twice
+    invalidation_bus.poll(db)
+    assert local == [["a", "b"]]
+
+    received = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+    assert received == [[["a", "b"]], [["a", "b"]]]
+
+def test_record_and_acl_caches_follow_other_workers(db, db_path):
+    role = Role(id="r1", name="Role", data={"Account": {"read": "own"}})
+    user = User(id="u1", user_name="user1")
+    user.roles.append(role)
+    db.add_all([role, user, Account(id="a1", name="Before", assigned_user_id="u1")])
+    db.commit()
+    invalidation_bus.poll(db)
+
+    assert RecordService(db).read("Account", "a1")["name"] == "Before"
+    assert acl_service.get_permission_level(user, "Account", "read") == "own"
+
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=_update_records, args=(db_path,))
+    process.start()
+    process.join(timeout=60)
+    assert process.exitcode == 0
+
+    db.expire_all()
+    # Stale until polled
+    assert RecordService(db).read("Account", "a1")["name"] == "Before"
+    assert acl_service.get_permission_level(user, "Account", "read") == "own"
+    assert invalidation_bus.poll(db) >= 2
+    assert RecordService(db).read("Account", "a1")["name"] == "After"
+    assert acl_service.get_permission_level(user, "Account", "read") == "all"
+
+def test_poll_reads_new_rows_and_late_commits_only(db):
+    from app.models.cache_invalidation import CacheInvalidation
+
+    received = []
+    invalidation_bus.subscribe("gaps", received.append)
+    start = invalidation_bus.stats()["lastId"]
+
+    def write(id, key):
+        db.add(CacheInvalidation(id=id, namespace="gaps", key=key, origin="other:1"))
+        db.commit()
+
+    # id start + 2 is still in an open transaction of another writer
+    write(start + 1, "a")
+    write(start + 3, "c")
+    assert invalidation_bus.poll(db) == 2
+    assert received == [["a", "c"]]
+    # Nothing new: nothing is read again
+    assert invalidation_bus.poll(db) == 0
+
+    write(start + 2, "b")
+    assert invalidation_bus.poll(db) == 1
+    assert received == [["a", "c"], ["b"]]
+    assert invalidation_bus.poll(db) == 0
+    assert invalidation_bus.stats()["gaps"] == 0
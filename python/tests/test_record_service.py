@@ -0,0 +1,695 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.user import User
+from app.models.standard_entities import Account, Contact
+from app.core.record_cache import record_cache
+from app.services.record_service import RecordService
+
+# Setup in-memory DB
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db():
+    # Ids repeat across tests; don't serve records cached by an earlier one
+    record_cache.clear()
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def _add_accounts(db, count):
+    industries = ["Health", "Finance", None, "Retail"]
+    db.add_all([
+        Account(id=f"a{i:03d}", name=f"Account {i % 7}", industry=industries[i % 4])
+        for i in range(count)
+    ])
+    db.commit()
+
+def _walk_cursor(service, params):
+    ids = []
+    result = service.find("Account", dict(params))
+    ids.extend(r["id"] for r in result["list"])
+    while result["nextCursor"]:
+        result = service.find("Account", dict(params, after=result["nextCursor"]))
+        ids.extend(r["id"] for r in result["list"])
+    return ids
+
+@pytest.mark.parametrize("sort_by,asc", [(None, False), ("name", True), ("name", False), ("industry", True), ("industry", False)])
+def test_find_cursor_matches_offset(db, sort_by, asc):
+    _add_accounts(db, 23)
+    service = RecordService(db)
+
+    params = {"maxSize": 5, "asc": asc}
+    if sort_by:
+        params["sortBy"] = sort_by
+
+    offset_ids = []
+    for offset in range(0, 25, 5):
+        offset_ids.extend(r["id"] for r in service.find("Account", dict(params, offset=offset))["list"])
+
+    assert _walk_cursor(service, params) == offset_ids
+    assert len(set(offset_ids)) == 23
+
+def test_find_cursor_rejects_mismatched_sort(db):
+    _add_accounts(db, 10)
+    service = RecordService(db)
+
+    result = service.find("Account", {"sortBy": "name", "maxSize": 5})
+    with pytest.raises(ValueError):
+        service.find("Account", {"sortBy": "industry", "maxSize": 5, "after": result["nextCursor"]})
+    with pytest.raises(ValueError):
+        service.find("Account", {"maxSize": 5, "after": "not-a-cursor"})
+
+def test_find_total_modes(db):
+    _add_accounts(db, 12)
+    service = RecordService(db)
+
+    exact = service.find("Account", {"maxSize": 5})
+    assert exact["total"] == 12
+    assert exact["hasMore"] is True
+
+    none = service.find("Account", {"maxSize": 5, "totalMode": "none"})
+    assert none["total"] is None
+    assert [r["id"] for r in none["list"]] == [r["id"] for r in exact["list"]]
+
+    has_more = service.find("Account", {"maxSize": 5, "totalMode": "hasMore"})
+    assert has_more["total"] is None
+    assert has_more["hasMore"] is True
+    assert len(has_more["list"]) == 5
+
+    last_page = service.find("Account", {"maxSize": 5, "offset": 10, "totalMode": "hasMore"})
+    assert last_page["hasMore"] is False
+    assert last_page["total"] == 12
+    assert last_page["nextCursor"] is None
+
+    where = [{"type": "equals", "attribute": "industry", "value": "Health"}]
+    assert service.find("Account", {"where": where, "totalMode": "estimate"})["total"] == 3
+
+    with pytest.raises(ValueError):
+        service.find("Account", {"totalMode": "bogus"})
+
+def test_model_registry_maps_api_names():
+    from app.core.model_registry import model_registry
+
+    info = model_registry.get(Contact)
+    assert info.get_column("emailAddress") is info.get_column("email_address")
+    assert info.get_attribute_key("accountId") == "account_id"
+    assert info.get_relationship("contactsPrimary") is None
+    assert model_registry.get(Account).get_relationship("contactsPrimary").key == "contacts_primary"
+    assert ("assigned_user_id", "assignedUserId") in info.fields
+
+def test_create_and_read_use_api_names(db):
+    service = RecordService(db)
+
+    created = service.create("Contact", {"firstName": "Ada", "last_name": "Lovelace", "accountId": None})
+    data = service.read("Contact", created["id"])
+    assert data["firstName"] == "Ada"
+    assert data["lastName"] == "Lovelace"
+
+    account = service.create("Account", {"name": "Analytical Engines"})
+    service.update("Contact", created["id"], {"accountId": account["id"]})
+    linked = service.find_linked("Account", account["id"], "contactsPrimary")["list"]
+    assert [r["id"] for r in linked] == [created["id"]]
+
+def test_where_clause_cache_reuses_shape(db):
+    from app.core.select_manager import where_clause_cache
+
+    _add_accounts(db, 12)
+    service = RecordService(db)
+    where_clause_cache.clear()
+
+    def find(industry, name_part):
+        where = [
+            {"type": "or", "value": [
+                {"type": "equals", "attribute": "industry", "value": industry},
+                {"type": "isNull", "attribute": "industry"},
+            ]},
+            {"type": "contains", "attribute": "name", "value": name_part},
+            {"type": "in", "attribute": "id", "value": ["a001", "a002", "a005", "a006"]},
+            {"type": "in", "attribute": "id", "value": "not-a-list"},
+        ]
+        return sorted(r["id"] for r in service.find("Account", {"where": where})["list"])
+
+    assert find("Finance", "Account") == ["a001", "a002", "a005", "a006"]
+    assert find("Retail", "6") == ["a006"]
+    assert find("Health", "nt 1") == []
+
+    stats = where_clause_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] >= 2
+    assert stats["size"] == 1
+
+def test_text_filter_uses_full_text_index(db):
+    service = RecordService(db)
+    acme = service.create("Account", {"name": "Acme Health", "description": "Clinic network"})
+    service.create("Account", {"name": "Globex", "emailAddress": "info@acme-partners.com"})
+    service.create("Account", {"name": "Initech", "description": "Healthcare software, health analytics"})
+
+    def search(query, **params):
+        where = [{"type": "textFilter", "value": query}]
+        return [r["name"] for r in service.find("Account", dict(params, where=where))["list"]]
+
+    assert sorted(search("acme")) == ["Acme Health", "Globex"]
+    assert search("clinic") == ["Acme Health"]
+    # Prefix matching, ranked by relevance.
+    assert search("heal") == ["Initech", "Acme Health"]
+    assert search("heal", sortBy="name", asc=True) == ["Acme Health", "Initech"]
+    # FTS syntax in user input is neutralised.
+    assert search('acme" OR *') == []
+    # Input without any terms is rejected rather than silently dropped.
+    with pytest.raises(ValueError, match="no search terms"):
+        search("!!!")
+    with pytest.raises(ValueError, match="Text search is not available"):
+        service.find("Role", {"where": [{"type": "textFilter", "value": "acme"}]})
+
+    service.update("Account", acme["id"], {"name": "Umbrella", "description": "Pharma"})
+    assert search("clinic") == []
+    assert search("umbrella") == ["Umbrella"]
+
+    contact = service.create("Contact", {"firstName": "Grace", "lastName": "Hopper"})
+    result = service.find("Contact", {"where": [{"type": "textFilter", "value": "hop"}]})
+    assert [r["id"] for r in result["list"]] == [contact["id"]]
+    assert result["nextCursor"] is None
+
+def test_text_filter_survives_rowid_renumbering(db):
+    from sqlalchemy import text
+
+    service = RecordService(db)
+    ids = [service.create("Account", {"name": name})["id"] for name in ("Alpha", "Beta", "Gamma", "Delta")]
+    db.query(Account).filter(Account.id.in_(ids[:2])).delete(synchronize_session=False)
+    # What VACUUM or a table rebuild may do to the implicit rowids of string-keyed tables
+    db.execute(text("UPDATE account SET rowid = rowid - 2"))
+    db.commit()
+
+    def search(query):
+        return [r["id"] for r in service.find("Account", {"where": [{"type": "textFilter", "value": query}]})["list"]]
+
+    assert search("gamma") == [ids[2]]
+    assert search("delta") == [ids[3]]
+    assert search("alpha") == []
+
+def test_relationship_filters(db):
+    from app.models.standard_entities import account_contact
+    from app.models.acl_entities import entity_team
+
+    db.add_all([
+        Account(id="acc1", name="Mercy", industry="Healthcare"),
+        Account(id="acc2", name="Bank", industry="Finance"),
+        Contact(id="c1", last_name="One", account_id="acc1"),
+        Contact(id="c2", last_name="Two", account_id="acc2"),
+        Contact(id="c3", last_name="Three"),
+    ])
+    db.commit()
+    db.execute(account_contact.insert(), [
+        {"account_id": "acc2", "contact_id": "c1"},
+        {"account_id": "acc2", "contact_id": "c3"},
+    ])
+    db.execute(entity_team.insert().values(entity_id="acc1", entity_type="Account", team_id="t1"))
+    db.commit()
+    service = RecordService(db)
+
+    def ids(entity_name, where):
+        return sorted(r["id"] for r in service.find(entity_name, {"where": where})["list"])
+
+    # belongsTo attribute path
+    assert ids("Contact", [{"type": "equals", "attribute": "account.industry", "value": "Healthcare"}]) == ["c1"]
+    # many-to-many attribute path
+    assert ids("Contact", [{"type": "equals", "attribute": "accounts.name", "value": "Bank"}]) == ["c1", "c3"]
+    # hasMany attribute path
+    assert ids("Account", [{"type": "startsWith", "attribute": "contactsPrimary.lastName", "value": "T"}]) == ["acc2"]
+
+    assert ids("Account", [{"type": "linkedWith", "attribute": "contacts", "value": ["c3"]}]) == ["acc2"]
+    assert ids("Account", [{"type": "notLinkedWith", "attribute": "contacts", "value": "c1"}]) == ["acc1"]
+    assert ids("Contact", [{"type": "linkedWith", "attribute": "account", "value": "acc1"}]) == ["c1"]
+    assert ids("Contact", [{"type": "notLinkedWith", "attribute": "account", "value": "acc1"}]) == ["c2", "c3"]
+    assert ids("Account", [{"type": "linkedWith", "attribute": "contactsPrimary", "value": ["c2", "c3"]}]) == ["acc2"]
+    assert ids("Account", [{"type": "linkedWith", "attribute": "teams", "value": ["t1"]}]) == ["acc1"]
+
+def test_aggregate_group_by(db):
+    _add_accounts(db, 12)
+    service = RecordService(db)
+
+    result = service.aggregate("Account", {"groupBy": ["industry"]})
+    counts = {row["industry"]: row["count"] for row in result["list"]}
+    assert counts == {"Health": 3, "Finance": 3, None: 3, "Retail": 3}
+
+    where = [{"type": "in", "attribute": "industry", "value": ["Health", "Finance"]}]
+    result = service.aggregate("Account", {"groupBy": ["industry", "name"], "where": where})
+    assert sum(row["count"] for row in result["list"]) == 6
+    assert set(result["list"][0]) == {"industry", "name", "count"}
+
+    assert service.aggregate("Account", {})["list"] == [{"count": 12}]
+    assert service.aggregate("Account", {"fn": "max", "attribute": "name"})["list"] == [{"max": "Account 6"}]
+
+    with pytest.raises(ValueError):
+        service.aggregate("Account", {"groupBy": ["nope"]})
+    with pytest.raises(ValueError):
+        service.aggregate("Account", {"fn": "sum"})
+
+def test_select_projection(db):
+    from sqlalchemy import event
+
+    db.add(Account(id="a1", name="Mercy", industry="Healthcare", description="x" * 1000, assigned_user_id="u1"))
+    db.commit()
+    db.expunge_all()
+    service = RecordService(db)
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = service.find("Account", {"select": ["name", "assignedUserId", "bogus"], "sortBy": "industry", "totalMode": "none"})
+        read = service.read("Account", "a1", select=["industry"])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert result["list"] == [{"id": "a1", "name": "Mercy", "assignedUserId": "u1"}]
+    assert read == {"id": "a1", "industry": "Healthcare"}
+    assert all("description" not in statement for statement in statements)
+    # A projected miss doesn't fill the record cache with the full row; a full read does and serves later projections
+    assert record_cache.get("Account", "a1") is None
+    service.read("Account", "a1")
+    assert service.read("Account", "a1", select=["description"]) == {"id": "a1", "description": "x" * 1000}
+
+def test_index_advisor_proposes_from_workload(db):
+    from sqlalchemy import inspect as sa_inspect
+    from app.core.index_advisor import index_advisor, query_pattern_recorder
+
+    _add_accounts(db, 5)
+    service = RecordService(db)
+    query_pattern_recorder.clear()
+
+    where = [{"type": "equals", "attribute": "industry", "value": "Health"}]
+    for _ in range(3):
+        service.find("Account", {"where": where, "sortBy": "name"})
+    service.find("Account", {"where": [{"type": "equals", "attribute": "industry", "value": "Retail"}]})
+    # OR branches and LIKE '%x%' can't use a composite index.
+    service.find("Account", {"where": [{"type": "or", "value": where}, {"type": "contains", "attribute": "name", "value": "x"}]})
+    # Served by the primary key already.
+    service.find("Account", {"where": [{"type": "in", "attribute": "id", "value": ["a001"]}]})
+    query_pattern_recorder.flush(db)
+
+    patterns = index_advisor.get_patterns(db)
+    assert {(tuple(p["equalityColumns"]), p["sortColumn"]): p["hits"] for p in patterns} == {
+        (("industry",), "name"): 3,
+        (("industry",), None): 1,
+        ((), None): 1,
+        (("id",), None): 1,
+    }
+
+    proposals = index_advisor.propose(db)
+    assert [(p["table"], p["columns"], p["hits"]) for p in proposals] == [("account", ["industry", "name"], 4)]
+
+    assert index_advisor.create(db, proposals) == ["IDX_ACCOUNT_INDUSTRY_NAME"]
+    indexes = [i["column_names"] for i in sa_inspect(engine).get_indexes("account")]
+    assert ["industry", "name"] in indexes
+    assert index_advisor.propose(db) == []
+
+def test_query_pattern_flush_merges_concurrent_writers(db, monkeypatch):
+    from app.core.index_advisor import index_advisor, query_pattern_recorder
+
+    query_pattern_recorder.clear()
+    query_pattern_recorder.record("account", ["industry"], [], "name", 2.0)
+    query_pattern_recorder.flush(db)
+
+    # Another worker's flush: the row already exists by the time this one inserts it
+    query_pattern_recorder.record("account", ["industry"], [], "name", 5.0)
+    with monkeypatch.context() as m:
+        m.setattr(db, "get", lambda *args, **kwargs: None)
+        query_pattern_recorder.flush(db)
+
+    # A failed flush keeps its counts for the next one
+    query_pattern_recorder.record("account", ["industry"], [], "name", 1.0)
+    with monkeypatch.context() as m:
+        m.setattr(db, "commit", lambda: (_ for _ in ()).throw(RuntimeError("database is locked")))
+        with pytest.raises(RuntimeError):
+            query_pattern_recorder.flush(db)
+    query_pattern_recorder.flush(db)
+
+    [pattern] = index_advisor.get_patterns(db)
+    assert (pattern["hits"], pattern["totalMs"], pattern["maxMs"]) == (3, 8.0, 5.0)
+
+def test_mass_update_and_delete(db, monkeypatch):
+    from app.core.config import settings
+    from app.models.acl_entities import Role, Team, entity_team
+
+    monkeypatch.setattr(settings, "massActionChunkSize", 4)
+    role = Role(id="r1", name="Team Role", data={"Account": {"read": "team", "edit": "team", "delete": "own"}})
+    team = Team(id="t1", name="Team 1")
+    user = User(id="u1", user_name="user1")
+    user.roles.append(role)
+    user.teams.append(team)
+    db.add_all([role, team, user])
+    _add_accounts(db, 10)
+    db.execute(entity_team.insert(), [
+        {"entity_id": f"a{i:03d}", "entity_type": "Account", "team_id": "t1"} for i in range(6)
+    ])
+    db.execute(Account.__table__.update().where(Account.id.in_(["a008", "a009"])).values(assignedUserId="u1"))
+    db.commit()
+    service = RecordService(db, user)
+
+    # Team scope: a000-a005 via team, a008-a009 as owner. a006/a007 are out of scope and untouched.
+    result = service.mass_update("Account", {
+        "where": [{"type": "isNotNull", "attribute": "name"}],
+        "data": {"industry": "Energy", "teamsIds": ["t1", "t2"]}
+    })
+    assert result == {"count": 8}
+    db.expire_all()
+    assert sorted(a.id for a in db.query(Account).filter(Account.industry == "Energy")) == \
+        [f"a{i:03d}" for i in (0, 1, 2, 3, 4, 5, 8, 9)]
+    assert db.query(entity_team).filter(entity_team.c.team_id == "t2").count() == 8
+
+    assert service.mass_update("Account", {"ids": ["a000", "a007"], "data": {"type": "Customer"}}) == {"count": 1}
+
+    # Delete is "own": only a008/a009, and already deleted records are not counted again.
+    assert service.mass_delete("Account", {"ids": [f"a{i:03d}" for i in range(10)]}) == {"count": 2}
+    assert service.mass_delete("Account", {"ids": ["a008"]}) == {"count": 0}
+    # Soft-deleted records are left alone by updates too
+    assert service.mass_update("Account", {"ids": ["a008", "a009"], "data": {"type": "Partner"}}) == {"count": 0}
+    assert service.mass_update("Account", {"where": [{"type": "equals", "attribute": "assignedUserId", "value": "u1"}], "data": {"type": "Partner"}}) == {"count": 0}
+    db.expire_all()
+    assert db.get(Account, "a008").type != "Partner"
+
+    with pytest.raises(ValueError):
+        service.mass_update("Account", {"ids": ["a000"], "data": {}})
+    with pytest.raises(ValueError):
+        service.mass_delete("Account", {"where": []})
+    with pytest.raises(ValueError):
+        service.mass_update("Account", {"ids": [], "data": {"type": "Partner"}})
+
+def test_link_many_and_unlink_many(db):
+    from app.models.standard_entities import account_contact
+    from app.models.acl_entities import Team
+
+    db.add_all([Account(id="acc1", name="Acme"), Team(id="t1", name="Team 1")])
+    db.add_all([Contact(id=f"c{i}", last_name=f"Contact {i}") for i in range(5)])
+    db.commit()
+    service = RecordService(db)
+
+    assert service.link_many("Account", "acc1", "contacts", ["c0", "c1", "c2"]) == 3
+    # Existing links are skipped
+    assert service.link_many("Account", "acc1", "contacts", ["c2", "c3"]) == 1
+    assert db.query(account_contact).count() == 4
+    with pytest.raises(ValueError):
+        service.link_many("Account", "acc1", "contacts", ["c4", "missing"])
+    assert db.query(account_contact).count() == 4
+
+    assert service.unlink_many("Account", "acc1", "contacts", ["c0", "c3", "c4"]) == 2
+    assert sorted(r["id"] for r in service.find_linked("Account", "acc1", "contacts")["list"]) == ["c1", "c2"]
+
+    # hasMany via foreign key, belongsTo, and the polymorphic entity_team association
+    assert service.link_many("Account", "acc1", "contactsPrimary", ["c3", "c4"]) == 2
+    assert service.unlink_many("Account", "acc1", "contactsPrimary", ["c4"]) == 1
+    assert [r["id"] for r in service.find_linked("Account", "acc1", "contactsPrimary")["list"]] == ["c3"]
+    service.link("Contact", "c0", "account", "acc1")
+    assert service.read("Contact", "c0")["accountId"] == "acc1"
+    service.link("Account", "acc1", "teams", "t1")
+    assert [r["id"] for r in service.find_linked("Account", "acc1", "teams")["list"]] == ["t1"]
+
+def test_find_linked_paginates_in_sql(db):
+    from app.models.standard_entities import account_contact
+
+    db.add_all([Account(id="acc1", name="Big"), Account(id="acc2", name="Small")])
+    db.add_all([Contact(id=f"c{i:02d}", last_name=f"Contact {i % 3}", account_id="acc1") for i in range(12)])
+    db.commit()
+    db.execute(account_contact.insert(), [{"account_id": "acc2", "contact_id": f"c{i:02d}"} for i in range(0, 12, 2)])
+    db.commit()
+    service = RecordService(db)
+
+    result = service.find_linked("Account", "acc1", "contactsPrimary", {"maxSize": 5, "sortBy": "lastName", "asc": True})
+    assert result["total"] == 12
+    assert len(result["list"]) == 5
+    assert result["hasMore"]
+    ids = [r["id"] for r in result["list"]]
+    while result["nextCursor"]:
+        result = service.find_linked("Account", "acc1", "contactsPrimary", {
+            "maxSize": 5, "sortBy": "lastName", "asc": True, "after": result["nextCursor"]
+        })
+        ids.extend(r["id"] for r in result["list"])
+    assert sorted(ids) == [f"c{i:02d}" for i in range(12)]
+
+    result = service.find_linked("Account", "acc2", "contacts", {
+        "where": [{"type": "equals", "attribute": "lastName", "value": "Contact 0"}],
+        "offset": 1, "maxSize": 10
+    })
+    # c00, c06 match; offset skips one
+    assert result["total"] == 2
+    assert [r["id"] for r in result["list"]] == ["c06"]
+    assert service.find_linked("Contact", "c03", "account")["list"][0]["id"] == "acc1"
+
+def test_compiled_serializer_and_record_response(monkeypatch):
+    import datetime
+    import decimal
+    import json
+    from app.core import responses
+    from app.core.model_registry import model_registry
+
+    info = model_registry.get(Account)
+    account = Account(id="a1", name="Acme", email_address="info@acme.test", assigned_user_id="u1")
+    data = info.get_serializer()(account)
+    assert list(data) == [column_name for key, column_name in info.fields]
+    assert data["emailAddress"] == "info@acme.test" and data["assignedUserId"] == "u1"
+    assert info.get_serializer(info.select_fields(["name"]))(account) == {"id": "a1", "name": "Acme"}
+    assert info.get_serializer() is info.get_serializer()
+
+    content = {"list": [data], "at": datetime.datetime(2024, 5, 1, 12, 30), "amount": decimal.Decimal("2.50")}
+    expected = {"list": [data], "at": "2024-05-01T12:30:00", "amount": 2.5}
+    assert json.loads(responses.RecordResponse(content).body) == expected
+    # stdlib fallback when orjson isn't installed
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.RecordResponse(content).body) == expected
+
+def test_export_streams_rows(db, monkeypatch):
+    import csv
+    import io
+    import json
+    from app.core.config import settings
+    from app.core.responses import iter_csv, iter_ndjson
+
+    monkeypatch.setattr(settings, "exportBatchSize", 3)
+    _add_accounts(db, 10)
+    service = RecordService(db)
+    params = {"where": [{"type": "equals", "attribute": "industry", "value": "Health"}], "select": ["name"], "asc": True}
+
+    names, rows = service.export("Account", params)
+    assert names == ["id", "name"]
+    lines = b"".join(iter_ndjson(names, rows)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": "a000", "name": "Account 0"}, {"id": "a004", "name": "Account 4"}, {"id": "a008", "name": "Account 1"}
+    ]
+
+    names, rows = service.export("Account", {"sortBy": "industry", "asc": True, "select": ["industry"]})
+    parsed = list(csv.reader(io.StringIO(b"".join(iter_csv(names, rows)).decode())))
+    assert parsed[0] == ["id", "industry"]
+    assert len(parsed) == 11
+    # NULLs first ascending, written as empty fields
+    assert parsed[1] == ["a002", ""]
+
+def test_import_rows_in_chunks_with_error_report(db):
+    from app.models.acl_entities import entity_team
+    from app.services.import_service import ImportService, read_csv, read_ndjson
+
+    db.add(Account(id="existing", name="Already there"))
+    db.commit()
+    lines = [
+        "name,industry,deleted,teamsIds\n",
+        "Acme,Finance,,t1;t2\n",
+        "Globex,,false,\n",
+        "Broken,Retail\n",
+        "Initech,Retail,maybe,\n",
+        "Umbrella,Health,1,t1\n",
+        f"{'x' * 300},Retail,,\n",
+    ]
+    errors = []
+    report = ImportService(db).import_rows("Account", read_csv(lines), chunk_size=2, on_error=errors.append)
+
+    assert report["count"] == 3
+    assert [e["row"] for e in report["errors"]] == [4, 5, 7]
+    assert errors == report["errors"]
+    accounts = {a.name: a for a in db.query(Account).filter(Account.id != "existing")}
+    assert sorted(accounts) == ["Acme", "Globex", "Umbrella"]
+    assert accounts["Acme"].deleted is False and accounts["Umbrella"].deleted is True
+    assert len({a.id for a in accounts.values()}) == 3
+    team_rows = db.query(entity_team).filter(entity_team.c.entity_type == "Account").all()
+    assert sorted((row.entity_id, row.team_id) for row in team_rows) == sorted([
+        (accounts["Acme"].id, "t1"), (accounts["Acme"].id, "t2"), (accounts["Umbrella"].id, "t1")
+    ])
+
+    # A conflicting id fails only its own row, the rest of the chunk is kept.
+    lines = [
+        '{"id": "n1", "name": "New 1", "teamsIds": ["t1"]}\n',
+        '{"id": "existing", "name": "Duplicate"}\n',
+        'not json\n',
+        '{"id": "n2", "name": "New 2"}\n',
+    ]
+    report = ImportService(db).import_rows("Account", read_ndjson(lines), chunk_size=10)
+    assert report["count"] == 2
+    assert [e["row"] for e in report["errors"]] == [3, 2]
+    assert db.get(Account, "existing").name == "Already there"
+    assert db.query(entity_team).filter(entity_team.c.entity_id == "n1").count() == 1
+
+def test_record_ids_are_time_ordered(monkeypatch):
+    import time
+    from app.core.config import settings
+    from app.services.record_service import generate_id, generate_ids
+
+    monkeypatch.setattr(settings, "recordIdScheme", "ordered")
+    first = generate_id()
+    time.sleep(0.002)
+    batch = generate_ids(500)
+    time.sleep(0.002)
+    last = generate_id()
+
+    assert all(len(record_id) == 24 and record_id == record_id.lower() for record_id in batch + [first, last])
+    assert batch == sorted(batch) and len(set(batch)) == 500
+    assert first < batch[0] and batch[-1] < last
+
+    monkeypatch.setattr(settings, "recordIdScheme", "random")
+    assert len(generate_ids(3)[0]) == 24
+
+def test_acl_checks_do_not_lazy_load(db, monkeypatch):
+    from sqlalchemy import event
+    from app.core.config import settings
+    from app.models.acl_entities import Role, Team, entity_team
+    from app.services.acl_service import acl_service
+
+    team_role = Role(id="r1", name="Team Role", data={"Account": {"read": "team", "edit": "team", "delete": "own"}})
+    extra_role = Role(id="r2", name="Via Team", data={"Contact": {"read": "all"}})
+    team = Team(id="t1", name="Team 1")
+    team.roles.append(extra_role)
+    user = User(id="u1", user_name="user1")
+    user.roles.append(team_role)
+    user.teams.append(team)
+    db.add_all([team_role, extra_role, team, user])
+    db.add_all([Account(id="a1", name="Team account"), Account(id="a2", name="Own account", assigned_user_id="u1")])
+    db.commit()
+    db.execute(entity_team.insert().values(entity_id="a1", entity_type="Account", team_id="t1"))
+    db.commit()
+    db.close()
+
+    monkeypatch.setattr(settings, "aclRaiseOnLazyLoad", True)
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        session = TestingSessionLocal()
+        principal = acl_service.load_user(session, "u1")
+        # user, roles, teams, team roles
+        assert len(statements) == 4
+        assert acl_service.get_permission_level(principal, "Contact", "read") == "all"
+
+        statements.clear()
+        service = RecordService(session, principal)
+        assert service.read("Account", "a1")["name"] == "Team account"
+        # record + its teams, nothing lazy-loaded by check_scope
+        assert len(statements) == 2
+
+        assert service.update("Account", "a1", {"industry": "Retail"})["industry"] == "Retail"
+        assert [r["id"] for r in service.find("Account", {})["list"]] == ["a1", "a2"]
+        with pytest.raises(PermissionError):
+            service.delete("Account", "a1")
+        statements.clear()
+        assert service.delete("Account", "a2")
+        # "own" level: the record's teams aren't needed, so not loaded
+        assert not any("entity_team" in statement for statement in statements)
+        session.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+def test_record_versions_and_etags(db):
+    from app.services.record_service import PreconditionFailed, etag_matches
+
+    service = RecordService(db)
+    created = service.create("Account", {"name": "Acme", "versionNumber": 7})
+    assert created["versionNumber"] == 1 and created["modifiedAt"] is not None
+    data, etag = service.read_with_etag("Account", created["id"])
+    assert etag_matches(etag, etag) and etag_matches(f'W/{etag}, "other"', etag)
+    assert not etag_matches(f"W/{etag}", etag, weak=False)
+    # Projections have their own ETag
+    assert service.read_with_etag("Account", created["id"], ["name"])[1] != etag
+
+    updated = service.update("Account", created["id"], {"industry": "Retail"}, if_match=etag)
+    assert updated["versionNumber"] == 2
+    with pytest.raises(PreconditionFailed):
+        service.update("Account", created["id"], {"industry": "Finance"}, if_match=etag)
+    assert service.read("Account", created["id"])["industry"] == "Retail"
+
+    service.mass_update("Account", {"ids": [created["id"]], "data": {"type": "Customer"}})
+    db.add(Contact(id="c1", last_name="One"))
+    db.commit()
+    service.link_many("Account", created["id"], "contactsPrimary", ["c1"])
+    assert service.read("Account", created["id"])["versionNumber"] == 3
+    assert service.read("Contact", "c1")["versionNumber"] == 2
+    service.delete("Account", created["id"])
+    assert service.read("Account", created["id"])["versionNumber"] == 4
+
+def test_record_cache_checks_scope_and_invalidates(db, monkeypatch):
+    from app.core.config import settings
+    from app.models.acl_entities import Role, Team
+    from app.services.acl_service import acl_service
+
+    monkeypatch.setattr(settings, "recordCacheSize", 2)
+    role = Role(id="r1", name="Own Role", data={"Account": {"read": "own", "edit": "all"}})
+    owner = User(id="u1", user_name="owner")
+    other = User(id="u2", user_name="other")
+    owner.roles.append(role)
+    other.roles.append(role)
+    db.add_all([role, owner, other, Team(id="t1", name="Team 1")])
+    db.add_all([Account(id=f"a{i}", name=f"Account {i}", assigned_user_id="u1") for i in range(3)])
+    db.commit()
+
+    assert RecordService(db, owner).read("Account", "a0")["name"] == "Account 0"
+    # Cached row, but the decision is made per user on every hit
+    with pytest.raises(PermissionError):
+        RecordService(db, other).read("Account", "a0")
+    assert record_cache.stats()["hits"] == 1
+
+    service = RecordService(db)
+    service.update("Account", "a0", {"name": "Renamed"})
+    assert service.read("Account", "a0")["name"] == "Renamed"
+    service.mass_update("Account", {"ids": ["a0"], "data": {"assignedUserId": "u2"}})
+    assert RecordService(db, other).read("Account", "a0")["assignedUserId"] == "u2"
+    service.link_many("Account", "a0", "teams", ["t1"])
+    assert record_cache.get("Account", "a0") is None
+
+    for i in range(3):
+        service.read("Account", f"a{i}")
+    stats = record_cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1 and stats["invalidations"] >= 3
+
+def test_if_match_update_is_atomic(db, monkeypatch):
+    from app.core.config import settings
+    from app.services.record_service import PreconditionFailed, get_record_etag
+
+    monkeypatch.setattr(settings, "recordCacheSize", 0)
+    service = RecordService(db)
+    created = service.create("Account", {"name": "Initial"})
+    etag = get_record_etag(created)
+
+    # Both requests loaded the record and pass the If-Match check before either writes;
+    # keep a reference so the stale row stays in the second session's identity map
+    other_db = TestingSessionLocal()
+    other = RecordService(other_db)
+    stale = other_db.get(Account, created["id"])
+    assert stale.version_number == 1
+
+    assert service.update("Account", created["id"], {"name": "First"}, etag)["versionNumber"] == 2
+    with pytest.raises(PreconditionFailed):
+        other.update("Account", created["id"], {"name": "Second"}, etag)
+    other_db.close()
+
+    db.expire_all()
+    record = service.read("Account", created["id"])
+    assert record["name"] == "First"
+    assert record["versionNumber"] == 2
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.endpoints.auth import login_access_token
+from app.core import security
+from app.core.config import settings
+from app.core.database import Base
+from app.models.user import User
+
+# Setup in-memory DB
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db(monkeypatch):
+    # Cheap hashes
+    monkeypatch.setattr(settings, "passwordHashRounds", 4)
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+class LoginForm:
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+
+def test_password_hasher_fails_fast_when_full(monkeypatch):
+    monkeypatch.setattr(settings, "passwordHashWorkers", 1)
+    monkeypatch.setattr(settings, "passwordHashQueueSize", 1)
+    hasher = security.PasswordHasher()
+    release = threading.Event()
+
+    running = hasher.submit(release.wait)
+    queued = hasher.submit(lambda: "queued")
+    with pytest.raises(security.PasswordHasherBusy):
+        hasher.submit(lambda: "rejected")
+
+    release.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "queued"
+    # Slots are released once jobs finish
+    assert hasher.submit(lambda: "later").result(timeout=5) == "later"
+    assert hasher.stats()["rejected"] == 1
+    hasher.shutdown()
+
+def test_login_rehashes_when_cost_changes(db, monkeypatch):
+    db.add(User(id="u1", user_name="ada", password=security.get_password_hash("secret")))
+    db.commit()
+    old_hash = db.get(User, "u1").password
+    assert old_hash.startswith("$2b$04$")
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(login_access_token(db, LoginForm("ada", "wrong")))
+    assert e.value.status_code == 400
+
+    assert asyncio.run(login_access_token(db, LoginForm("ada", "secret")))["access_token"]
+    assert db.get(User, "u1").password == old_hash
+
+    monkeypatch.setattr(settings, "passwordHashRounds", 5)
+    asyncio.run(login_access_token(db, LoginForm("ada", "secret")))
+    db.expire_all()
+    new_hash = db.get(User, "u1").password
+    assert new_hash.startswith("$2b$05$")
+    assert security.verify_password("secret", new_hash)
+
+def test_login_answers_503_when_hashing_is_saturated(db, monkeypatch):
+    db.add(User(id="u1", user_name="ada", password=security.get_password_hash("secret")))
+    db.commit()
+
+    def busy(*args):
+        raise security.PasswordHasherBusy()
+    monkeypatch.setattr(security.password_hasher, "submit", busy)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(login_access_token(db, LoginForm("ada", "secret")))
+    assert e.value.status_code == 503
+    assert e.value.headers["Retry-After"] == "1"